@@ -10,6 +10,10 @@ from .messages import (
     MessageAttachment,
     MessageListResponse,
     MessageResponse,
+    QueuedMessage,
+    QueuedMessageRequest,
+    SendMessageBatchRequest,
+    SendMessageBatchResponse,
     SendMessageRequest,
     SendMessageResponse,
 )
@@ -23,6 +27,10 @@ __all__ = [
     "MessageAttachment",
     "MessageListResponse",
     "MessageResponse",
+    "QueuedMessage",
+    "QueuedMessageRequest",
+    "SendMessageBatchRequest",
+    "SendMessageBatchResponse",
     "SendMessageRequest",
     "SendMessageResponse",
 ]
@@ -2,6 +2,9 @@
 Pydantic models for message-related API endpoints.
 """
 
+from dataclasses import dataclass
+from typing import BinaryIO
+
 from pydantic import BaseModel, Field
 
 
@@ -22,12 +25,14 @@ class MessageAttachment(BaseModel):
     is_inline: bool = False
 
 
-class AttachmentData(BaseModel):
-    """Attachment data model for API requests."""
+@dataclass
+class AttachmentData:
+    """Attachment of a message being sent; its content stays in the uploaded file, which is spooled to disk."""
 
     filename: str
     content_type: str
-    data: bytes
+    size: int
+    file: BinaryIO
 
 
 class BaseMessage(BaseModel):
@@ -107,3 +112,33 @@ class SendMessageResponse(BaseModel):
     request_id: str
     grant_id: str
     data: SendMessageData
+
+
+class QueuedMessageRequest(SendMessageRequest):
+    """Request model for a message of a batch send."""
+
+    send_at: int | None = None
+
+
+class SendMessageBatchRequest(BaseModel):
+    """Request model for queueing several messages to be sent."""
+
+    messages: list[QueuedMessageRequest]
+    # Unix timestamp to send the messages at that don't have their own; by default they are sent right away
+    send_at: int | None = None
+
+
+class QueuedMessage(BaseModel):
+    """Queued message model; its id is reported back in the message.send_success/message.send_failed webhooks."""
+
+    id: str
+    send_at: int
+    status: str = "queued"
+
+
+class SendMessageBatchResponse(BaseModel):
+    """Response model for queueing several messages to be sent."""
+
+    request_id: str
+    grant_id: str
+    data: list[QueuedMessage]
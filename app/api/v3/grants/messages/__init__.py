@@ -5,17 +5,23 @@ Messages API router - Sub-router for message endpoints under grants.
 import json
 import logging
 import mimetypes
+import os
 import uuid
+from contextlib import AsyncExitStack
 from typing import Any
 
 from dependency_injector.wiring import Provide, inject
 from fastapi import APIRouter, Depends, Path, Query, Request, status
 from fastapi.responses import JSONResponse
+from starlette.datastructures import FormData, UploadFile
 
 from app.api.middlewares.authentication import get_current_app
 from app.api.payloads import (
     MessageListResponse,
     MessageResponse,
+    QueuedMessage,
+    SendMessageBatchRequest,
+    SendMessageBatchResponse,
     SendMessageRequest,
     SendMessageResponse,
 )
@@ -25,8 +31,14 @@ from app.api.utils.errors import create_error_response, validate_grant_access
 from app.container import ApplicationContainer
 from app.controllers.email.email_controller import EmailController
 from app.controllers.imap.message_controller import MessageController
+from app.controllers.smtp.send_budget import (
+    SendBudget,
+    SendBudgetExhaustedError,
+    SendRequestTooLargeError,
+)
 from app.controllers.smtp.smtp_controller import SMTPInvalidParameterError
 from app.models.app import App
+from settings import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -119,8 +131,10 @@ async def list_messages(
     response_model=SendMessageResponse,
     responses={
         400: {"model": APIError, "description": "Invalid parameter or bad request"},
+        413: {"model": APIError, "description": "Request too large"},
         422: {"model": APIError, "description": "Validation error"},
         500: {"model": APIError, "description": "Internal server error"},
+        503: {"model": APIError, "description": "Too many messages being sent"},
     },
     summary="Send a message",
     description="Sends an email message through the specified grant's email account. Supports both JSON and multipart form data (for attachments).",
@@ -131,6 +145,7 @@ async def send_message(
     grant_id: str = Path(..., example="a3ec500d-126b-4532-a632-7808721b3732"),
     app: App = Depends(get_current_app),
     email_controller: EmailController = Depends(Provide[ApplicationContainer.controllers.email_controller]),
+    send_budget: SendBudget = Depends(Provide[ApplicationContainer.controllers.smtp_send_budget]),
 ) -> SendMessageResponse | JSONResponse:
     """
     Sends the specified message.
@@ -141,29 +156,62 @@ async def send_message(
     assert account is not None  # account is guaranteed to be not None when error_response is None
 
     try:
-        # Check if this is a multipart request (with attachments)
-        content_type = request.headers.get("content-type", "")
-        if content_type.startswith("multipart/form-data"):
-            message_data, attachments = await _parse_multipart_request(request)
-        else:
-            body = await request.body()
-            message_data = SendMessageRequest.model_validate_json(body)
-            attachments = []
-
-        send_message_result = await email_controller.send_email(
-            account=account,
-            to=message_data.to,
-            subject=message_data.subject,
-            body=message_data.body,
-            from_=message_data.from_,
-            cc=message_data.cc,
-            bcc=message_data.bcc,
-            reply_to=message_data.reply_to,
-            reply_to_message_id=message_data.reply_to_message_id,
-            attachments=attachments,
-        )
+        async with AsyncExitStack() as stack:
+            # The request's size is reserved before its body is read; without a Content-Length, the largest allowed.
+            content_length = request.headers.get("content-length", "")
+            reserved = send_budget.reserve(
+                int(content_length) if content_length.isdigit() else settings.smtp.send_max_request_size
+            )
+            stack.callback(send_budget.release, reserved)
+
+            # Check if this is a multipart request (with attachments)
+            content_type = request.headers.get("content-type", "")
+            if content_type.startswith("multipart/form-data"):
+                # Uploads are spooled to temporary files, which are closed once the message is sent.
+                form = await stack.enter_async_context(request.form())
+                message_data, attachments = _parse_multipart_form(form)
+                attachments_size = sum(attachment.size for attachment in attachments)
+                if attachments_size > settings.smtp.send_max_request_size:
+                    raise SendRequestTooLargeError(attachments_size)
+            else:
+                body = await request.body()
+                message_data = SendMessageRequest.model_validate_json(body)
+                attachments = []
+
+            send_message_result = await email_controller.send_email(
+                account=account,
+                to=message_data.to,
+                subject=message_data.subject,
+                body=message_data.body,
+                from_=message_data.from_,
+                cc=message_data.cc,
+                bcc=message_data.bcc,
+                reply_to=message_data.reply_to,
+                reply_to_message_id=message_data.reply_to_message_id,
+                attachments=attachments,
+            )
         return SendMessageResponse(request_id=str(uuid.uuid4()), grant_id=grant_id, data=send_message_result.message)
 
+    except SendRequestTooLargeError as e:
+        return create_error_response(
+            error_type="invalid_request_error",
+            message=f"Message too large: {e.size} bytes",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            provider_error={
+                "code": "RequestTooLarge",
+                "message": f"The request can be at most {settings.smtp.send_max_request_size} bytes",
+            },
+        )
+    except SendBudgetExhaustedError:
+        return create_error_response(
+            error_type="service_unavailable",
+            message="Too many messages are being sent, try again later",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            provider_error={
+                "code": "ServiceUnavailable",
+                "message": "Too many messages are being sent, try again later",
+            },
+        )
     except SMTPInvalidParameterError as e:
         return create_error_response(
             error_type="invalid_request_error",
@@ -187,18 +235,74 @@ async def send_message(
         )
 
 
-async def _parse_multipart_request(request: Request) -> tuple[SendMessageRequest, list[AttachmentData]]:
+@router.post(
+    "/send/batch",
+    response_model=SendMessageBatchResponse,
+    responses={
+        400: {"model": APIError, "description": "Invalid parameter or bad request"},
+        422: {"model": APIError, "description": "Validation error"},
+        500: {"model": APIError, "description": "Internal server error"},
+    },
+    summary="Queue messages to be sent",
+    description="Queues several messages to be sent through the specified grant's email account, right away or at "
+    "their `send_at` time. The outcome of each message is reported with a message.send_success or "
+    "message.send_failed webhook.",
+)
+@inject
+async def send_message_batch(
+    batch: SendMessageBatchRequest,
+    grant_id: str = Path(..., example="a3ec500d-126b-4532-a632-7808721b3732"),
+    app: App = Depends(get_current_app),
+    email_controller: EmailController = Depends(Provide[ApplicationContainer.controllers.email_controller]),
+) -> SendMessageBatchResponse | JSONResponse:
+    """
+    Queues the specified messages.
     """
-    Parse multipart form data request to extract message and attachments.
+    account, error_response = await validate_grant_access(app.id, grant_id)
+    if error_response:
+        return error_response
+    assert account is not None  # account is guaranteed to be not None when error_response is None
+
+    if not batch.messages or len(batch.messages) > settings.smtp.send_batch_max_messages:
+        message = f"A batch must have between 1 and {settings.smtp.send_batch_max_messages} messages"
+        return create_error_response(
+            error_type="invalid_request_error",
+            message=message,
+            status_code=status.HTTP_400_BAD_REQUEST,
+            provider_error={"code": "InvalidParameterError", "message": message},
+        )
+
+    try:
+        outgoing_messages = email_controller.queue_emails(account, batch.messages, batch.send_at)
+        data = [
+            QueuedMessage(id=str(outgoing_message.uuid), send_at=int(outgoing_message.next_attempt_at.timestamp()))
+            for outgoing_message in outgoing_messages
+        ]
+        return SendMessageBatchResponse(request_id=str(uuid.uuid4()), grant_id=grant_id, data=data)
+    except Exception:
+        logger.exception("Failed to queue messages")
+        return create_error_response(
+            error_type="provider_error",
+            message="An unexpected error occurred when queueing the messages",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            provider_error={
+                "code": "InternalError",
+                "message": "An unexpected error occurred when queueing the messages",
+            },
+        )
+
+
+def _parse_multipart_form(form: FormData) -> tuple[SendMessageRequest, list[AttachmentData]]:
+    """
+    Parse multipart form data to extract message and attachments.
 
     Expected format:
     - "Message" field: JSON string with message data
-    - "Attachment" fields: File uploads
+    - "Attachment" fields: File uploads, which are kept in their spooled files rather than read into memory
     """
     attachments: list[AttachmentData] = []
     message_json: dict[str, Any] | None = None
 
-    form = await request.form()
     for field_name, field_value in form.multi_items():
         if field_name == "Message":
             # Parse the JSON message data
@@ -208,9 +312,7 @@ async def _parse_multipart_request(request: Request) -> tuple[SendMessageRequest
                 raise ValueError("Message field must be a JSON string")
         elif field_name == "Attachment":
             # Handle attachment
-            if hasattr(field_value, "filename") and hasattr(field_value, "read"):
-                # It's an UploadFile
-                file_content = await field_value.read()
+            if isinstance(field_value, UploadFile):
                 filename = field_value.filename or "unknown"
 
                 # Determine content type based on filename extension
@@ -218,7 +320,14 @@ async def _parse_multipart_request(request: Request) -> tuple[SendMessageRequest
                 if content_type is None:
                     content_type = "application/octet-stream"
 
-                attachment = AttachmentData(filename=filename, content_type=content_type, data=file_content)
+                size = field_value.size
+                if size is None:
+                    size = field_value.file.seek(0, os.SEEK_END)
+                    field_value.file.seek(0)
+
+                attachment = AttachmentData(
+                    filename=filename, content_type=content_type, size=size, file=field_value.file
+                )
                 attachments.append(attachment)
 
     if message_json is None:
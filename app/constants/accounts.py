@@ -0,0 +1,2 @@
+# Postgres NOTIFY channel on which account status and credential changes are published
+ACCOUNT_CHANGES_CHANNEL = "account_changes"
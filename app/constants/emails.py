@@ -1,3 +1,9 @@
 HEADER_MESSAGE_ID = "Message-ID"
 
-SENT_FOLDERS = ["Sent", "Sent Messages", "Sent Items"]
+SENT_FOLDERS = ["Sent", "Sent Messages", "Sent Items", "Sent Mail", "[Gmail]/Sent Mail"]
+
+# SMTP servers that keep a copy of every message sent through them in the Sent folder, so it mustn't be appended again
+SENT_COPY_SMTP_HOSTS = ["smtp.gmail.com", "smtp.office365.com", "smtp-mail.outlook.com"]
+
+FLAG_SEEN = "\\Seen"
+FLAG_FLAGGED = "\\Flagged"
@@ -0,0 +1,12 @@
+WEBHOOK_MESSAGE_CREATED = "message.created"
+WEBHOOK_MESSAGE_UPDATED = "message.updated"
+WEBHOOK_MESSAGE_DELETED = "message.deleted"
+WEBHOOK_MESSAGE_SEND_SUCCESS = "message.send_success"
+WEBHOOK_MESSAGE_SEND_FAILED = "message.send_failed"
+
+# Monthly partitions of the webhook_logs table are named e.g. webhook_logs_p202610
+WEBHOOK_LOGS_PARTITION_PREFIX = "webhook_logs_p"
+# Partition holding the logs outside the monthly partitions, e.g. when maintenance fell behind
+WEBHOOK_LOGS_DEFAULT_PARTITION = "webhook_logs_default"
+# Advisory lock taken while a dispatcher creates or drops webhook_logs partitions
+WEBHOOK_LOGS_MAINTENANCE_LOCK_ID = 7_301_442_019
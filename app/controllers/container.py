@@ -5,11 +5,20 @@ from dependency_injector import containers, providers
 from app.controllers.email.email_controller import EmailController
 from app.controllers.grant.authorization_controller import AuthorizationController
 from app.controllers.grant.grant_controller import GrantController
+from app.controllers.imap.account_watcher import AccountWatcher
 from app.controllers.imap.connection import ConnectionManager
 from app.controllers.imap.email_processor import EmailProcessor
 from app.controllers.imap.listener import IMAPListener
+from app.controllers.imap.message_fetcher import MessageFetcher
 from app.controllers.imap.message_controller import MessageController
+from app.controllers.imap.uid_tracking_cache import UidTrackingCache
+from app.controllers.smtp.send_budget import SendBudget
+from app.controllers.smtp.send_queue_worker import SendQueueWorker
+from app.controllers.smtp.sent_message_saver import SentMessageSaver
 from app.controllers.smtp.smtp_controller import SMTPController
+from app.controllers.smtp.smtp_pool import SMTPConnectionPool
+from app.controllers.webhook.webhook_dispatcher import WebhookDispatcher
+from app.controllers.webhook.webhook_log_writer import WebhookLogWriter
 from app.repos.container import RepoContainer
 
 
@@ -17,27 +26,60 @@ class ControllerContainer(containers.DeclarativeContainer):
     repos: RepoContainer = cast(RepoContainer, providers.DependenciesContainer())
 
     imap_email_processor = providers.Singleton(
-        EmailProcessor, webhook_log_repo=repos.webhook_log, email_repo=repos.email
+        EmailProcessor, webhook_outbox_repo=repos.webhook_outbox, email_repo=repos.email
     )
     imap_connection_manager = providers.Singleton(ConnectionManager)
+    imap_message_fetcher = providers.Singleton(MessageFetcher)
+    imap_uid_tracking_cache = providers.Singleton(UidTrackingCache, uid_tracking_repo=repos.uid_tracking)
+    imap_account_watcher = providers.Singleton(AccountWatcher, account_repo=repos.account)
     imap_message_controller = providers.Singleton(MessageController, connection_manager=imap_connection_manager)
     imap_listener = providers.Singleton(
         IMAPListener,
         connection_health_repo=repos.connection_health,
-        uid_tracking_repo=repos.uid_tracking,
+        uid_tracking_cache=imap_uid_tracking_cache,
+        account_watcher=imap_account_watcher,
         connection_manager=imap_connection_manager,
         email_processor=imap_email_processor,
         email_repo=repos.email,
+        message_fetcher=imap_message_fetcher,
+    )
+
+    smtp_pool = providers.Singleton(SMTPConnectionPool)
+    smtp_send_budget = providers.Singleton(SendBudget)
+    smtp_controller = providers.Singleton(SMTPController, smtp_pool=smtp_pool)
+    sent_message_saver = providers.Singleton(
+        SentMessageSaver,
+        sent_message_job_repo=repos.sent_message_job,
+        account_repo=repos.account,
+        email_repo=repos.email,
+        connection_manager=imap_connection_manager,
     )
 
-    smtp_controller = providers.Singleton(SMTPController, connection_manager=imap_connection_manager)
+    webhook_log_writer = providers.Singleton(WebhookLogWriter, webhook_log_repo=repos.webhook_log)
+    webhook_dispatcher = providers.Singleton(
+        WebhookDispatcher,
+        webhook_outbox_repo=repos.webhook_outbox,
+        webhook_log_writer=webhook_log_writer,
+        app_repo=repos.app,
+    )
 
     email_controller = providers.Singleton(
         EmailController,
         email_repo=repos.email,
+        outgoing_message_repo=repos.outgoing_message,
+        sent_message_job_repo=repos.sent_message_job,
         message_controller=imap_message_controller,
         smtp_controller=smtp_controller,
     )
+    send_queue_worker = providers.Singleton(
+        SendQueueWorker,
+        outgoing_message_repo=repos.outgoing_message,
+        account_repo=repos.account,
+        webhook_outbox_repo=repos.webhook_outbox,
+        email_controller=email_controller,
+        smtp_controller=smtp_controller,
+        smtp_pool=smtp_pool,
+    )
 
     grant_controller = providers.Singleton(
         GrantController,
@@ -1,24 +1,38 @@
 import logging
+import time
+import uuid
+from datetime import UTC, datetime
 from typing import List
 
-from app.api.payloads.messages import AttachmentData, EmailAddress
+from app.api.payloads.messages import AttachmentData, EmailAddress, QueuedMessageRequest
 from app.controllers.email.message import MessageResult, SendMessageResult
 from app.controllers.imap.message_controller import MessageController
 from app.controllers.smtp.smtp_controller import (
     SMTPController,
     SMTPInvalidParameterError,
 )
-from app.models import Email
+from app.models import Email, OutgoingMessage
 from app.models.account import Account
 from app.repos.email import EmailRepo
+from app.repos.outgoing_message import OutgoingMessageRepo
+from app.repos.sent_message_job import SentMessageJobRepo
 
 
 class EmailController:
     """Controller for email operations."""
 
-    def __init__(self, email_repo: EmailRepo, message_controller: MessageController, smtp_controller: SMTPController):
+    def __init__(
+        self,
+        email_repo: EmailRepo,
+        outgoing_message_repo: OutgoingMessageRepo,
+        sent_message_job_repo: SentMessageJobRepo,
+        message_controller: MessageController,
+        smtp_controller: SMTPController,
+    ):
         self._logger = logging.getLogger(__name__)
         self._email_repo = email_repo
+        self._outgoing_message_repo = outgoing_message_repo
+        self._sent_message_job_repo = sent_message_job_repo
         self._message_controller = message_controller
         self._smtp_controller = smtp_controller
 
@@ -88,6 +102,47 @@ class EmailController:
             attachments=attachments,
         )
 
+        await self.record_sent_email(account, send_message_result)
+        return send_message_result
+
+    def queue_emails(
+        self, account: Account, messages: list[QueuedMessageRequest], send_at: int | None = None
+    ) -> list[OutgoingMessage]:
+        """
+        Queue messages to be sent by the SendQueueWorker; they are inserted when the caller commits.
+
+        Args:
+            account: The account to send from
+            messages: The messages, each sent at its own `send_at` if it has one
+            send_at: Unix timestamp to send the other messages at; by default they are sent right away
+
+        Returns:
+            The queued messages
+        """
+        now = int(time.time())
+        outgoing_messages = [
+            OutgoingMessage(
+                uuid=uuid.uuid4(),
+                app_id=account.app_id,
+                account_id=account.id,
+                request_json=message.model_dump_json(by_alias=True),
+                next_attempt_at=datetime.fromtimestamp(max(message.send_at or send_at or now, now), UTC),
+            )
+            for message in messages
+        ]
+        self._outgoing_message_repo.enqueue(outgoing_messages)
+        return outgoing_messages
+
+    async def record_sent_email(self, account: Account, send_message_result: SendMessageResult) -> None:
+        """
+        Queue saving a sent email to the Sent folder, and cache it so that it is recognized as sent when it shows up
+        there. Both are inserted when the caller commits.
+        """
+        sent_copy = send_message_result.sent_copy
+        if sent_copy is not None:
+            send_message_result.sent_copy = None
+            with sent_copy:
+                await self._sent_message_job_repo.enqueue_message(account.id, send_message_result.message_id, sent_copy)
         if send_message_result.folder:
             await self._email_repo.add(
                 Email(
@@ -97,5 +152,3 @@ class EmailController:
                     folder=send_message_result.folder,
                 ),
             )
-
-        return send_message_result
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from email.message import Message as PythonMessage
+from typing import IO
 
 from app.api.payloads.messages import Message, SendMessageData
 
@@ -17,3 +18,5 @@ class SendMessageResult:
     message_id: str
     thread_id: str
     folder: str | None = None
+    # The rendered message, spooled to disk past `spool_max_memory`, until it is queued to be saved to the Sent folder
+    sent_copy: IO[bytes] | None = None
@@ -110,6 +110,8 @@ class AuthorizationController:
                     ),
                 },
             )
+            # Workers watching the account reconnect with the new credentials
+            await self._account_repo.notify_changed(account)
         else:
             account = Account(
                 app_id=app.id,
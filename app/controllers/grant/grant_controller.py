@@ -14,8 +14,12 @@ class GrantController:
         """
         Delete a grant by setting account status to inactive and removing uid_tracking records.
 
+        The IMAP workers are notified once the change is committed, so they stop watching the account right away.
+
         Args:
             account: The account to delete
         """
-        await self.account_repo.update(account, {"status": AccountStatus.inactive})
+        await self.account_repo.update(account, {"status": AccountStatus.inactive}, do_commit=False)
         await self.uid_tracking_repo.delete_all_by_account(account.id)
+        await self.account_repo.notify_changed(account)
+        await self.account_repo.commit()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Sequence
+
+import asyncpg
+from fastapi_async_sqlalchemy import db
+
+from app.constants.accounts import ACCOUNT_CHANGES_CHANNEL
+from app.models import Account
+from app.models.account import AccountStatus
+from app.repos.account import AccountRepo
+from settings import settings
+
+
+class AccountWatcher:
+    """
+    Tracks status and credential changes of the accounts watched by this worker.
+
+    Changes are pushed by Postgres NOTIFY on a dedicated LISTEN connection, so listeners only reload an account when it
+    actually changed instead of on every poll. A slow reconciliation of `updated_at` catches the notifications missed
+    while that connection was down.
+    """
+
+    def __init__(self, account_repo: AccountRepo) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._account_repo = account_repo
+        self._updated_at: dict[int, datetime] = {}  # account id -> updated_at of the loaded row
+        self._changed: set[int] = set()
+        self._connection: asyncpg.Connection | None = None
+        self._reconcile_task: asyncio.Task[None] | None = None
+
+    async def start(self, accounts: Sequence[Account]) -> None:
+        """Watch the accounts and start listening for their changes if that isn't the case yet."""
+        for account in accounts:
+            self.watch(account)
+
+        try:
+            if self._connection is None or self._connection.is_closed():
+                await self._listen()
+        except Exception:
+            self._logger.warning("Failed to listen for account changes; relying on reconciliation", exc_info=True)
+
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_periodically())
+
+    def watch(self, account: Account) -> None:
+        """Start tracking changes of an account."""
+        self._updated_at.setdefault(account.id, account.updated_at)
+
+    def unwatch(self, account_id: int) -> None:
+        """Stop tracking changes of an account."""
+        self._updated_at.pop(account_id, None)
+        self._changed.discard(account_id)
+
+    async def sync(self, account: Account) -> bool:
+        """
+        Reload an account if it changed since it was last synced.
+
+        Returns:
+            Whether the account is active
+        """
+        self.watch(account)
+        if account.id in self._changed:
+            # Discard before reloading, so that a change committed during the reload is picked up next time.
+            self._changed.discard(account.id)
+            await db.session.refresh(account)
+            self._updated_at[account.id] = account.updated_at
+            self._logger.info(f"Reloaded account {account.email} after a change (status: {account.status.value})")
+
+        return account.status == AccountStatus.active
+
+    async def reconcile(self) -> None:
+        """Mark the accounts whose row changed without a notification reaching this worker."""
+        if not self._updated_at:
+            return
+
+        rows = await self._account_repo.get_updated_at_by_ids(list(self._updated_at))
+        for account_id, updated_at in rows:
+            if updated_at != self._updated_at.get(account_id):
+                self._changed.add(account_id)
+
+    async def close(self) -> None:
+        """Stop the reconciliation and close the LISTEN connection."""
+        if self._reconcile_task and not self._reconcile_task.done():
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+        self._reconcile_task = None
+
+        if self._connection is not None and not self._connection.is_closed():
+            try:
+                await asyncio.wait_for(self._connection.close(), timeout=5)
+            except Exception:
+                self._connection.terminate()
+        self._connection = None
+
+    async def _listen(self) -> None:
+        """Open the connection on which account change notifications are received."""
+        self._connection = await asyncpg.connect(f"{settings.database.host}/{settings.database.name}")
+        await self._connection.add_listener(ACCOUNT_CHANGES_CHANNEL, self._on_notification)
+        self._logger.debug(f"Listening for account changes on {ACCOUNT_CHANGES_CHANNEL}")
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        """Mark a watched account as changed; it is reloaded by the next listener that syncs it."""
+        try:
+            account_id = int(json.loads(payload)["id"])
+        except (ValueError, KeyError, TypeError):
+            self._logger.warning(f"Ignoring malformed account change notification: {payload}")
+            return
+
+        if account_id in self._updated_at:
+            self._changed.add(account_id)
+
+    async def _reconcile_periodically(self) -> None:
+        """Reconnect the LISTEN connection if it dropped and reconcile every `account_reconcile_interval` seconds."""
+        while True:
+            await asyncio.sleep(settings.imap.account_reconcile_interval)
+            try:
+                if self._connection is None or self._connection.is_closed():
+                    await self._listen()
+                await self.reconcile()
+            except Exception:
+                self._logger.warning("Failed to reconcile account changes", exc_info=True)
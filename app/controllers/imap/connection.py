@@ -1,6 +1,8 @@
 import asyncio
 import logging
 import time
+import weakref
+from dataclasses import dataclass
 
 from aioimaplib import IMAP4_SSL
 
@@ -10,6 +12,9 @@ from settings import settings
 
 logger = logging.getLogger(__name__)
 
+# IMAP states in which a connection is logged in and can be handed out again.
+_REUSABLE_STATES = ("AUTH", "SELECTED")
+
 
 class RateLimiter:
     """Token bucket rate limiter for IMAP connections."""
@@ -42,6 +47,15 @@ class RateLimiter:
             self._tokens = 0
 
 
+@dataclass
+class _IdleConnection:
+    """An authenticated connection waiting in the pool to be reused."""
+
+    connection: IMAP4_SSL
+    idle_since: float
+    last_activity: float
+
+
 class ConnectionManager:
     """Manages IMAP connections with pooling and rate limiting."""
 
@@ -51,6 +65,13 @@ class ConnectionManager:
         self._connection_locks: dict[str, asyncio.Semaphore] = {}
         self._lock = asyncio.Lock()
 
+        # Authenticated sessions keyed by (account id, IMAP host), most recently used last.
+        self._idle_connections: dict[tuple[int, str], list[_IdleConnection]] = {}
+        self._maintenance_task: asyncio.Task[None] | None = None
+        self._closed = False
+        # Sessions on which ENABLE QRESYNC succeeded; ENABLE is only allowed before a folder is selected.
+        self._qresync_connections: weakref.WeakSet[IMAP4_SSL] = weakref.WeakSet()
+
         # Simple connection limit per provider
         self._connection_limit = 10
 
@@ -69,11 +90,35 @@ class ConnectionManager:
         return connection
 
     async def get_connection(self, account: Account, folder: str | None = None) -> IMAP4_SSL | None:
-        """Get an IMAP connection for the account."""
+        """
+        Get an IMAP connection for the account.
+
+        A pooled session is reused when one is available (re-selecting `folder` on it); otherwise a new connection is
+        opened. Callers hand the connection back with `release_connection` or discard it with `close_connection`.
+        """
         imap_provider = account.provider_context.get("imap_host")
         if not imap_provider:
             raise ValueError("IMAP provider not found in account context")
 
+        self._closed = False
+        self._ensure_maintenance_task()
+
+        pool_key = self._get_pool_key(account)
+        if pool_key is not None:
+            connection = await self._checkout_idle_connection(account, pool_key)
+            if connection is not None:
+                try:
+                    if folder:
+                        await connection.select(folder)
+                    self._logger.debug(f"Reusing pooled IMAP connection for {account.email}:{folder}")
+                    return connection
+                except Exception:
+                    self._logger.warning(
+                        f"Failed to select {folder} on pooled IMAP connection for {account.email}, reconnecting",
+                        exc_info=True,
+                    )
+                    await self._logout_quietly(connection)
+
         # Rate limiting
         if imap_provider in self._rate_limiters:
             await self._rate_limiters[imap_provider].acquire()
@@ -81,6 +126,30 @@ class ConnectionManager:
         async with self._connection_locks.get(imap_provider, asyncio.Semaphore(self._connection_limit)):
             return await self._create_new_connection(account, folder)
 
+    async def release_connection(self, connection: IMAP4_SSL, account: Account) -> None:
+        """Return a connection to the pool so that the next checkout for the account can reuse it."""
+        pool_key = self._get_pool_key(account)
+        if pool_key is None or self._closed or not self.is_usable(connection):
+            await self.close_connection(connection, account)
+            return
+
+        async with self._lock:
+            idle_connections = self._idle_connections.setdefault(pool_key, [])
+            if len(idle_connections) < settings.imap.pool_max_idle_per_account:
+                now = time.monotonic()
+                idle_connections.append(_IdleConnection(connection=connection, idle_since=now, last_activity=now))
+                return
+
+        await self.close_connection(connection, account)
+
+    def is_usable(self, connection: IMAP4_SSL) -> bool:
+        """Check whether a connection is still logged in and can run further commands."""
+        return connection.get_state() in _REUSABLE_STATES
+
+    def has_qresync(self, connection: IMAP4_SSL) -> bool:
+        """Check whether QRESYNC (and with it CONDSTORE) was enabled on a connection."""
+        return connection in self._qresync_connections
+
     async def _create_new_connection(self, account: Account, folder: str | None = None) -> IMAP4_SSL | None:
         """Create a new IMAP connection."""
         imap_host = account.provider_context.get("imap_host")
@@ -97,6 +166,9 @@ class ConnectionManager:
                 self._logger.warning(f"Failed to login to {imap_host} for {account.email}: {response.result}")
                 return None
 
+            if settings.imap.sync_flag_changes and connection.has_capability("QRESYNC"):
+                await self._enable_qresync(connection, account)
+
             if folder:
                 await connection.select(folder)
 
@@ -107,6 +179,19 @@ class ConnectionManager:
             self._logger.warning(f"Failed to create IMAP connection for {account.email}", exc_info=True)
             raise
 
+    async def _enable_qresync(self, connection: IMAP4_SSL, account: Account) -> None:
+        """Enable QRESYNC so that expunged messages are reported as VANISHED UIDs on this session."""
+        try:
+            response = await connection.enable("QRESYNC")
+        except Exception as e:
+            self._logger.debug(f"ENABLE QRESYNC failed for {account.email}: {e}")
+            return
+
+        if response.result == "OK":
+            self._qresync_connections.add(connection)
+        else:
+            self._logger.debug(f"ENABLE QRESYNC rejected for {account.email}: {response.result}")
+
     async def close_connection(self, connection: IMAP4_SSL, account: Account) -> None:
         """Close an IMAP connection."""
         try:
@@ -123,5 +208,121 @@ class ConnectionManager:
             self._logger.warning(f"Error closing connection for {account.email}: {e}")
 
     async def close_all_connections(self) -> None:
-        """Close all connections - simplified since we don't track persistent connections."""
-        self._logger.info("Connection manager cleanup complete (no persistent connections to close)")
+        """Stop the pool maintenance and log out every idle pooled connection."""
+        self._closed = True
+
+        if self._maintenance_task and not self._maintenance_task.done():
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+        self._maintenance_task = None
+
+        async with self._lock:
+            idle_connections = [idle for pooled in self._idle_connections.values() for idle in pooled]
+            self._idle_connections.clear()
+
+        await asyncio.gather(
+            *(self._logout_quietly(idle.connection) for idle in idle_connections), return_exceptions=True
+        )
+        self._logger.info(f"Connection manager cleanup complete ({len(idle_connections)} pooled connections closed)")
+
+    def _get_pool_key(self, account: Account) -> tuple[int, str] | None:
+        """Get the pool key of an account; accounts that were never persisted are not pooled."""
+        imap_host = account.provider_context.get("imap_host")
+        if account.id is None or not imap_host:
+            return None
+        return account.id, imap_host
+
+    async def _checkout_idle_connection(self, account: Account, pool_key: tuple[int, str]) -> IMAP4_SSL | None:
+        """Take the most recently used healthy connection out of the pool."""
+        while True:
+            async with self._lock:
+                idle_connections = self._idle_connections.get(pool_key)
+                if not idle_connections:
+                    return None
+                idle = idle_connections.pop()
+
+            if await self._is_healthy(idle):
+                return idle.connection
+
+            self._logger.debug(f"Discarding unhealthy pooled IMAP connection for {account.email}")
+            await self._logout_quietly(idle.connection)
+
+    async def _is_healthy(self, idle: _IdleConnection) -> bool:
+        """Check that a pooled connection is still logged in, issuing a NOOP if it has been quiet for a while."""
+        if not self.is_usable(idle.connection):
+            return False
+
+        if time.monotonic() - idle.last_activity < settings.imap.pool_health_check_after:
+            return True
+
+        try:
+            response = await asyncio.wait_for(idle.connection.noop(), timeout=10)
+            return bool(response.result == "OK")
+        except Exception:
+            return False
+
+    def _ensure_maintenance_task(self) -> None:
+        """Start the background keepalive/eviction loop if it isn't running yet."""
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.create_task(self._maintain_idle_connections())
+
+    async def _maintain_idle_connections(self) -> None:
+        """Keep idle pooled connections alive with NOOP and evict the ones idle for too long."""
+        check_interval = max(1, min(settings.imap.pool_keepalive_interval, settings.imap.pool_max_idle_time) // 2)
+
+        while True:
+            await asyncio.sleep(check_interval)
+
+            now = time.monotonic()
+            to_evict: list[_IdleConnection] = []
+            to_keepalive: list[tuple[tuple[int, str], _IdleConnection]] = []
+
+            async with self._lock:
+                for pool_key, idle_connections in list(self._idle_connections.items()):
+                    for idle in list(idle_connections):
+                        if now - idle.idle_since >= settings.imap.pool_max_idle_time:
+                            idle_connections.remove(idle)
+                            to_evict.append(idle)
+                        elif now - idle.last_activity >= settings.imap.pool_keepalive_interval:
+                            # Take it out while the NOOP is in flight so that nobody checks it out concurrently.
+                            idle_connections.remove(idle)
+                            to_keepalive.append((pool_key, idle))
+
+                    if not idle_connections:
+                        self._idle_connections.pop(pool_key, None)
+
+            for idle in to_evict:
+                await self._logout_quietly(idle.connection)
+
+            for pool_key, idle in to_keepalive:
+                try:
+                    response = await asyncio.wait_for(idle.connection.noop(), timeout=10)
+                    healthy = response.result == "OK"
+                except Exception:
+                    healthy = False
+
+                if not healthy:
+                    await self._logout_quietly(idle.connection)
+                    continue
+
+                idle.last_activity = time.monotonic()
+                async with self._lock:
+                    self._idle_connections.setdefault(pool_key, []).insert(0, idle)
+
+            if to_evict or to_keepalive:
+                self._logger.debug(
+                    f"IMAP pool maintenance: evicted {len(to_evict)}, kept alive {len(to_keepalive)} connections"
+                )
+
+    async def _logout_quietly(self, connection: IMAP4_SSL) -> None:
+        """Log out a pooled connection, ignoring errors from sessions the server already dropped."""
+        try:
+            await asyncio.wait_for(connection.logout(), timeout=5)
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
@@ -1,41 +1,53 @@
 import asyncio
 import email
-import hashlib
-import hmac
 import json
 import logging
 import uuid
-from datetime import UTC, datetime
+from dataclasses import dataclass
 from email.message import Message as PythonEmailMessage
-from uuid import UUID
 
 import aiohttp
 
-from app.api.payloads.messages import Message
+from app.api.payloads.messages import Message, MessageAttachment
+from app.controllers.imap.message_fetcher import FetchedMessage
+from app.controllers.webhook.http_session import create_webhook_session
 from app.constants.emails import SENT_FOLDERS
-from app.models import Account, WebhookLog
+from app.constants.webhooks import WEBHOOK_MESSAGE_CREATED, WEBHOOK_MESSAGE_DELETED, WEBHOOK_MESSAGE_UPDATED
+from app.models import Account, Email, WebhookOutbox
 from app.repos.email import EmailRepo
-from app.repos.webhook_log import WebhookLogRepo
+from app.repos.webhook_outbox import WebhookOutboxRepo
 from app.utils.message_utils import MessageUtils
-from settings import settings
+from app.utils.webhook_utils import WebhookUtils
+
+
+@dataclass
+class ProcessedEmail:
+    """A new email after it went through the EmailProcessor."""
+
+    message: FetchedMessage
+    nylas_message: Message
 
 
 class EmailProcessor:
-    """Processes new emails and sends webhooks with retry logic."""
+    """
+    Processes new emails and queues their webhooks.
 
-    def __init__(self, webhook_log_repo: WebhookLogRepo, email_repo: EmailRepo) -> None:
+    Webhook events are added to the outbox in the caller's transaction and delivered by the WebhookDispatcher, so
+    processing never waits on webhook endpoints.
+    """
+
+    def __init__(self, webhook_outbox_repo: WebhookOutboxRepo, email_repo: EmailRepo) -> None:
         self._logger = logging.getLogger(__name__)
         self._http_session: aiohttp.ClientSession | None = None
         self._session_lock = asyncio.Lock()
-        self._webhook_log_repo = webhook_log_repo
+        self._webhook_outbox_repo = webhook_outbox_repo
         self._email_repo = email_repo
 
     async def init_session(self) -> None:
-        """Initialize HTTP session for webhook delivery."""
+        """Initialize HTTP session for test webhooks."""
         async with self._session_lock:
             if self._http_session is None:
-                timeout = aiohttp.ClientTimeout(total=settings.webhook.timeout)
-                self._http_session = aiohttp.ClientSession(timeout=timeout)
+                self._http_session = create_webhook_session()
 
     async def close_session(self) -> None:
         """Close HTTP session."""
@@ -43,27 +55,21 @@ class EmailProcessor:
             await self._http_session.close()
             self._http_session = None
 
-    def _generate_signature(self, message_body: str, webhook_secret: str) -> str:
-        """
-        Generate HMAC-SHA256 signature for webhook authenticity.
-        This matches the Nylas webhook signature format.
-        """
-        if not webhook_secret:
-            return ""
-
-        try:
-            digest = hmac.new(
-                webhook_secret.encode("utf-8"), msg=message_body.encode("utf-8"), digestmod=hashlib.sha256
-            ).hexdigest()
-            return digest
-        except Exception as e:
-            self._logger.error(f"Error generating webhook signature: {e}")
-            return ""
-
-    async def process_email(self, account: Account, folder: str, uid: int, raw_message: PythonEmailMessage) -> Message:
-        """Process a new email and send webhook."""
-
-        nylas_message = MessageUtils.convert_to_nylas_format(msg=raw_message, grant_id=account.uuid, folder=folder)
+    async def process_email(
+        self,
+        account: Account,
+        folder: str,
+        uid: int,
+        raw_message: PythonEmailMessage,
+        flags: list[str] | None = None,
+        body: str | None = None,
+        attachments: list[MessageAttachment] | None = None,
+    ) -> Message:
+        """Process a new email and queue its webhook; the caller commits it."""
+
+        nylas_message = MessageUtils.convert_to_nylas_format(
+            msg=raw_message, grant_id=account.uuid, folder=folder, flags=flags, body=body, attachments=attachments
+        )
         cached_email = await self._email_repo.get_by_account_and_email_id(account.id, nylas_message.id)
         if cached_email and cached_email.folder in SENT_FOLDERS:
             self._logger.info(
@@ -72,136 +78,116 @@ class EmailProcessor:
             )
             return nylas_message
 
-        await self.send_webhook_with_retry(account, folder, uid, nylas_message)
+        self._webhook_outbox_repo.enqueue(
+            [self._build_webhook_event(account, folder, uid, nylas_message.model_dump_json(by_alias=True))]
+        )
         self._logger.info(f"Processed email UID {uid} for {account.email}:{folder}")
         return nylas_message
 
-    async def send_webhook_with_retry(self, account: Account, folder: str, uid: int, message: Message) -> bool:
-        """Send webhook with exponential backoff retry logic."""
-        await self.init_session()
-
-        if not self._http_session:
-            self._logger.error("HTTP session not initialized")
-            return False
-
-        webhook_uuid = uuid.uuid4()
-        payload = {
-            "specversion": "1.0",
-            "type": "message.created",
-            "source": "imap",
-            "id": str(webhook_uuid),
-            "time": int(asyncio.get_event_loop().time()),
-            "webhook_delivery_attempt": 1,
-            "data": {"application_id": str(account.app.uuid), "object": message.model_dump(by_alias=True)},
-        }
-
-        max_retries = settings.webhook.max_retries
-        base_delay = 1.0
+    async def process_emails(
+        self, account: Account, folder: str, messages: list[FetchedMessage]
+    ) -> list[ProcessedEmail]:
+        """
+        Process a batch of new emails and queue their webhooks.
 
-        for attempt in range(1, max_retries + 1):
-            payload["webhook_delivery_attempt"] = attempt
-            payload_json = json.dumps(payload)
-            signature = self._generate_signature(payload_json, account.app.webhook_secret or "")
-            headers = {"Content-Type": "application/json"}
-            if signature:
-                headers["x-nylas-signature"] = signature
+        The sent cache is looked up once for the whole batch and the webhook events are queued without committing, so
+        that the caller stores them in the same transaction as the rest of the batch.
 
+        Returns:
+            Each email that could be converted, in UID order
+        """
+        nylas_messages: list[tuple[FetchedMessage, Message]] = []
+        for message in messages:
             try:
-                async with self._http_session.post(
-                    account.app.webhook_url,
-                    data=payload_json,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=settings.webhook.timeout),
-                ) as response:
-                    # Log the attempt
-                    await self._log_webhook_delivery(
-                        account=account,
-                        webhook_uuid=webhook_uuid,
-                        folder=folder,
-                        uid=uid,
-                        status_code=response.status,
-                        response_body=await response.text() if response.status != 200 else None,
-                        attempts=attempt,
-                        delivered=response.status == 200,
-                    )
-
-                    if response.status == 200:
-                        self._logger.info(f"Webhook delivered successfully for {account.email}:{folder} UID {uid}")
-                        return True
-                    else:
-                        self._logger.warning(
-                            f"Webhook failed with status {response.status} for {account.email}:{folder}, UID {uid}"
-                        )
-
-                        # Don't retry for client errors (4xx)
-                        if 400 <= response.status < 500:
-                            return False
-
-            except asyncio.TimeoutError:
-                self._logger.warning(f"Webhook timeout (attempt {attempt}) for {account.email}:{folder} UID {uid}")
-                await self._log_webhook_delivery(
-                    account=account,
-                    webhook_uuid=webhook_uuid,
+                nylas_message = MessageUtils.convert_to_nylas_format(
+                    msg=message.raw_message,
+                    grant_id=account.uuid,
                     folder=folder,
-                    uid=uid,
-                    status_code=None,
-                    response_body="Timeout",
-                    attempts=attempt,
-                    delivered=False,
+                    flags=message.flags,
+                    body=message.body,
+                    attachments=message.attachments,
                 )
+                nylas_messages.append((message, nylas_message))
+            except Exception:
+                self._logger.warning(f"Failed to convert message {message.uid} for {account.email}:{folder}")
 
-            except Exception as e:
-                self._logger.warning(f"Webhook error (attempt {attempt}) for {account.email}:{folder} UID {uid}: {e}")
-                await self._log_webhook_delivery(
-                    account=account,
-                    webhook_uuid=webhook_uuid,
-                    folder=folder,
-                    uid=uid,
-                    status_code=None,
-                    response_body=str(e),
-                    attempts=attempt,
-                    delivered=False,
+        cached_emails = await self._email_repo.get_by_account_and_email_ids(
+            account.id, [nylas_message.id for _, nylas_message in nylas_messages]
+        )
+        sent_email_ids = {
+            cached_email.email_id for cached_email in cached_emails if cached_email.folder in SENT_FOLDERS
+        }
+
+        processed: list[ProcessedEmail] = []
+        events: list[WebhookOutbox] = []
+        for message, nylas_message in sorted(nylas_messages, key=lambda pair: pair[0].uid):
+            processed.append(ProcessedEmail(message=message, nylas_message=nylas_message))
+            if nylas_message.id in sent_email_ids:
+                self._logger.info(
+                    f"Message already exists in cache. It was likely sent via our API; account: {account.email}, "
+                    f"email_id: {nylas_message.id}"
                 )
+                continue
 
-            # Exponential backoff before retry
-            if attempt < max_retries:
-                delay = base_delay * (2 ** (attempt - 1))
-                await asyncio.sleep(delay)
+            events.append(
+                self._build_webhook_event(account, folder, message.uid, nylas_message.model_dump_json(by_alias=True))
+            )
+
+        self._webhook_outbox_repo.enqueue(events)
+        self._logger.info(f"Processed {len(processed)}/{len(messages)} emails for {account.email}:{folder}")
+        return processed
 
-        self._logger.error(
-            f"Webhook delivery failed after {max_retries} attempts for {account.email}:{folder}, UID {uid}"
+    async def process_email_update(
+        self, account: Account, folder: str, uid: int, raw_headers: PythonEmailMessage, flags: list[str]
+    ) -> None:
+        """Queue a message.updated webhook for an email whose flags changed; the caller commits it."""
+        nylas_message = MessageUtils.convert_to_nylas_format(
+            msg=raw_headers, grant_id=account.uuid, folder=folder, flags=flags
         )
-        return False
+        object_json = nylas_message.model_dump_json(by_alias=True)
+        self._webhook_outbox_repo.enqueue(
+            [self._build_webhook_event(account, folder, uid, object_json, event_type=WEBHOOK_MESSAGE_UPDATED)]
+        )
+        self._logger.info(f"Processed flag change of UID {uid} for {account.email}:{folder}")
+
+    async def process_email_deletion(self, account: Account, folder: str, cached_email: Email) -> None:
+        """Queue a message.deleted webhook for a cached email that was expunged from its folder."""
+        object_json = json.dumps(
+            {
+                "id": cached_email.email_id,
+                "grant_id": str(account.uuid),
+                "object": "message",
+                "thread_id": cached_email.thread_id,
+                "folders": [folder],
+            },
+            separators=(",", ":"),
+        )
+        self._webhook_outbox_repo.enqueue(
+            [
+                self._build_webhook_event(
+                    account, folder, cached_email.uid or 0, object_json, event_type=WEBHOOK_MESSAGE_DELETED
+                )
+            ]
+        )
+        self._logger.info(f"Processed deletion of UID {cached_email.uid} for {account.email}:{folder}")
 
-    async def _log_webhook_delivery(
+    def _build_webhook_event(
         self,
         account: Account,
-        webhook_uuid: UUID,
         folder: str,
         uid: int,
-        status_code: int | None = None,
-        response_body: str | None = None,
-        attempts: int = 1,
-        delivered: bool = False,
-    ) -> None:
-        """Log webhook delivery attempt using repository."""
-        try:
-            await self._webhook_log_repo.persist(
-                WebhookLog(
-                    uuid=webhook_uuid,
-                    app_id=account.app_id,
-                    account_id=account.id,
-                    folder=folder,
-                    uid=uid,
-                    webhook_url=account.app.webhook_url,
-                    status_code=status_code,
-                    response_body=response_body,
-                    attempts=attempts,
-                    delivered_at=datetime.now(UTC) if delivered else None,
-                )
-            )
-        except Exception as e:
-            self._logger.error(f"Failed to log webhook delivery: {e}")
+        object_json: str,
+        event_type: str = WEBHOOK_MESSAGE_CREATED,
+    ) -> WebhookOutbox:
+        """Build the outbox event of a webhook from its serialized object."""
+        return WebhookOutbox(
+            app_id=account.app_id,
+            account_id=account.id,
+            folder=folder,
+            uid=uid,
+            event_type=event_type,
+            object_json=object_json,
+        )
 
     async def send_test_webhook(self, account: Account) -> bool:
         """Send a test webhook to verify connectivity."""
@@ -229,7 +215,7 @@ class EmailProcessor:
         payload_json = json.dumps(test_payload, separators=(",", ":"))
 
         # Generate signature for webhook authenticity
-        signature = self._generate_signature(payload_json, account.app.webhook_secret or "")
+        signature = WebhookUtils.generate_signature(payload_json, account.app.webhook_secret or "")
 
         # Prepare headers
         headers = {"Content-Type": "application/json"}
@@ -237,12 +223,7 @@ class EmailProcessor:
             headers["x-nylas-signature"] = signature
 
         try:
-            async with self._http_session.post(
-                account.app.webhook_url,
-                data=payload_json,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=settings.webhook.timeout),
-            ) as response:
+            async with self._http_session.post(account.app.webhook_url, data=payload_json, headers=headers) as response:
                 if response.status == 200:
                     self._logger.info(f"Test webhook successful for {account.email}")
                     return True
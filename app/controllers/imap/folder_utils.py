@@ -1,6 +1,7 @@
 import logging
 from typing import List
 
+from app.constants.emails import SENT_FOLDERS
 from app.controllers.imap.connection import ConnectionManager
 from app.models import Account
 
@@ -51,7 +52,7 @@ class FolderUtils:
                         if folder_name.strip():
                             folders.append(folder_name)
 
-            await connection_manager.close_connection(connection, account)
+            await connection_manager.release_connection(connection, account)
 
             # Limit folders per account to prevent resource exhaustion
             if len(folders) > max_folders:
@@ -66,6 +67,54 @@ class FolderUtils:
             # Return common default folders as fallback
             return ["INBOX", "Sent"]
 
+    @staticmethod
+    async def get_sent_folder(connection_manager: ConnectionManager, account: Account) -> str | None:
+        """
+        Find the Sent folder of an account.
+
+        Args:
+            connection_manager: The connection manager to use
+            account: The account configuration
+
+        Returns:
+            The folder flagged as `\\Sent` (RFC 6154 SPECIAL-USE), otherwise the first folder with a well-known Sent
+            folder name, or None if there is neither
+        """
+        connection = await connection_manager.get_connection_or_fail(account)
+        try:
+            response = await connection.list('""', "*")
+        finally:
+            await connection_manager.release_connection(connection, account)
+
+        folders: list[str] = []
+        for line in response.lines:
+            folder_name = FolderUtils.parse_folder_from_list_response(line)
+            if folder_name is None:
+                continue
+            # The attributes come first, e.g. b'(\\HasNoChildren \\Sent) "/" "Sent Items"'
+            attributes = line.split(b")", 1)[0].lower() if line.startswith(b"(") else b""
+            if b"\\sent" in attributes.split():
+                return folder_name
+            folders.append(folder_name)
+
+        return next((folder for folder in SENT_FOLDERS if folder in folders), None)
+
+    @staticmethod
+    def quote_folder_name(folder: str) -> str:
+        """
+        Quote a folder name for use as an IMAP command argument.
+
+        Args:
+            folder: The folder name, e.g. "Sent Items"
+
+        Returns:
+            The folder name as is if it is a plain atom, otherwise as a quoted string
+        """
+        if folder and not any(char in folder for char in ' "\\(){%*'):
+            return folder
+        escaped = folder.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+
     @staticmethod
     def parse_folder_from_list_response(line: bytes) -> str | None:
         """
@@ -2,56 +2,91 @@ import asyncio
 import email
 import logging
 import random
-from email.message import Message
+import re
+from dataclasses import dataclass
+from typing import Sequence
 
-from aioimaplib import IMAP4_SSL, Response
-from fastapi_async_sqlalchemy import db
+from aioimaplib import IMAP4_SSL, STOP_WAIT_SERVER_PUSH, Response
 
 from app.constants.emails import HEADER_MESSAGE_ID
+from app.controllers.imap.account_watcher import AccountWatcher
 from app.controllers.imap.connection import ConnectionManager
-from app.controllers.imap.email_processor import EmailProcessor
+from app.controllers.imap.email_processor import EmailProcessor, ProcessedEmail
 from app.controllers.imap.folder_utils import FolderUtils
-from app.models import Account, Email, UidTracking
-from app.models.account import AccountStatus
+from app.controllers.imap.message_fetcher import MessageFetcher
+from app.controllers.imap.response_parser import ResponseParser
+from app.controllers.imap.uid_tracking_cache import FolderState, UidTrackingCache
+from app.models import Account
 from app.repos.connection_health import ConnectionHealthRepo
 from app.repos.email import EmailRepo
-from app.repos.uid_tracking import UidTrackingRepo
 from settings import settings
 
+WATCH_MODE_POLL = "poll"
+WATCH_MODE_IDLE = "idle"
+
+# Headers of changed messages are fetched in chunks so a bulk flag change doesn't load thousands of them at once.
+_HEADER_FETCH_CHUNK_SIZE = 100
+
+
+@dataclass(frozen=True)
+class _FolderStatus:
+    """The STATUS values used to tell whether a folder changed since it was last checked."""
+
+    uid_next: int
+    uid_validity: int
+    messages: int
+    highest_mod_seq: int | None = None
+
 
 class IMAPListener:
-    """Async IMAP listener that polls folders for new emails."""
+    """Async IMAP listener that polls folders (or IDLEs on INBOX) for new emails."""
 
     def __init__(
         self,
         connection_health_repo: ConnectionHealthRepo,
-        uid_tracking_repo: UidTrackingRepo,
+        uid_tracking_cache: UidTrackingCache,
+        account_watcher: AccountWatcher,
         email_repo: EmailRepo,
         connection_manager: ConnectionManager,
         email_processor: EmailProcessor,
+        message_fetcher: MessageFetcher,
     ):
         self._logger = logging.getLogger(__name__)
-        self._active_listeners: dict[str, asyncio.Task[None]] = {}  # account:folder -> task
+        # account -> poll scheduler task, account:folder -> IDLE task
+        self._active_listeners: dict[str, asyncio.Task[None]] = {}
+        self._polled_folders: dict[str, list[str]] = {}  # account -> folders walked by its poll scheduler
         self._shutdown_event = asyncio.Event()
         self._listener_lock = asyncio.Lock()
 
         self._connection_health_repo = connection_health_repo
-        self._uid_tracking_repo = uid_tracking_repo
+        self._uid_tracking_cache = uid_tracking_cache
+        self._account_watcher = account_watcher
         self._email_repo = email_repo
         self._connection_manager = connection_manager
         self._email_processor = email_processor
+        self._message_fetcher = message_fetcher
+
+    async def load_accounts(self, accounts: Sequence[Account]) -> None:
+        """Load the UID tracking state of the accounts watched by this worker and start watching them for changes."""
+        await self._uid_tracking_cache.load_accounts([account.id for account in accounts])
+        await self._account_watcher.start(accounts)
 
     async def start_account_listener(self, account: Account) -> list[asyncio.Task[None]]:
         """Start listening to all folders for an account."""
-        await self._email_processor.init_session()
+        self._account_watcher.watch(account)
 
         try:
             # Get list of folders using shared utility
             folders = await FolderUtils.get_account_folders(self._connection_manager, account)
 
+            use_idle = self._get_watch_mode(account) == WATCH_MODE_IDLE
+
             tasks = []
+            polled_folders = []
             for folder in folders:
-                task = asyncio.create_task(self._listen_to_folder(account, folder))
+                if not (use_idle and folder.upper() == "INBOX"):
+                    polled_folders.append(folder)
+                    continue
 
                 listener_key = f"{account.email}:{folder}"
                 async with self._listener_lock:
@@ -59,10 +94,16 @@ class IMAPListener:
                         self._logger.warning(f"Listener already active for {listener_key}")
                         continue
 
+                    task = asyncio.create_task(self._idle_on_folder(account, folder))
                     self._active_listeners[listener_key] = task
 
                 tasks.append(task)
-                self._logger.info(f"Started polling for {account.email}:{folder}")
+                self._logger.info(f"Started IDLE for {account.email}:{folder}")
+
+            if polled_folders:
+                poll_task = await self._add_polled_folders(account, polled_folders)
+                if poll_task:
+                    tasks.append(poll_task)
 
             return tasks
 
@@ -74,26 +115,35 @@ class IMAPListener:
     async def stop_listener(self, account_email: str, folder: str) -> None:
         """Stop a specific listener."""
         listener_key = f"{account_email}:{folder}"
+        task: asyncio.Task[None] | None = None
 
         async with self._listener_lock:
-            task = self._active_listeners.get(listener_key)
-            if task and not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+            if listener_key in self._active_listeners:
+                task = self._active_listeners.pop(listener_key)
+            elif folder in self._polled_folders.get(account_email, []):
+                # Polled folders share the account's scheduler, which only stops once its last folder is removed.
+                self._polled_folders[account_email].remove(folder)
+                if not self._polled_folders[account_email]:
+                    self._polled_folders.pop(account_email)
+                    task = self._active_listeners.pop(account_email, None)
+
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
-                self._active_listeners.pop(listener_key, None)
-                self._logger.info(f"Stopped listener for {account_email}:{folder}")
+        self._logger.info(f"Stopped listener for {account_email}:{folder}")
 
     async def stop_account_listeners(self, account_email: str) -> None:
         """Stop all listeners for an account."""
         tasks_to_cancel: list[asyncio.Task[None]] = []
 
         async with self._listener_lock:
+            self._polled_folders.pop(account_email, None)
             for listener_key in list(self._active_listeners.keys()):
-                if listener_key.startswith(f"{account_email}:"):
+                if listener_key == account_email or listener_key.startswith(f"{account_email}:"):
                     task = self._active_listeners.pop(listener_key)
                     if not task.done():
                         tasks_to_cancel.append(task)
@@ -108,6 +158,12 @@ class IMAPListener:
 
         self._logger.info(f"Stopped all listeners for {account_email}")
 
+    async def remove_account(self, account: Account) -> None:
+        """Stop watching an account that moved to another worker, writing back its UID tracking first."""
+        await self.stop_account_listeners(account.email)
+        self._account_watcher.unwatch(account.id)
+        await self._uid_tracking_cache.unload_account(account.id)
+
     async def stop_all_listeners(self) -> None:
         """Stop all active listeners."""
         self._shutdown_event.set()
@@ -118,6 +174,7 @@ class IMAPListener:
                 if not task.done():
                     tasks_to_cancel.append(task)
             self._active_listeners.clear()
+            self._polled_folders.clear()
 
         # Cancel all tasks
         for task in tasks_to_cancel:
@@ -146,6 +203,17 @@ class IMAPListener:
                 except asyncio.TimeoutError:
                     self._logger.error("Some tasks failed to cancel even after force cancellation")
 
+        try:
+            await asyncio.wait_for(self._account_watcher.close(), timeout=10)
+        except Exception:
+            self._logger.exception("Failed to stop watching account changes")
+
+        # Write back the UID tracking changes that weren't flushed yet
+        try:
+            await asyncio.wait_for(self._uid_tracking_cache.close(), timeout=10)
+        except Exception:
+            self._logger.exception("Failed to flush UID tracking on shutdown")
+
         # Close all connections with timeout
         try:
             await asyncio.wait_for(self._connection_manager.close_all_connections(), timeout=10)
@@ -159,8 +227,30 @@ class IMAPListener:
 
         self._logger.info("Stopped all IMAP listeners")
 
-    async def _listen_to_folder(self, account: Account, folder: str) -> None:
-        """Poll a specific folder for new emails."""
+    async def _add_polled_folders(self, account: Account, folders: list[str]) -> asyncio.Task[None] | None:
+        """
+        Add folders to the account's poll scheduler, starting the scheduler if it isn't running yet.
+
+        Returns:
+            The scheduler task if it was started by this call, None if it was already running
+        """
+        async with self._listener_lock:
+            polled_folders = self._polled_folders.setdefault(account.email, [])
+            polled_folders.extend(folder for folder in folders if folder not in polled_folders)
+
+            task = self._active_listeners.get(account.email)
+            if task and not task.done():
+                self._logger.info(f"Added folders {folders} to the poll scheduler of {account.email}")
+                return None
+
+            task = asyncio.create_task(self._poll_account(account))
+            self._active_listeners[account.email] = task
+
+        self._logger.info(f"Started polling for {account.email}: {polled_folders}")
+        return task
+
+    async def _poll_account(self, account: Account) -> None:
+        """Poll all of an account's folders on a single session, walking the folder list one folder at a time."""
 
         consecutive_failures = 0
         max_failures = 5
@@ -168,68 +258,74 @@ class IMAPListener:
 
         # Add jitter to prevent thundering herd - spread polls across the interval
         jitter = random.uniform(0, min(settings.imap.poll_jitter_max, poll_interval * 0.5))
-        self._logger.debug(f"Starting polling for {account.email}:{folder} with {jitter:.1f}s jitter")
-        await asyncio.sleep(jitter)
+        self._logger.debug(f"Starting polling for {account.email} with {jitter:.1f}s jitter")
+        if await self._sleep_until_shutdown(jitter):
+            return
 
         while not self._shutdown_event.is_set():
             connection: IMAP4_SSL | None = None
             try:
-                await db.session.refresh(account)
-                if account.status != AccountStatus.active:
-                    self._logger.debug(f"Account {account.email} is not active, skipping folder {folder}")
-                    for _ in range(poll_interval * 20):
-                        if self._shutdown_event.is_set():
-                            return
-                        await asyncio.sleep(0.1)
+                if not await self._account_watcher.sync(account):
+                    self._logger.debug(f"Account {account.email} is not active, skipping polling")
+                    await self._uid_tracking_cache.unload_account(account.id)
+                    if await self._sleep_until_shutdown(poll_interval * 2):
+                        return
                     continue
 
-                connection = await self._connection_manager.get_connection_or_fail(account, folder)
-                search_response = await connection.search("ALL")
-                all_uids = self._parse_search_response(search_response)
-                last_seen_uid = await self._uid_tracking_repo.get_last_seen_uid(account.id, folder)
-                if last_seen_uid is None:
-                    self._logger.warning(
-                        f"No last seen UID found for {account.email}:{folder}. Creating new UID tracking"
-                    )
-                    last_seen_uid = all_uids[-1] if all_uids else 0
-                    await self._uid_tracking_repo.add(
-                        UidTracking(account_id=account.id, folder=folder, last_seen_uid=last_seen_uid), commit=True
-                    )
-                    self._logger.info(f"New UID tracking created for {account.email}:{folder}: {last_seen_uid}")
+                folders = list(self._polled_folders.get(account.email, []))
+                if not folders:
+                    break
 
-                new_uids = [uid for uid in all_uids if uid > last_seen_uid]
-                if new_uids:
-                    self._logger.info(f"Found {len(new_uids)} new messages for {account.email}:{folder}: {new_uids}")
-                    await self._process_new_messages_by_uids(connection, account, folder, new_uids)
-                else:
-                    self._logger.debug(f"No new messages for {account.email}:{folder}")
+                states = await self._uid_tracking_cache.get_account_states(account.id)
 
-                # Record successful poll
-                await self._record_connection_health(account.id, folder, True)
+                connection = await self._connection_manager.get_connection_or_fail(account)
+                statuses = await self._get_folder_statuses(connection, folders)
+                for folder in folders:
+                    if self._shutdown_event.is_set():
+                        break
+
+                    # Folders whose STATUS still matches the one of their last complete check are skipped.
+                    status = statuses.get(folder)
+                    if status is not None and status == self._get_known_status(states.get(folder)):
+                        continue
+
+                    try:
+                        await self._check_folder(connection, account, folder)
+                        state = states.get(folder)
+                        if status is not None and state is not None:
+                            self._uid_tracking_cache.update(
+                                state, {"uid_next": status.uid_next, "message_count": status.messages}
+                            )
+                        await self._record_connection_health(account.id, folder, True)
+                    except Exception as e:
+                        # A broken session fails the whole cycle; anything else only affects this folder.
+                        if not self._connection_manager.is_usable(connection):
+                            raise
+
+                        self._logger.warning(f"Polling error for {account.email}:{folder}: {e}")
+                        await self._record_connection_health(account.id, folder, False, str(e))
+
+                await self._record_connection_health(account.id, "ALL", True)
                 consecutive_failures = 0
 
-                await self._connection_manager.close_connection(connection, account)
+                await self._connection_manager.release_connection(connection, account)
                 connection = None
 
                 # Wait for next poll interval, checking for shutdown frequently
-                for _ in range(poll_interval * 10):
-                    if self._shutdown_event.is_set():
-                        return
-                    await asyncio.sleep(0.1)
+                if await self._sleep_until_shutdown(poll_interval):
+                    return
 
             except asyncio.CancelledError:
-                self._logger.info(f"Polling cancelled for {account.email}:{folder}")
+                self._logger.info(f"Polling cancelled for {account.email}")
                 break
 
             except Exception as e:
                 consecutive_failures += 1
                 error_msg = str(e)
 
-                self._logger.warning(
-                    f"Polling error for {account.email}:{folder} (failure {consecutive_failures}): {error_msg}"
-                )
+                self._logger.warning(f"Polling error for {account.email} (failure {consecutive_failures}): {error_msg}")
 
-                await self._record_connection_health(account.id, folder, False, error_msg)
+                await self._record_connection_health(account.id, "ALL", False, error_msg)
 
                 # Close connection on error
                 if connection:
@@ -239,40 +335,410 @@ class IMAPListener:
                         pass
                     connection = None
 
-                # Check if we should stop this folder
+                # Check if we should stop polling this account for a while
                 if consecutive_failures >= max_failures:
                     self._logger.error(
-                        f"Max failures reached for {account.email}:{folder}. Check if something is wrong with the "
-                        "account."
+                        f"Max failures reached for {account.email}. Check if something is wrong with the account."
                     )
-                    for _ in range(poll_interval * 20):
-                        if self._shutdown_event.is_set():
-                            return
-                        await asyncio.sleep(0.1)
+                    if await self._sleep_until_shutdown(poll_interval * 2):
+                        return
                     continue
 
                 # Exponential backoff for errors, but not too long
                 backoff_time = min(120, 10 * consecutive_failures)  # Max 2 minutes
                 self._logger.debug(f"Backing off for {backoff_time}s after error")
 
-                for _ in range(int(backoff_time * 10)):  # Check shutdown every 0.1 seconds
-                    if self._shutdown_event.is_set():
-                        return
-                    await asyncio.sleep(0.1)
+                if await self._sleep_until_shutdown(backoff_time):
+                    return
 
         # Clean up
+        async with self._listener_lock:
+            if self._active_listeners.get(account.email) is asyncio.current_task():
+                self._active_listeners.pop(account.email, None)
+
+        self._logger.info(f"Stopped polling for {account.email}")
+
+    def _get_known_status(self, state: FolderState | None) -> _FolderStatus | None:
+        """Get the STATUS values a folder had when it was last fully checked."""
+        if state is None or state.uid_next is None or state.uid_validity is None or state.message_count is None:
+            return None
+        return _FolderStatus(
+            uid_next=state.uid_next,
+            uid_validity=state.uid_validity,
+            messages=state.message_count,
+            highest_mod_seq=state.highest_mod_seq,
+        )
+
+    async def _get_folder_statuses(self, connection: IMAP4_SSL, folders: list[str]) -> dict[str, _FolderStatus]:
+        """
+        Get UIDNEXT, UIDVALIDITY and MESSAGES of each folder with STATUS, without opening any of them.
+
+        On CONDSTORE servers HIGHESTMODSEQ is requested as well, so that flag changes also mark a folder as changed.
+        Asking for it enables CONDSTORE on the session, which makes the following EXAMINE report HIGHESTMODSEQ too.
+        """
+        items = "(UIDNEXT UIDVALIDITY MESSAGES)"
+        if settings.imap.sync_flag_changes and connection.has_capability("CONDSTORE"):
+            items = "(UIDNEXT UIDVALIDITY MESSAGES HIGHESTMODSEQ)"
+
+        statuses: dict[str, _FolderStatus] = {}
+        for folder in folders:
+            response = await connection.status(FolderUtils.quote_folder_name(folder), items)
+            if response.result != "OK":
+                self._logger.debug(f"STATUS failed for folder {folder}: {response.result}")
+                continue
+
+            status = self._parse_status_response(response)
+            if status is not None:
+                statuses[folder] = status
+        return statuses
+
+    async def _sleep_until_shutdown(self, seconds: float) -> bool:
+        """
+        Sleep for the given number of seconds, waking up early if the listener is shutting down.
+
+        Returns:
+            True if shutdown was requested
+        """
+        # A single timed wait on the event, so that an idle listener costs one timer instead of one wakeup per 100ms.
+        if not self._shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(self._shutdown_event.wait(), timeout=seconds)
+            except asyncio.TimeoutError:
+                pass
+        return self._shutdown_event.is_set()
+
+    async def _idle_on_folder(self, account: Account, folder: str) -> None:
+        """Hold an IDLE session on a folder, falling back to polling when the server doesn't support IDLE."""
+        consecutive_failures = 0
+        max_failures = 5
+        poll_interval = settings.imap.poll_interval
+
+        while not self._shutdown_event.is_set():
+            connection: IMAP4_SSL | None = None
+            try:
+                if not await self._account_watcher.sync(account):
+                    self._logger.debug(f"Account {account.email} is not active, skipping folder {folder}")
+                    await self._uid_tracking_cache.unload_account(account.id)
+                    if await self._sleep_until_shutdown(poll_interval * 2):
+                        return
+                    continue
+
+                connection = await self._connection_manager.get_connection_or_fail(account)
+                if not connection.has_capability("IDLE"):
+                    self._logger.info(f"IDLE not supported for {account.email}:{folder}, falling back to polling")
+                    await self._connection_manager.release_connection(connection, account)
+                    connection = None
+                    async with self._listener_lock:
+                        self._active_listeners.pop(f"{account.email}:{folder}", None)
+                    await self._add_polled_folders(account, [folder])
+                    return
+
+                self._logger.info(f"Started IDLE session for {account.email}:{folder}")
+                await self._check_folder(connection, account, folder)
+                await self._record_connection_health(account.id, folder, True)
+                consecutive_failures = 0
+
+                # The session is dedicated to this folder and never goes back to the pool; it is re-checked after
+                # every push and at least once per refresh interval so that missed notifications are caught up.
+                while not self._shutdown_event.is_set():
+                    if await self._wait_for_idle_push(connection):
+                        self._logger.debug(f"IDLE push received for {account.email}:{folder}")
+
+                    if not await self._account_watcher.sync(account):
+                        break
+
+                    await self._check_folder(connection, account, folder)
+                    await self._record_connection_health(account.id, folder, True)
+
+                await self._connection_manager.close_connection(connection, account)
+                connection = None
+
+            except asyncio.CancelledError:
+                self._logger.info(f"IDLE cancelled for {account.email}:{folder}")
+                if connection:
+                    await self._connection_manager.close_connection(connection, account)
+                break
+
+            except Exception as e:
+                consecutive_failures += 1
+                error_msg = str(e)
+
+                self._logger.warning(
+                    f"IDLE error for {account.email}:{folder} (failure {consecutive_failures}): {error_msg}"
+                )
+
+                await self._record_connection_health(account.id, folder, False, error_msg)
+
+                if connection:
+                    try:
+                        await self._connection_manager.close_connection(connection, account)
+                    except Exception:
+                        pass
+                    connection = None
+
+                if consecutive_failures >= max_failures:
+                    self._logger.error(
+                        f"Max failures reached for {account.email}:{folder}. Check if something is wrong with the "
+                        "account."
+                    )
+                    backoff_time = poll_interval * 2
+                else:
+                    backoff_time = min(120, 10 * consecutive_failures)
+
+                if await self._sleep_until_shutdown(backoff_time):
+                    return
+
         listener_key = f"{account.email}:{folder}"
         async with self._listener_lock:
             self._active_listeners.pop(listener_key, None)
 
-        self._logger.info(f"Stopped polling for {account.email}:{folder}")
+        self._logger.info(f"Stopped IDLE for {account.email}:{folder}")
+
+    async def _wait_for_idle_push(self, connection: IMAP4_SSL) -> bool:
+        """
+        Enter IDLE on the selected folder and wait until the server reports a change or the refresh interval ends.
 
-    async def _update_last_seen_uid(self, account_id: int, folder: str, uid: int) -> None:
-        """Update the last seen UID for an account/folder combination using repository."""
+        Returns:
+            True if the server announced a change (new, expunged or re-flagged messages), False if the IDLE timed out
+        """
+        refresh_interval = settings.imap.idle_refresh_interval
+        idle_task = await connection.idle_start(timeout=refresh_interval)
         try:
-            await self._uid_tracking_repo.update_last_seen_uid(account_id, folder, uid)
-        except Exception:
-            self._logger.exception("Failed to update last seen UID")
+            while connection.has_pending_idle():
+                try:
+                    push = await connection.wait_server_push(timeout=refresh_interval + 30)
+                except asyncio.TimeoutError:
+                    return False
+
+                if push == STOP_WAIT_SERVER_PUSH:
+                    return False
+
+                if any(self._is_mailbox_change(line) for line in push):
+                    return True
+            return False
+        finally:
+            if connection.has_pending_idle():
+                connection.idle_done()
+            await asyncio.wait_for(idle_task, timeout=10)
+
+    def _is_mailbox_change(self, line: object) -> bool:
+        """Check whether an untagged IDLE response announces new, expunged or re-flagged messages."""
+        if not isinstance(line, (bytes, bytearray)):
+            return False
+        return line.endswith((b"EXISTS", b"EXPUNGE")) or line.startswith(b"VANISHED") or b" FETCH (" in line
+
+    def _get_watch_mode(self, account: Account) -> str:
+        """Get how the account's INBOX is watched; the account's provider context overrides the global setting."""
+        watch_mode = account.provider_context.get("watch_mode") or settings.imap.watch_mode
+        if watch_mode not in (WATCH_MODE_POLL, WATCH_MODE_IDLE):
+            self._logger.warning(f"Invalid watch mode {watch_mode} for {account.email}, using polling")
+            return WATCH_MODE_POLL
+        return str(watch_mode)
+
+    async def _check_folder(self, connection: IMAP4_SSL, account: Account, folder: str) -> None:
+        """Open a folder, process the messages that arrived after the last seen UID and report changes to older ones."""
+        # EXAMINE opens the folder read-only, so fetching new messages doesn't mark them as \Seen.
+        select_response = await connection.examine(folder)
+        if select_response.result != "OK":
+            raise ValueError(f"Failed to open folder {folder}: {select_response.result}")
+
+        uid_validity = self._parse_response_code(select_response, "UIDVALIDITY")
+        uid_next = self._parse_response_code(select_response, "UIDNEXT")
+        # Only reported once CONDSTORE is enabled on the session; without it flag changes can't be tracked.
+        highest_mod_seq = None
+        if settings.imap.sync_flag_changes:
+            highest_mod_seq = self._parse_response_code(select_response, "HIGHESTMODSEQ")
+        exists = self._parse_exists_response(select_response)
+
+        state = await self._uid_tracking_cache.get(account.id, folder)
+        if state is None:
+            self._logger.warning(f"No last seen UID found for {account.email}:{folder}. Creating new UID tracking")
+            last_seen_uid = await self._get_highest_uid(connection, uid_next)
+            await self._uid_tracking_cache.create(
+                account.id,
+                folder,
+                last_seen_uid=last_seen_uid,
+                uid_validity=uid_validity,
+                message_count=exists,
+                highest_mod_seq=highest_mod_seq,
+            )
+            self._logger.info(f"New UID tracking created for {account.email}:{folder}: {last_seen_uid}")
+            return
+
+        if uid_validity is not None and state.uid_validity != uid_validity:
+            if state.uid_validity is not None:
+                # Stored UIDs are meaningless once UIDVALIDITY changes, so start over from the current mailbox
+                # state instead of replaying every message in the folder as new.
+                last_seen_uid = await self._get_highest_uid(connection, uid_next)
+                self._logger.warning(
+                    f"UIDVALIDITY changed for {account.email}:{folder} ({state.uid_validity} -> {uid_validity}). "
+                    f"Resetting last seen UID to {last_seen_uid}"
+                )
+                await self._email_repo.clear_folder_uids(account.id, folder)
+                await self._uid_tracking_cache.reset_uid_validity(state, uid_validity, last_seen_uid, highest_mod_seq)
+                return
+
+            self._uid_tracking_cache.update(state, {"uid_validity": uid_validity})
+
+        last_seen_uid = state.last_seen_uid
+        new_uids: list[int] = []
+        if uid_next is None or uid_next > last_seen_uid + 1:
+            # `n:*` always matches the highest UID in the mailbox, even when it is lower than n, so filter again.
+            search_response = await connection.uid_search(f"UID {last_seen_uid + 1}:*")
+            new_uids = [uid for uid in self._parse_search_response(search_response) if uid > last_seen_uid]
+
+        if new_uids:
+            self._logger.info(f"Found {len(new_uids)} new messages for {account.email}:{folder}: {new_uids}")
+            await self._process_new_messages_by_uids(connection, account, folder, state, new_uids)
+        else:
+            self._logger.debug(f"No new messages for {account.email}:{folder}")
+
+        await self._sync_folder_changes(
+            connection, account, folder, state, last_seen_uid, highest_mod_seq, exists, len(new_uids)
+        )
+
+    async def _sync_folder_changes(
+        self,
+        connection: IMAP4_SSL,
+        account: Account,
+        folder: str,
+        state: FolderState,
+        last_seen_uid: int,
+        highest_mod_seq: int | None,
+        exists: int | None,
+        new_message_count: int,
+    ) -> None:
+        """
+        Report flag changes and expunges of the messages up to `last_seen_uid`, then store the folder's new state.
+
+        With CONDSTORE only the messages whose MODSEQ moved past the stored HIGHESTMODSEQ are fetched, and with QRESYNC
+        the same FETCH also returns the expunged UIDs as VANISHED. Without QRESYNC expunges are only looked for when
+        the message count dropped, by checking which cached UIDs are still in the folder.
+        """
+        qresync = self._connection_manager.has_qresync(connection)
+        expunged_ranges: list[tuple[int, int]] = []
+
+        previous_mod_seq = state.highest_mod_seq
+        if highest_mod_seq is not None and previous_mod_seq is not None and highest_mod_seq > previous_mod_seq:
+            if last_seen_uid > 0:
+                expunged_ranges = await self._sync_flag_changes(
+                    connection, account, folder, last_seen_uid, previous_mod_seq, qresync
+                )
+
+        if not qresync and exists is not None and state.message_count is not None:
+            if exists < state.message_count + new_message_count:
+                expunged_ranges = await self._find_expunged_uids(connection, account, folder, last_seen_uid)
+
+        if expunged_ranges:
+            await self._process_expunged_messages(account, folder, expunged_ranges)
+
+        updates: dict[str, int] = {}
+        if highest_mod_seq is not None and highest_mod_seq != previous_mod_seq:
+            updates["highest_mod_seq"] = highest_mod_seq
+        if exists is not None and exists != state.message_count:
+            updates["message_count"] = exists
+        if updates:
+            self._uid_tracking_cache.update(state, updates)
+
+    async def _sync_flag_changes(
+        self, connection: IMAP4_SSL, account: Account, folder: str, last_seen_uid: int, mod_seq: int, qresync: bool
+    ) -> list[tuple[int, int]]:
+        """
+        Queue message.updated webhooks for the messages whose flags changed since `mod_seq`.
+
+        Returns:
+            The UID ranges the server reported as VANISHED (QRESYNC only)
+        """
+        modifiers = f"(CHANGEDSINCE {mod_seq} VANISHED)" if qresync else f"(CHANGEDSINCE {mod_seq})"
+        response = await connection.uid("fetch", f"1:{last_seen_uid}", "(UID FLAGS)", modifiers)
+        if response.result != "OK":
+            raise ValueError(f"Failed to fetch flag changes of folder {folder}: {response.result}")
+
+        vanished_ranges = ResponseParser.parse_vanished_response(response) if qresync else []
+        changed_uids = [
+            item.uid
+            for item in ResponseParser.parse_fetch_response(response)
+            if item.uid is not None and item.uid <= last_seen_uid
+        ]
+        if not changed_uids:
+            return vanished_ranges
+
+        self._logger.info(f"Found {len(changed_uids)} messages with changed flags for {account.email}:{folder}")
+        for start in range(0, len(changed_uids), _HEADER_FETCH_CHUNK_SIZE):
+            chunk = changed_uids[start : start + _HEADER_FETCH_CHUNK_SIZE]
+            fetch_response = await connection.uid(
+                "fetch", ResponseParser.format_uid_set(chunk), "(UID FLAGS BODY.PEEK[HEADER])"
+            )
+            for item in ResponseParser.parse_fetch_response(fetch_response):
+                headers = item.get_bytes("BODY[HEADER]")
+                if item.uid is None or headers is None:
+                    continue
+
+                try:
+                    raw_headers = email.message_from_bytes(headers)
+                    await self._email_processor.process_email_update(account, folder, item.uid, raw_headers, item.flags)
+                except Exception:
+                    self._logger.warning(
+                        f"Failed to process flag change of {item.uid} for {account.email}:{folder}", exc_info=True
+                    )
+
+        # The events are committed before the new HIGHESTMODSEQ can be flushed, so no change is ever lost.
+        await self._email_repo.commit()
+        return vanished_ranges
+
+    async def _find_expunged_uids(
+        self, connection: IMAP4_SSL, account: Account, folder: str, last_seen_uid: int
+    ) -> list[tuple[int, int]]:
+        """Find which cached UIDs of a folder are no longer on the server."""
+        cached_uids = [
+            cached_email.uid
+            for cached_email in await self._email_repo.get_all_with_uid_by_account_and_folder(account.id, folder)
+            if cached_email.uid <= last_seen_uid
+        ]
+        if not cached_uids:
+            return []
+
+        search_response = await connection.uid_search(f"UID {ResponseParser.format_uid_set(cached_uids)}")
+        if search_response.result != "OK":
+            raise ValueError(f"Failed to search cached UIDs of folder {folder}: {search_response.result}")
+
+        remaining_uids = set(self._parse_search_response(search_response))
+        return [(uid, uid) for uid in cached_uids if uid not in remaining_uids]
+
+    async def _process_expunged_messages(
+        self, account: Account, folder: str, expunged_ranges: list[tuple[int, int]]
+    ) -> None:
+        """Queue message.deleted webhooks for the cached messages that were expunged and drop them from the cache."""
+        cached_emails = await self._email_repo.get_all_with_uid_by_account_and_folder(account.id, folder)
+        expunged = [
+            cached_email
+            for cached_email in cached_emails
+            if any(start <= cached_email.uid <= end for start, end in expunged_ranges)
+        ]
+        if not expunged:
+            return
+
+        self._logger.info(f"Found {len(expunged)} expunged messages for {account.email}:{folder}")
+        for cached_email in expunged:
+            try:
+                await self._email_processor.process_email_deletion(account, folder, cached_email)
+                await self._email_repo.delete(cached_email)
+            except Exception:
+                self._logger.warning(
+                    f"Failed to process deletion of {cached_email.uid} for {account.email}:{folder}", exc_info=True
+                )
+        # The deleted cache rows are committed together with their events.
+        await self._email_repo.commit()
+
+    async def _get_highest_uid(self, connection: IMAP4_SSL, uid_next: int | None) -> int:
+        """Get the highest UID currently in the selected folder."""
+        if uid_next is not None:
+            return uid_next - 1
+
+        # Servers that don't announce UIDNEXT on SELECT are rare; fall back to searching the folder once.
+        search_response = await connection.uid_search("ALL")
+        uids = self._parse_search_response(search_response)
+        return max(uids) if uids else 0
 
     async def _record_connection_health(
         self, account_id: int, folder: str, success: bool, error_message: str | None = None
@@ -287,30 +753,33 @@ class IMAPListener:
             self._logger.exception("Failed to record connection health")
 
     async def _process_new_messages_by_uids(
-        self, connection: IMAP4_SSL, account: Account, folder: str, new_uids: list[int]
+        self, connection: IMAP4_SSL, account: Account, folder: str, state: FolderState, new_uids: list[int]
     ) -> None:
-        """Process new messages in the folder based on a list of UIDs."""
+        """
+        Process new messages in the folder based on a list of UIDs.
+
+        Messages are downloaded in chunks bounded by count and size, and each chunk is processed and committed before
+        the next one is fetched, so memory stays bounded however large the backlog is. The chunk's webhook events are
+        committed before the last seen UID moves past it, so a crash can at worst queue them twice, never skip them.
+        """
         try:
-            # Fetch message data for each UID
-            fetch_response = await connection.fetch(",".join(map(str, new_uids)), "RFC822")
-            messages = self._parse_fetch_response(fetch_response)
-            for uid, message_bytes in messages.items():
-                try:
-                    raw_message = email.message_from_bytes(message_bytes)
-                    nylas_message = await self._email_processor.process_email(account, folder, uid, raw_message)
+            async for messages in self._message_fetcher.fetch_in_chunks(connection, new_uids):
+                processed = await self._email_processor.process_emails(account, folder, messages)
 
-                    # Update UID tracking
-                    await self._update_last_seen_uid(account.id, folder, uid)
-                    await self._upsert_cache(account, raw_message, folder, uid, nylas_message.thread_id)
-                except Exception:
-                    self._logger.warning(f"Failed to process message {uid} for {account.email}:{folder}", exc_info=True)
-                    continue
+                # One write for the whole chunk, committed together with its webhook events.
+                if processed:
+                    await self._email_repo.upsert_folder_emails(
+                        account.id, folder, self._get_cache_rows(account, folder, processed)
+                    )
+                await self._email_repo.commit()
+
+                self._uid_tracking_cache.advance_last_seen_uid(state, max(message.uid for message in messages))
 
             self._logger.info(f"Processed {len(new_uids)} new messages for {account.email}:{folder}")
-            await self._uid_tracking_repo.commit()
 
         except Exception:
             self._logger.warning(f"Failed to process new messages for {account.email}:{folder}", exc_info=True)
+            await self._email_repo.rollback()
             raise
 
     def _parse_search_response(self, search_response: Response) -> list[int]:
@@ -334,66 +803,56 @@ class IMAPListener:
             self._logger.error(f"Failed to parse search response: {e}")
         return uids
 
-    def _parse_fetch_response(self, fetch_response: Response) -> dict[int, bytes]:
-        """Parse messages from FETCH response."""
-        messages = {}
-        try:
-            lines = fetch_response.lines
-            i = 0
-            while i < len(lines):
-                line = lines[i]
-                # Look for the FETCH header line, e.g. b'1 FETCH (RFC822 {1437}'
-                if isinstance(line, (bytes, bytearray)) and b"FETCH" in line and b"RFC822" in line:
-                    # Try to extract UID if present, else use the sequence number
-                    uid = None
-                    # Try to extract UID from the line, fallback to sequence number
-                    if b"UID " in line:
-                        try:
-                            uid_part = line.split(b"UID ")[1]
-                            uid_str = uid_part.split(b" ")[0]
-                            uid = int(uid_str)
-                        except Exception:
-                            pass
-                    if uid is None:
-                        # Fallback: get the sequence number at the start of the line
-                        try:
-                            uid = int(line.split(b" ")[0])
-                        except Exception:
-                            continue  # skip if can't parse
-
-                    # The next line should be the message bytes (bytearray)
-                    if i + 1 < len(lines) and isinstance(lines[i + 1], (bytes, bytearray)):
-                        message_bytes = lines[i + 1]
-                        messages[uid] = bytes(message_bytes)
-                        i += 2  # Skip to the line after the message
-                        # Optionally, skip the closing b')' line if present
-                        if i < len(lines) and lines[i] == b")":
-                            i += 1
-                        continue
-                i += 1
-        except Exception as e:
-            self._logger.error(f"Failed to parse fetch response: {e}")
-        return messages
-
-    async def _upsert_cache(
-        self, account: Account, raw_message: Message, folder: str, uid: int, thread_id: str
-    ) -> None:
-        """Update or create the cache with the new message."""
-        try:
-            message_id = raw_message.get(HEADER_MESSAGE_ID)
+    def _parse_response_code(self, response: Response, code: str) -> int | None:
+        """Parse a numeric response code such as `[UIDVALIDITY 3857529045]` from a SELECT response."""
+        pattern = re.compile(rb"\[" + code.encode() + rb" (\d+)\]")
+        for line in response.lines:
+            if not isinstance(line, (bytes, bytearray)):
+                continue
+            match = pattern.search(line)
+            if match:
+                return int(match.group(1))
+        return None
+
+    def _parse_status_response(self, response: Response) -> _FolderStatus | None:
+        """Parse a STATUS response like `"INBOX" (MESSAGES 231 UIDNEXT 44292 UIDVALIDITY 1 HIGHESTMODSEQ 7011)`."""
+        for line in response.lines:
+            if not isinstance(line, (bytes, bytearray)) or b"UIDNEXT" not in line:
+                continue
+
+            values = {key.decode(): int(value) for key, value in re.findall(rb"([A-Z]+) (\d+)", line)}
+            try:
+                return _FolderStatus(
+                    uid_next=values["UIDNEXT"],
+                    uid_validity=values["UIDVALIDITY"],
+                    messages=values["MESSAGES"],
+                    highest_mod_seq=values.get("HIGHESTMODSEQ"),
+                )
+            except KeyError:
+                return None
+        return None
+
+    def _parse_exists_response(self, response: Response) -> int | None:
+        """Parse the number of messages from the `N EXISTS` line of a SELECT/EXAMINE response."""
+        for line in response.lines:
+            if not isinstance(line, (bytes, bytearray)):
+                continue
+            match = re.match(rb"^(\d+) EXISTS$", line.strip())
+            if match:
+                return int(match.group(1))
+        return None
+
+    def _get_cache_rows(
+        self, account: Account, folder: str, processed: list[ProcessedEmail]
+    ) -> list[tuple[str, int, str]]:
+        """Get the (email id, uid, thread id) cache rows of processed messages."""
+        rows: list[tuple[str, int, str]] = []
+        for processed_email in processed:
+            message_id = processed_email.message.raw_message.get(HEADER_MESSAGE_ID)
             if message_id is None:
-                self._logger.warning(f"Message ID is missing for {account.email}:{folder}:{uid}")
-                return
-
-            email = await self._email_repo.get_by_account_and_uid_or_email_id(account.id, folder, uid, message_id)
-            if email:
-                if email.email_id != message_id or email.uid != uid or email.folder != folder:
-                    await self._email_repo.update(
-                        email, {"email_id": message_id, "uid": uid, "folder": folder, "thread_id": thread_id}
-                    )
-            else:
-                await self._email_repo.add(
-                    Email(account_id=account.id, folder=folder, uid=uid, email_id=message_id, thread_id=thread_id)
+                self._logger.warning(
+                    f"Message ID is missing for {account.email}:{folder}:{processed_email.message.uid}"
                 )
-        except Exception:
-            self._logger.exception("Failed to update cache")
+                continue
+            rows.append((message_id, processed_email.message.uid, processed_email.nylas_message.thread_id))
+        return rows
@@ -89,11 +89,14 @@ class MessageController:
 
         except Exception as folder_error:
             self._logger.exception(f"Error searching folder {folder} for message {search_message_id}: {folder_error}")
+            if connection:
+                # The session may be in an unknown state after a failed command, so don't hand it back to the pool.
+                await self._connection_manager.close_connection(connection, account)
+                connection = None
         finally:
             if connection:
                 try:
-                    # Close the connection instead of releasing it back to the pool to prevent connection leaks.
-                    await self._connection_manager.close_connection(connection, account)
+                    await self._connection_manager.release_connection(connection, account)
                 except Exception:
                     pass
         return None
@@ -277,8 +280,7 @@ class MessageController:
                     self._logger.exception(f"Failed to process message UID {uid}")
                     continue
 
-            # Close connection instead of releasing back to pool to prevent leaks
-            await self._connection_manager.close_connection(connection, account)
+            await self._connection_manager.release_connection(connection, account)
 
         except Exception:
             self._logger.exception(f"Error listing messages for account {account.email}")
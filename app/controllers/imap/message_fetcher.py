@@ -0,0 +1,218 @@
+import base64
+import email
+import logging
+import quopri
+from dataclasses import dataclass
+from email.message import Message
+from typing import AsyncIterator
+
+from aioimaplib import IMAP4_SSL
+
+from app.api.payloads.messages import MessageAttachment
+from app.controllers.imap.response_parser import BodyPart, ResponseParser
+from settings import settings
+
+FETCH_MODE_FULL = "full"
+FETCH_MODE_STRUCTURE = "structure"
+
+
+@dataclass
+class FetchedMessage:
+    """A message downloaded by the MessageFetcher."""
+
+    uid: int
+    raw_message: Message  # The full message, or only its headers when fetched by structure
+    flags: list[str]
+    # Only set when fetched by structure; otherwise they are extracted from `raw_message`.
+    body: str | None = None
+    attachments: list[MessageAttachment] | None = None
+
+
+class MessageFetcher:
+    """Downloads new messages in bounded chunks, either in full or as headers, structure and text parts only."""
+
+    def __init__(self) -> None:
+        self._logger = logging.getLogger(__name__)
+
+    async def fetch_in_chunks(self, connection: IMAP4_SSL, uids: list[int]) -> AsyncIterator[list[FetchedMessage]]:
+        """
+        Fetch messages from the selected folder, one chunk at a time.
+
+        Chunks hold at most `fetch_batch_size` messages and `fetch_batch_max_bytes` bytes, and the next chunk is only
+        downloaded once the caller is done with the previous one, so memory stays bounded however large the backlog
+        is. With the `structure` fetch mode attachments are never downloaded: the payload is built from the headers,
+        the BODYSTRUCTURE and the text part only.
+        """
+        if self._get_fetch_mode() == FETCH_MODE_STRUCTURE:
+            for chunk in self._build_fetch_chunks(sorted(uids), {}):
+                yield await self._fetch_by_structure(connection, chunk)
+            return
+
+        sizes = await self._fetch_message_sizes(connection, uids)
+        for chunk in self._build_fetch_chunks(sorted(uids), sizes):
+            response = await connection.uid("fetch", ResponseParser.format_uid_set(chunk), "(UID FLAGS RFC822)")
+            if response.result != "OK":
+                raise ValueError(f"Failed to fetch messages: {response.result}")
+
+            messages: list[FetchedMessage] = []
+            for item in ResponseParser.parse_fetch_response(response):
+                message_bytes = item.get_bytes("RFC822")
+                if item.uid is None or message_bytes is None:
+                    continue
+                messages.append(
+                    FetchedMessage(uid=item.uid, raw_message=email.message_from_bytes(message_bytes), flags=item.flags)
+                )
+            yield messages
+
+    async def _fetch_by_structure(self, connection: IMAP4_SSL, uids: list[int]) -> list[FetchedMessage]:
+        """Fetch the headers and BODYSTRUCTURE of messages, then only the text part used as their body."""
+        response = await connection.uid(
+            "fetch", ResponseParser.format_uid_set(uids), "(UID FLAGS BODYSTRUCTURE BODY.PEEK[HEADER])"
+        )
+        if response.result != "OK":
+            raise ValueError(f"Failed to fetch message structures: {response.result}")
+
+        messages: dict[int, FetchedMessage] = {}
+        body_parts: dict[int, BodyPart] = {}
+        for item in ResponseParser.parse_fetch_response(response):
+            headers = item.get_bytes("BODY[HEADER]")
+            if item.uid is None or headers is None:
+                continue
+
+            parts = ResponseParser.parse_body_structure(item.attributes.get("BODYSTRUCTURE"))
+            messages[item.uid] = FetchedMessage(
+                uid=item.uid,
+                raw_message=email.message_from_bytes(headers),
+                flags=item.flags,
+                body="",
+                attachments=self._get_attachments(parts),
+            )
+
+            body_part = self._get_body_part(parts)
+            if body_part is not None:
+                body_parts[item.uid] = body_part
+
+        # All messages of a FETCH share the same section, so the text parts are fetched per section. Most messages
+        # use one of a handful of layouts, which keeps this at a few commands per chunk.
+        uids_by_section: dict[str, list[int]] = {}
+        for uid, body_part in body_parts.items():
+            uids_by_section.setdefault(body_part.section, []).append(uid)
+
+        for section, section_uids in uids_by_section.items():
+            sizes = {uid: body_parts[uid].size for uid in section_uids}
+            for chunk in self._build_fetch_chunks(sorted(section_uids), sizes):
+                await self._fetch_body_parts(connection, section, chunk, messages, body_parts)
+
+        return [messages[uid] for uid in sorted(messages)]
+
+    async def _fetch_body_parts(
+        self,
+        connection: IMAP4_SSL,
+        section: str,
+        uids: list[int],
+        messages: dict[int, FetchedMessage],
+        body_parts: dict[int, BodyPart],
+    ) -> None:
+        """Fetch the same body section of several messages and decode it into their body."""
+        response = await connection.uid("fetch", ResponseParser.format_uid_set(uids), f"(UID BODY.PEEK[{section}])")
+        if response.result != "OK":
+            raise ValueError(f"Failed to fetch body part {section}: {response.result}")
+
+        for item in ResponseParser.parse_fetch_response(response):
+            content = item.get_bytes(f"BODY[{section}]")
+            if item.uid is None or content is None or item.uid not in messages:
+                continue
+            messages[item.uid].body = self._decode_body_part(content, body_parts[item.uid])
+
+    async def _fetch_message_sizes(self, connection: IMAP4_SSL, uids: list[int]) -> dict[int, int]:
+        """Get the RFC822.SIZE of each message, which is cheap compared to downloading the messages themselves."""
+        response = await connection.uid("fetch", ResponseParser.format_uid_set(uids), "(UID RFC822.SIZE)")
+        if response.result != "OK":
+            self._logger.debug(f"Failed to fetch message sizes: {response.result}")
+            return {}
+
+        sizes: dict[int, int] = {}
+        for item in ResponseParser.parse_fetch_response(response):
+            size = item.get_int("RFC822.SIZE")
+            if item.uid is not None and size is not None:
+                sizes[item.uid] = size
+        return sizes
+
+    def _build_fetch_chunks(self, uids: list[int], sizes: dict[int, int]) -> list[list[int]]:
+        """
+        Split UIDs into chunks of at most `fetch_batch_size` messages and `fetch_batch_max_bytes` bytes.
+
+        A message larger than the byte budget gets a chunk of its own. Messages of unknown size only count towards
+        the message limit.
+        """
+        chunks: list[list[int]] = []
+        chunk: list[int] = []
+        chunk_bytes = 0
+        for uid in uids:
+            size = sizes.get(uid, 0)
+            if chunk and (
+                len(chunk) >= settings.imap.fetch_batch_size or chunk_bytes + size > settings.imap.fetch_batch_max_bytes
+            ):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+
+            chunk.append(uid)
+            chunk_bytes += size
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _get_body_part(self, parts: list[BodyPart]) -> BodyPart | None:
+        """Pick the part used as the message body: the first HTML part, or the first plain text part otherwise."""
+        plain_part: BodyPart | None = None
+        for part in parts:
+            if part.disposition == "attachment":
+                continue
+            if part.content_type == "text/html":
+                return part
+            if part.content_type == "text/plain" and plain_part is None:
+                plain_part = part
+        return plain_part
+
+    def _get_attachments(self, parts: list[BodyPart]) -> list[MessageAttachment]:
+        """Describe the attachments of a message from its BODYSTRUCTURE, numbered like `MessageUtils` does."""
+        attachments: list[MessageAttachment] = []
+        for part in parts:
+            filename = part.filename
+            if part.disposition != "attachment" or not filename:
+                continue
+            attachments.append(
+                MessageAttachment(
+                    id=f"att_{len(attachments) + 1}",
+                    filename=filename,
+                    size=part.decoded_size,
+                    content_type=part.content_type,
+                    is_inline=False,
+                )
+            )
+        return attachments
+
+    def _decode_body_part(self, content: bytes, part: BodyPart) -> str:
+        """Remove the transfer encoding of a text part and decode it with its charset."""
+        try:
+            if part.encoding == "base64":
+                content = base64.b64decode(content)
+            elif part.encoding == "quoted-printable":
+                content = quopri.decodestring(content)
+        except Exception:
+            self._logger.warning(f"Failed to decode {part.encoding} body part {part.section}")
+
+        try:
+            return content.decode(part.charset or "utf-8").strip()
+        except (UnicodeDecodeError, LookupError):
+            return content.decode("utf-8", errors="ignore").strip()
+
+    def _get_fetch_mode(self) -> str:
+        """Get how new messages are downloaded."""
+        fetch_mode = settings.imap.fetch_mode
+        if fetch_mode not in (FETCH_MODE_FULL, FETCH_MODE_STRUCTURE):
+            self._logger.warning(f"Invalid fetch mode {fetch_mode}, fetching full messages")
+            return FETCH_MODE_FULL
+        return str(fetch_mode)
@@ -0,0 +1,388 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from email.header import decode_header, make_header
+from email.utils import decode_rfc2231
+from typing import Iterator
+from urllib.parse import unquote
+
+from aioimaplib import Response
+
+logger = logging.getLogger(__name__)
+
+# A parsed IMAP value: atoms, quoted strings and literals are bytes, NIL is None and parenthesized lists are lists.
+ImapValue = bytes | None | list["ImapValue"]
+
+_FETCH_START = re.compile(rb"^(\d+) FETCH \(")
+_LITERAL_MARKER = re.compile(rb"\{(\d+)\}$")
+
+_OPEN = object()
+_CLOSE = object()
+
+
+@dataclass
+class FetchItem:
+    """The data items returned by FETCH for a single message."""
+
+    sequence_number: int
+    attributes: dict[str, ImapValue] = field(default_factory=dict)
+
+    @property
+    def uid(self) -> int | None:
+        """The UID of the message, if it was part of the response."""
+        return self.get_int("UID")
+
+    @property
+    def flags(self) -> list[str]:
+        """The flags of the message, e.g. ["\\Seen", "\\Flagged"]."""
+        value = self.attributes.get("FLAGS")
+        if not isinstance(value, list):
+            return []
+        return [flag.decode("utf-8", errors="ignore") for flag in value if isinstance(flag, bytes)]
+
+    def get_int(self, name: str) -> int | None:
+        """Get a numeric data item such as UID or RFC822.SIZE."""
+        value = self.attributes.get(name)
+        if isinstance(value, list):
+            # MODSEQ is returned as a single-element list, e.g. MODSEQ (12345)
+            value = value[0] if value else None
+        if isinstance(value, bytes) and value.isdigit():
+            return int(value)
+        return None
+
+    def get_bytes(self, name: str) -> bytes | None:
+        """Get a string or literal data item such as RFC822 or BODY[HEADER]."""
+        value = self.attributes.get(name)
+        return value if isinstance(value, bytes) else None
+
+
+@dataclass
+class BodyPart:
+    """A non-multipart part of a message, as described by its BODYSTRUCTURE."""
+
+    section: str  # The part specifier to use in BODY[section], e.g. "1.2"
+    content_type: str
+    parameters: dict[str, str]
+    encoding: str
+    size: int  # Encoded size in octets
+    disposition: str | None = None
+    disposition_parameters: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def charset(self) -> str | None:
+        """The charset of a text part."""
+        return self.parameters.get("charset")
+
+    @property
+    def filename(self) -> str | None:
+        """The filename from the Content-Disposition, falling back to the `name` of the Content-Type."""
+        return self.disposition_parameters.get("filename") or self.parameters.get("name")
+
+    @property
+    def decoded_size(self) -> int:
+        """The approximate size of the part once its transfer encoding is removed."""
+        if self.encoding == "base64":
+            # 57 bytes are encoded into 76 characters plus CRLF per line.
+            return self.size * 57 // 78
+        return self.size
+
+
+class ResponseParser:
+    """Parses the structured parts of IMAP responses (FETCH data items, UID sets) returned by aioimaplib."""
+
+    @staticmethod
+    def parse_fetch_response(response: Response) -> list[FetchItem]:
+        """
+        Parse the messages in a FETCH or UID FETCH response.
+
+        aioimaplib returns each literal (message bodies, headers, ...) as a separate line right after the line that
+        announces it with `{size}`, so the lines of each message are first regrouped into text and literal segments.
+
+        Args:
+            response: The response of the FETCH command
+
+        Returns:
+            One FetchItem per message, in the order returned by the server
+        """
+        items: list[FetchItem] = []
+        segments: list[tuple[bool, bytes]] = []
+        sequence_number: int | None = None
+        expect_literal = False
+
+        def flush() -> None:
+            if sequence_number is None or not segments:
+                return
+            try:
+                items.append(ResponseParser._parse_fetch_segments(sequence_number, segments))
+            except Exception as e:
+                logger.warning(f"Failed to parse FETCH data of message {sequence_number}: {e}")
+
+        for line in response.lines:
+            if not isinstance(line, (bytes, bytearray)):
+                continue
+
+            if expect_literal:
+                segments.append((True, bytes(line)))
+                expect_literal = False
+                continue
+
+            start = _FETCH_START.match(line)
+            if start:
+                flush()
+                sequence_number = int(start.group(1))
+                segments = [(False, bytes(line[start.end() - 1 :]))]
+            elif sequence_number is not None:
+                segments.append((False, bytes(line)))
+
+            expect_literal = _LITERAL_MARKER.search(line.rstrip()) is not None
+
+        flush()
+        return items
+
+    @staticmethod
+    def parse_vanished_response(response: Response) -> list[tuple[int, int]]:
+        """
+        Parse the UID ranges reported by QRESYNC `VANISHED (EARLIER) 41,43:116` responses.
+
+        Returns:
+            Inclusive (start, end) UID ranges
+        """
+        ranges: list[tuple[int, int]] = []
+        for line in response.lines:
+            if not isinstance(line, (bytes, bytearray)) or not line.startswith(b"VANISHED"):
+                continue
+            uid_set = line.split()[-1].decode("ascii", errors="ignore")
+            ranges.extend(ResponseParser.parse_uid_set(uid_set))
+        return ranges
+
+    @staticmethod
+    def parse_uid_set(uid_set: str) -> list[tuple[int, int]]:
+        """Parse an IMAP sequence set such as `41,43:116` into inclusive (start, end) ranges."""
+        ranges: list[tuple[int, int]] = []
+        for part in uid_set.split(","):
+            start, _, end = part.partition(":")
+            if not start.isdigit() or (end and not end.isdigit()):
+                continue
+            first, last = int(start), int(end or start)
+            ranges.append((min(first, last), max(first, last)))
+        return ranges
+
+    @staticmethod
+    def format_uid_set(uids: list[int]) -> str:
+        """Format UIDs as a compact IMAP sequence set, e.g. [1, 2, 3, 7] -> `1:3,7`."""
+        parts: list[str] = []
+        sorted_uids = sorted(set(uids))
+        index = 0
+        while index < len(sorted_uids):
+            start = end = sorted_uids[index]
+            while index + 1 < len(sorted_uids) and sorted_uids[index + 1] == end + 1:
+                index += 1
+                end = sorted_uids[index]
+            parts.append(str(start) if start == end else f"{start}:{end}")
+            index += 1
+        return ",".join(parts)
+
+    @staticmethod
+    def parse_body_structure(body_structure: ImapValue) -> list[BodyPart]:
+        """
+        Parse a BODYSTRUCTURE into its non-multipart parts.
+
+        Parts are returned depth-first in the order `email.message.Message.walk()` visits them, including the parts
+        of attached messages (message/rfc822), so that attachment numbering matches the one of the full message.
+
+        Args:
+            body_structure: The BODYSTRUCTURE data item of a FetchItem
+
+        Returns:
+            The non-multipart parts of the message
+        """
+        parts: list[BodyPart] = []
+        if isinstance(body_structure, list) and body_structure:
+            ResponseParser._collect_body_parts(body_structure, "", parts)
+        return parts
+
+    @staticmethod
+    def _collect_body_parts(body: list[ImapValue], parent_section: str, parts: list[BodyPart]) -> None:
+        """Collect the parts of a message body; the body of a non-multipart message is its part 1."""
+        if isinstance(body[0], list):
+            ResponseParser._collect_multipart(body, parent_section, parts)
+        else:
+            ResponseParser._collect_single_part(body, f"{parent_section}.1" if parent_section else "1", parts)
+
+    @staticmethod
+    def _collect_multipart(body: list[ImapValue], section: str, parts: list[BodyPart]) -> None:
+        """Collect the parts of a multipart body, whose children come first followed by the subtype."""
+        for index, child in enumerate(body, start=1):
+            if not isinstance(child, list) or not child:
+                break
+
+            child_section = f"{section}.{index}" if section else str(index)
+            if isinstance(child[0], list):
+                ResponseParser._collect_multipart(child, child_section, parts)
+            else:
+                ResponseParser._collect_single_part(child, child_section, parts)
+
+    @staticmethod
+    def _collect_single_part(body: list[ImapValue], section: str, parts: list[BodyPart]) -> None:
+        """Collect a non-multipart part, descending into attached messages."""
+        media_type = ResponseParser._decode_string(body[0] if len(body) > 0 else None).lower() or "text"
+        subtype = ResponseParser._decode_string(body[1] if len(body) > 1 else None).lower() or "plain"
+        content_type = f"{media_type}/{subtype}"
+
+        size_value = body[6] if len(body) > 6 else None
+        part = BodyPart(
+            section=section,
+            content_type=content_type,
+            parameters=ResponseParser._parse_parameters(body[2] if len(body) > 2 else None),
+            encoding=ResponseParser._decode_string(body[5] if len(body) > 5 else None).lower() or "7bit",
+            size=int(size_value) if isinstance(size_value, bytes) and size_value.isdigit() else 0,
+        )
+
+        # Extension data follows the basic fields: text parts add their line count, and attached messages their
+        # envelope, body and line count. The disposition is the second extension field.
+        if media_type == "text":
+            extension_start = 8
+        elif content_type == "message/rfc822":
+            extension_start = 10
+        else:
+            extension_start = 7
+
+        disposition = body[extension_start + 1] if len(body) > extension_start + 1 else None
+        if isinstance(disposition, list) and disposition:
+            part.disposition = ResponseParser._decode_string(disposition[0]).lower() or None
+            if len(disposition) > 1:
+                part.disposition_parameters = ResponseParser._parse_parameters(disposition[1])
+
+        parts.append(part)
+
+        nested_body = body[8] if content_type == "message/rfc822" and len(body) > 8 else None
+        if isinstance(nested_body, list) and nested_body:
+            ResponseParser._collect_body_parts(nested_body, section, parts)
+
+    @staticmethod
+    def _parse_parameters(value: ImapValue) -> dict[str, str]:
+        """Parse a `("charset" "utf-8" "name" "a.pdf")` parameter list, decoding RFC 2231 and RFC 2047 values."""
+        if not isinstance(value, list):
+            return {}
+
+        parameters: dict[str, str] = {}
+        continuations: dict[str, list[tuple[int, str, bool]]] = {}
+        for index in range(0, len(value) - 1, 2):
+            key = ResponseParser._decode_string(value[index]).lower()
+            raw_value = ResponseParser._decode_string(value[index + 1])
+
+            name, star, rest = key.partition("*")
+            if not star:
+                parameters[name] = ResponseParser._decode_header_value(raw_value)
+                continue
+
+            # RFC 2231: `name*` is percent-encoded with a charset prefix, `name*0`, `name*1*`, ... are continuations.
+            number = rest.rstrip("*")
+            continuations.setdefault(name, []).append(
+                (int(number) if number.isdigit() else 0, raw_value, key.endswith("*"))
+            )
+
+        for name, pieces in continuations.items():
+            pieces.sort()
+            charset = "utf-8"
+            decoded = []
+            for position, (_, piece, extended) in enumerate(pieces):
+                if extended and position == 0:
+                    piece_charset, _, piece = decode_rfc2231(piece)
+                    charset = piece_charset or charset
+                decoded.append(unquote(piece, encoding=charset, errors="replace") if extended else piece)
+            parameters[name] = "".join(decoded)
+
+        return parameters
+
+    @staticmethod
+    def _decode_header_value(value: str) -> str:
+        """Decode RFC 2047 encoded words such as `=?UTF-8?B?...?=`."""
+        if "=?" not in value:
+            return value
+        try:
+            return str(make_header(decode_header(value)))
+        except Exception:
+            return value
+
+    @staticmethod
+    def _decode_string(value: ImapValue) -> str:
+        """Decode an atom or string; NIL and lists become an empty string."""
+        return value.decode("utf-8", errors="replace") if isinstance(value, bytes) else ""
+
+    @staticmethod
+    def _parse_fetch_segments(sequence_number: int, segments: list[tuple[bool, bytes]]) -> FetchItem:
+        """Parse the `(NAME value NAME value ...)` list of a FETCH response into a FetchItem."""
+        values = ResponseParser._build_values(ResponseParser._tokenize(segments))
+        data_items = values[0] if values and isinstance(values[0], list) else []
+
+        item = FetchItem(sequence_number=sequence_number)
+        for index in range(0, len(data_items) - 1, 2):
+            name = data_items[index]
+            if isinstance(name, bytes):
+                item.attributes[name.decode("ascii", errors="ignore").upper()] = data_items[index + 1]
+        return item
+
+    @staticmethod
+    def _tokenize(segments: list[tuple[bool, bytes]]) -> Iterator[object]:
+        """Split text and literal segments into parentheses, atoms, quoted strings and literals."""
+        for is_literal, data in segments:
+            if is_literal:
+                yield data
+                continue
+
+            index = 0
+            length = len(data)
+            while index < length:
+                char = data[index : index + 1]
+                if char in (b" ", b"\r", b"\n"):
+                    index += 1
+                elif char == b"(":
+                    yield _OPEN
+                    index += 1
+                elif char == b")":
+                    yield _CLOSE
+                    index += 1
+                elif char == b'"':
+                    index += 1
+                    value = bytearray()
+                    while index < length and data[index : index + 1] != b'"':
+                        if data[index : index + 1] == b"\\" and index + 1 < length:
+                            index += 1
+                        value += data[index : index + 1]
+                        index += 1
+                    index += 1
+                    yield bytes(value)
+                elif char == b"{" and _LITERAL_MARKER.match(data[index:].rstrip()):
+                    # The literal itself is the next segment.
+                    break
+                else:
+                    start = index
+                    bracket_depth = 0
+                    while index < length:
+                        char = data[index : index + 1]
+                        if char == b"[":
+                            bracket_depth += 1
+                        elif char == b"]":
+                            bracket_depth -= 1
+                        elif bracket_depth == 0 and char in (b" ", b"(", b")", b"\r", b"\n"):
+                            break
+                        index += 1
+                    atom = data[start:index]
+                    yield None if atom.upper() == b"NIL" else atom
+
+    @staticmethod
+    def _build_values(tokens: Iterator[object]) -> list[ImapValue]:
+        """Nest a token stream into lists following its parentheses."""
+        stack: list[list[ImapValue]] = [[]]
+        for token in tokens:
+            if token is _OPEN:
+                nested: list[ImapValue] = []
+                stack[-1].append(nested)
+                stack.append(nested)
+            elif token is _CLOSE:
+                if len(stack) > 1:
+                    stack.pop()
+            else:
+                stack[-1].append(token)  # type: ignore[arg-type]
+        return stack[0]
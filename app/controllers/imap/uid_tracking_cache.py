@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Mapping
+
+from app.models import UidTracking
+from app.repos.uid_tracking import UidTrackingRepo
+from settings import settings
+
+
+@dataclass
+class FolderState:
+    """The in-memory copy of a folder's uid_tracking row."""
+
+    id: int
+    account_id: int
+    folder: str
+    last_seen_uid: int
+    uid_validity: int | None = None
+    uid_next: int | None = None
+    message_count: int | None = None
+    highest_mod_seq: int | None = None
+    dirty: bool = False
+
+    @classmethod
+    def from_tracking(cls, tracking: UidTracking) -> "FolderState":
+        """Create the state of a folder from its uid_tracking row."""
+        return cls(
+            id=tracking.id,
+            account_id=tracking.account_id,
+            folder=tracking.folder,
+            last_seen_uid=tracking.last_seen_uid,
+            uid_validity=tracking.uid_validity,
+            uid_next=tracking.uid_next,
+            message_count=tracking.message_count,
+            highest_mod_seq=tracking.highest_mod_seq,
+        )
+
+
+class UidTrackingCache:
+    """
+    In-process copy of the uid_tracking rows of the accounts watched by this worker.
+
+    The worker is the only writer of its accounts' rows, so reads are served from memory and changes are written back
+    to Postgres in bulk every `uid_flush_interval` seconds and on shutdown. Callers only advance the last seen UID over
+    messages whose webhook events were committed, so a crash can at worst replay webhooks, never skip them.
+    """
+
+    def __init__(self, uid_tracking_repo: UidTrackingRepo) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._uid_tracking_repo = uid_tracking_repo
+        self._states: dict[int, dict[str, FolderState]] = {}  # account id -> folder -> state
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    async def load_accounts(self, account_ids: list[int]) -> None:
+        """Load the rows of the accounts that aren't in memory yet with a single query."""
+        missing_ids = [account_id for account_id in account_ids if account_id not in self._states]
+        if missing_ids:
+            rows = await self._uid_tracking_repo.get_all_by_accounts(missing_ids)
+            for account_id in missing_ids:
+                self._states[account_id] = {}
+            for tracking in rows:
+                self._states[tracking.account_id][tracking.folder] = FolderState.from_tracking(tracking)
+            self._logger.debug(f"Loaded {len(rows)} UID tracking rows for {len(missing_ids)} accounts")
+
+        self._ensure_flush_task()
+
+    async def get_account_states(self, account_id: int) -> dict[str, FolderState]:
+        """Get the state of every tracked folder of an account."""
+        await self.load_accounts([account_id])
+        return self._states[account_id]
+
+    async def get(self, account_id: int, folder: str) -> FolderState | None:
+        """Get the state of a folder, or None if the folder isn't tracked yet."""
+        return (await self.get_account_states(account_id)).get(folder)
+
+    async def create(
+        self,
+        account_id: int,
+        folder: str,
+        last_seen_uid: int,
+        uid_validity: int | None = None,
+        message_count: int | None = None,
+        highest_mod_seq: int | None = None,
+    ) -> FolderState:
+        """Start tracking a folder. The row is inserted right away so that later flushes only need to update it."""
+        tracking = UidTracking(
+            account_id=account_id,
+            folder=folder,
+            last_seen_uid=last_seen_uid,
+            uid_validity=uid_validity,
+            message_count=message_count,
+            highest_mod_seq=highest_mod_seq,
+        )
+        await self._uid_tracking_repo.add(tracking, commit=True)
+
+        state = FolderState.from_tracking(tracking)
+        (await self.get_account_states(account_id))[folder] = state
+        return state
+
+    def update(self, state: FolderState, values: Mapping[str, Any]) -> None:
+        """Change a folder's state in memory; it is written to Postgres on the next flush."""
+        for key, value in values.items():
+            setattr(state, key, value)
+        state.dirty = True
+
+    def advance_last_seen_uid(self, state: FolderState, uid: int) -> None:
+        """Move the last seen UID forward in memory; it never moves backwards."""
+        if uid > state.last_seen_uid:
+            self.update(state, {"last_seen_uid": uid})
+
+    async def reset_uid_validity(
+        self, state: FolderState, uid_validity: int, last_seen_uid: int, highest_mod_seq: int | None = None
+    ) -> None:
+        """Start tracking a folder again from `last_seen_uid` after its UIDVALIDITY changed, writing it through."""
+        self.update(
+            state,
+            {"uid_validity": uid_validity, "last_seen_uid": last_seen_uid, "highest_mod_seq": highest_mod_seq},
+        )
+        await self.flush()
+
+    async def unload_account(self, account_id: int) -> None:
+        """Flush and forget an account's folders, which are loaded again if it becomes active once more."""
+        if account_id not in self._states:
+            return
+
+        await self.flush()
+        self._states.pop(account_id, None)
+
+    async def flush(self) -> None:
+        """
+        Write every changed folder state to Postgres in one bulk UPDATE, in a transaction of its own so that a failure
+        doesn't roll back what the listener is writing.
+        """
+        async with self._flush_lock:
+            dirty_states = [state for states in self._states.values() for state in states.values() if state.dirty]
+            if not dirty_states:
+                return
+
+            now = datetime.now(UTC)
+            rows = [
+                {
+                    "id": state.id,
+                    "last_seen_uid": state.last_seen_uid,
+                    "uid_validity": state.uid_validity,
+                    "uid_next": state.uid_next,
+                    "message_count": state.message_count,
+                    "highest_mod_seq": state.highest_mod_seq,
+                    "last_checked_at": now,
+                }
+                for state in dirty_states
+            ]
+            # Clear the flags before awaiting, so that changes made during the write are flushed next time.
+            for state in dirty_states:
+                state.dirty = False
+
+            try:
+                await self._uid_tracking_repo.update_many(rows)
+            except Exception:
+                for state in dirty_states:
+                    state.dirty = True
+                raise
+
+            self._logger.debug(f"Flushed {len(rows)} UID tracking rows")
+
+    async def close(self) -> None:
+        """Stop the write-behind loop and flush the remaining changes."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+
+        await self.flush()
+
+    def _ensure_flush_task(self) -> None:
+        """Start the write-behind loop if it isn't running yet."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """Flush changed folder states every `uid_flush_interval` seconds."""
+        while True:
+            await asyncio.sleep(settings.imap.uid_flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                self._logger.exception("Failed to flush UID tracking")
@@ -0,0 +1,138 @@
+"""
+Shared run loop of the workers that drain a work queue.
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Awaitable, Callable, Generic, Sequence
+
+from app.repos.queue import QueueItemType, QueueRepo
+
+
+@dataclass(frozen=True)
+class QueueSettings:
+    """How a worker claims and retries the items of its queue."""
+
+    claim_size: int
+    # Seconds a claim hides the items from other workers
+    claim_timeout: float
+    # Seconds between checks of the queue while no item is due
+    poll_interval: float
+    max_attempts: int
+    retry_base_delay: float
+    retry_max_delay: float
+    # Seconds before the claim times out after which no item starts being processed, so that the last ones can finish
+    # and be recorded before other workers claim them again
+    claim_margin: float = 0.0
+
+
+class QueueWorker(ABC, Generic[QueueItemType]):
+    """
+    Base class of the workers that drain a queue table, claiming due items with FOR UPDATE SKIP LOCKED so that any
+    number of workers can share it.
+
+    Subclasses process the claimed items concurrently and record the outcome of each one through `_record` as soon as
+    it is known, so that an item that took long doesn't hold back the others, nor leave them to be processed again
+    once their claim times out.
+    """
+
+    def __init__(self, name: str, queue_repo: QueueRepo[QueueItemType], queue_settings: QueueSettings) -> None:
+        self._logger = logging.getLogger(type(self).__module__)
+        self._name = name
+        self._queue_repo = queue_repo
+        self._queue_settings = queue_settings
+        # Items are processed concurrently but share the database session, which they use one at a time.
+        self._session_lock = asyncio.Lock()
+
+    async def run(self, shutdown_event: asyncio.Event) -> None:
+        """Process due items until shutdown, checking the queue every `poll_interval` while none is due."""
+        await self._start()
+        self._logger.info(f"{self._name} started")
+        try:
+            while not shutdown_event.is_set():
+                try:
+                    claimed = await self.process_once()
+                except Exception:
+                    self._logger.exception(f"{self._name} failed to process its queue")
+                    await self._queue_repo.rollback()
+                    claimed = 0
+
+                await self._after_batch()
+
+                timeout = self._get_wait_time(claimed)
+                if not timeout:
+                    continue
+                try:
+                    await asyncio.wait_for(shutdown_event.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._stop()
+            self._logger.info(f"{self._name} stopped")
+
+    async def process_once(self) -> int:
+        """
+        Claim a batch of due items and process them.
+
+        Returns:
+            The number of items claimed
+        """
+        queue_settings = self._queue_settings
+        items = await self._queue_repo.claim_due(
+            queue_settings.claim_size, timedelta(seconds=queue_settings.claim_timeout)
+        )
+        if not items:
+            return 0
+
+        deadline = time.monotonic() + queue_settings.claim_timeout - queue_settings.claim_margin
+        await self._process(items, deadline)
+        return len(items)
+
+    @abstractmethod
+    async def _process(self, items: Sequence[QueueItemType], deadline: float) -> None:
+        """Process claimed items, releasing with `_release` the ones that can't start before `deadline`."""
+
+    async def _start(self) -> None:
+        """Set up the worker before its first claim."""
+
+    async def _stop(self) -> None:
+        """Clean up once the worker stops."""
+
+    async def _after_batch(self) -> None:
+        """Do housekeeping after each claim."""
+
+    def _get_wait_time(self, claimed: int) -> float:
+        """Get the seconds to wait before the next claim, none while the last one was full."""
+        return 0.0 if claimed >= self._queue_settings.claim_size else self._queue_settings.poll_interval
+
+    async def _record(self, record: Callable[[], Awaitable[None]]) -> None:
+        """Record the outcome of some items and commit it, rolling back if it fails."""
+        async with self._session_lock:
+            try:
+                await record()
+                await self._queue_repo.commit()
+            except Exception:
+                # The items are processed again once their claim times out
+                self._logger.exception(f"{self._name} failed to record its results")
+                await self._queue_repo.rollback()
+
+    async def _release(self, items: Sequence[QueueItemType], delay: float = 0.0) -> None:
+        """Put items back in the queue, due after `delay` seconds, without counting their claim as an attempt."""
+
+        async def release() -> None:
+            for item in items:
+                await self._queue_repo.defer(item.id, timedelta(seconds=delay))
+
+        await self._record(release)
+
+    def _is_out_of_attempts(self, item: QueueItemType) -> bool:
+        return item.attempts >= self._queue_settings.max_attempts
+
+    def _get_retry_delay(self, item: QueueItemType) -> float:
+        """Get the seconds to wait before retrying an item, doubling with each attempt up to `retry_max_delay`."""
+        delay: float = self._queue_settings.retry_base_delay * 2 ** (item.attempts - 1)
+        return min(delay, self._queue_settings.retry_max_delay)
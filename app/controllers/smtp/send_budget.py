@@ -0,0 +1,58 @@
+"""
+Budget of the bytes of messages being sent.
+"""
+
+from settings import settings
+
+
+class SendRequestTooLargeError(Exception):
+    """Exception raised when a send request is larger than `send_max_request_size`."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        super().__init__(f"Request of {size} bytes exceeds the limit of {settings.smtp.send_max_request_size} bytes")
+
+
+class SendBudgetExhaustedError(Exception):
+    """Exception raised when accepting a send request would exceed `send_max_in_flight_bytes`."""
+
+    pass
+
+
+class SendBudget:
+    """
+    Limits the bytes of the send requests this process handles at once.
+
+    Requests reserve their size before their body is read, so that a burst of large sends is turned away up front
+    instead of filling the memory and temporary disk space of the process.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def reserve(self, size: int) -> int:
+        """
+        Reserve `size` bytes for a send request until `release` is called.
+
+        Returns:
+            The number of bytes reserved, to be passed to `release`
+
+        Raises:
+            SendRequestTooLargeError: If the request is larger than `send_max_request_size`
+            SendBudgetExhaustedError: If there isn't enough room left in `send_max_in_flight_bytes`
+        """
+        if size > settings.smtp.send_max_request_size:
+            raise SendRequestTooLargeError(size)
+        if self._in_flight + size > settings.smtp.send_max_in_flight_bytes:
+            raise SendBudgetExhaustedError(f"{self._in_flight} bytes of messages are already being sent")
+
+        self._in_flight += size
+        return size
+
+    def release(self, size: int) -> None:
+        """Release the bytes reserved by a request."""
+        self._in_flight = max(0, self._in_flight - size)
@@ -0,0 +1,255 @@
+"""
+Sending of the messages queued through the batch send API.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Sequence
+
+from app.api.payloads.messages import QueuedMessageRequest
+from app.constants.webhooks import WEBHOOK_MESSAGE_SEND_FAILED, WEBHOOK_MESSAGE_SEND_SUCCESS
+from app.controllers.email.email_controller import EmailController
+from app.controllers.email.message import MessageResult, SendMessageResult
+from app.controllers.imap.connection import RateLimiter
+from app.controllers.queue_worker import QueueSettings, QueueWorker
+from app.controllers.smtp.smtp_client import SMTPClientError
+from app.controllers.smtp.smtp_controller import (
+    SMTPConfigurationError,
+    SMTPController,
+    SMTPException,
+    SMTPInvalidParameterError,
+)
+from app.controllers.smtp.smtp_pool import SMTPConnectionPool
+from app.models import Account, OutgoingMessage, WebhookOutbox
+from app.repos.account import AccountRepo
+from app.repos.outgoing_message import OutgoingMessageRepo
+from app.repos.webhook_outbox import WebhookOutboxRepo
+from settings import settings
+
+
+# The SMTP timeouts a send is given to finish before the claim of its message times out
+_SEND_TIMEOUTS = 6
+
+
+@dataclass
+class _PreparedMessage:
+    """A claimed message ready to be sent."""
+
+    outgoing_message: OutgoingMessage
+    account: Account
+    request: QueuedMessageRequest
+    replied_message: MessageResult | None = None
+
+
+@dataclass
+class _SendResult:
+    """The outcome of one attempt to send a queued message."""
+
+    outgoing_message: OutgoingMessage
+    account: Account | None
+    send_message_result: SendMessageResult | None = None
+    error: str | None = None
+    # Set for errors that retrying won't fix, e.g. a reply to a message that doesn't exist
+    permanent: bool = False
+
+
+class SendQueueWorker(QueueWorker[OutgoingMessage]):
+    """
+    Sends the messages queued in `outgoing_messages` once they are due, and reports each one with a webhook.
+
+    Messages are claimed with FOR UPDATE SKIP LOCKED, so any number of workers can share the queue. The messages of an
+    account are sent one after the other, so that they all go through the same pooled SMTP session instead of logging
+    in for each of them, while different accounts are sent concurrently, up to `send_queue_concurrency`. Each worker
+    limits its sends to each SMTP host to `send_rate_per_host_per_worker` per second, on its own. Failed sends are
+    retried with exponential backoff up to `send_queue_max_attempts`, after which a message.send_failed webhook is
+    queued.
+
+    The outcome of each send is committed as soon as it finishes, and the messages that can't start before their claim
+    is about to time out, e.g. behind a long queue of an account or a slow SMTP host, are released instead of sent, so
+    that no other worker claims and sends them again.
+    """
+
+    def __init__(
+        self,
+        outgoing_message_repo: OutgoingMessageRepo,
+        account_repo: AccountRepo,
+        webhook_outbox_repo: WebhookOutboxRepo,
+        email_controller: EmailController,
+        smtp_controller: SMTPController,
+        smtp_pool: SMTPConnectionPool,
+    ) -> None:
+        super().__init__(
+            "Send queue worker",
+            outgoing_message_repo,
+            QueueSettings(
+                claim_size=settings.smtp.send_queue_claim_size,
+                claim_timeout=settings.smtp.send_queue_claim_timeout,
+                poll_interval=settings.smtp.send_queue_poll_interval,
+                max_attempts=settings.smtp.send_queue_max_attempts,
+                retry_base_delay=settings.smtp.send_queue_retry_base_delay,
+                retry_max_delay=settings.smtp.send_queue_retry_max_delay,
+                # A send that starts just before the deadline may take several SMTP timeouts: connecting, logging in,
+                # then each command of the transaction.
+                claim_margin=_SEND_TIMEOUTS * settings.smtp.timeout,
+            ),
+        )
+        self._outgoing_message_repo = outgoing_message_repo
+        self._account_repo = account_repo
+        self._webhook_outbox_repo = webhook_outbox_repo
+        self._email_controller = email_controller
+        self._smtp_controller = smtp_controller
+        self._smtp_pool = smtp_pool
+        self._account_semaphore = asyncio.Semaphore(settings.smtp.send_queue_concurrency)
+        self._rate_limiters: dict[str, RateLimiter] = {}
+
+    async def _stop(self) -> None:
+        await self._smtp_pool.close_all_connections()
+
+    async def _process(self, items: Sequence[OutgoingMessage], deadline: float) -> None:
+        """Send claimed messages, grouped by account, recording each one as soon as it is sent."""
+        account_ids = list({outgoing_message.account_id for outgoing_message in items})
+        accounts = {account.id: account for account in await self._account_repo.get_active_by_ids(account_ids)}
+
+        # Replied messages are looked up before sending, one at a time, as the lookups share the database session.
+        messages_by_account: dict[int, list[_PreparedMessage]] = {}
+        for outgoing_message in items:
+            account = accounts.get(outgoing_message.account_id)
+            if account is None:
+                await self._record_send(
+                    _SendResult(outgoing_message, account, error="The grant is no longer active", permanent=True)
+                )
+                continue
+
+            try:
+                prepared = await self._prepare(outgoing_message, account)
+            except Exception as e:
+                await self._record_send(_SendResult(outgoing_message, account, error=str(e) or type(e).__name__))
+                continue
+
+            if prepared.request.reply_to_message_id and prepared.replied_message is None:
+                error = f"Invalid parameter: reply_to_message_id with value: {prepared.request.reply_to_message_id}"
+                await self._record_send(_SendResult(outgoing_message, account, error=error, permanent=True))
+                continue
+            messages_by_account.setdefault(account.id, []).append(prepared)
+
+        await asyncio.gather(
+            *(self._send_account_messages(messages, deadline) for messages in messages_by_account.values())
+        )
+
+    async def _prepare(self, outgoing_message: OutgoingMessage, account: Account) -> _PreparedMessage:
+        """Parse a queued message and look up the message it replies to."""
+        request = QueuedMessageRequest.model_validate_json(outgoing_message.request_json)
+        replied_message = None
+        if request.reply_to_message_id:
+            replied_message = await self._email_controller.get_message_by_id(account, request.reply_to_message_id)
+        return _PreparedMessage(outgoing_message, account, request, replied_message)
+
+    async def _send_account_messages(self, messages: list[_PreparedMessage], deadline: float) -> None:
+        """
+        Send the messages of an account in order, reusing the account's pooled SMTP session, and release the ones that
+        can't start before `deadline`.
+        """
+        async with self._account_semaphore:
+            for index, message in enumerate(messages):
+                await self._get_rate_limiter(message.account).acquire()
+                if time.monotonic() >= deadline:
+                    await self._release([message.outgoing_message for message in messages[index:]])
+                    return
+
+                request = message.request
+                try:
+                    send_message_result = await self._smtp_controller.send_email(
+                        account=message.account,
+                        to=request.to,
+                        subject=request.subject,
+                        body=request.body,
+                        from_=request.from_,
+                        cc=request.cc,
+                        bcc=request.bcc,
+                        reply_to=request.reply_to,
+                        replied_message=message.replied_message,
+                    )
+                    result = _SendResult(message.outgoing_message, message.account, send_message_result)
+                except Exception as e:
+                    result = _SendResult(
+                        message.outgoing_message,
+                        message.account,
+                        error=str(e) or type(e).__name__,
+                        permanent=self._is_permanent_error(e),
+                    )
+                await self._record_send(result)
+
+    @staticmethod
+    def _is_permanent_error(error: Exception) -> bool:
+        """Check whether retrying a failed send won't help: the message or account is invalid, or the server said so."""
+        if isinstance(error, SMTPException) and isinstance(error.__cause__, Exception):
+            error = error.__cause__
+        if isinstance(error, (SMTPInvalidParameterError, SMTPConfigurationError)):
+            return True
+        # 5xx replies are permanent failures (RFC 5321), e.g. a rejected recipient or failed authentication
+        return isinstance(error, SMTPClientError) and error.code is not None and 500 <= error.code < 600
+
+    def _get_rate_limiter(self, account: Account) -> RateLimiter:
+        """Get this worker's rate limiter of an account's SMTP host, creating it on first use."""
+        smtp_host = account.provider_context.get("smtp_host", "")
+        rate_limiter = self._rate_limiters.get(smtp_host)
+        if rate_limiter is None:
+            rate = settings.smtp.send_rate_per_host_per_worker
+            rate_limiter = self._rate_limiters[smtp_host] = RateLimiter(rate=rate)
+        return rate_limiter
+
+    async def _record_send(self, result: _SendResult) -> None:
+        """Commit the outcome of a send right away."""
+        await self._record(lambda: self._record_result(result))
+
+    async def _record_result(self, result: _SendResult) -> None:
+        """Record a sent email and queue its webhook, and remove, reschedule or fail its message."""
+        outgoing_message = result.outgoing_message
+        description = f"{outgoing_message.uuid} (account {outgoing_message.account_id})"
+
+        if result.send_message_result is not None:
+            assert result.account is not None
+            await self._email_controller.record_sent_email(result.account, result.send_message_result)
+            self._logger.info(f"Queued message sent: {description}")
+            self._webhook_outbox_repo.enqueue([self._build_send_event(result, WEBHOOK_MESSAGE_SEND_SUCCESS)])
+            await self._outgoing_message_repo.complete([outgoing_message.id])
+        elif result.permanent or self._is_out_of_attempts(outgoing_message):
+            self._logger.error(
+                f"Sending queued message failed after {outgoing_message.attempts} attempts ({result.error}): "
+                f"{description}"
+            )
+            self._webhook_outbox_repo.enqueue([self._build_send_event(result, WEBHOOK_MESSAGE_SEND_FAILED)])
+            await self._outgoing_message_repo.mark_failed(outgoing_message.id, result.error)
+        else:
+            delay = self._get_retry_delay(outgoing_message)
+            self._logger.warning(f"Sending queued message failed ({result.error}), retrying in {delay}s: {description}")
+            await self._outgoing_message_repo.reschedule(outgoing_message.id, timedelta(seconds=delay), result.error)
+
+    def _build_send_event(self, result: _SendResult, event_type: str) -> WebhookOutbox:
+        """Build the webhook event reporting the outcome of a queued message."""
+        outgoing_message = result.outgoing_message
+        object_data = {
+            "id": str(outgoing_message.uuid),
+            "grant_id": str(result.account.uuid) if result.account else None,
+            "status": "sent" if result.send_message_result else "failed",
+        }
+        if result.send_message_result is not None:
+            object_json = json.dumps(object_data, separators=(",", ":"))
+            # Splice the sent message in as serialized by its model
+            message_json = result.send_message_result.message.model_dump_json(by_alias=True)
+            object_json = f'{object_json[:-1]},"message":{message_json}}}'
+        else:
+            object_json = json.dumps({**object_data, "error": result.error}, separators=(",", ":"))
+
+        # Send events don't refer to a message in a folder of the mailbox
+        return WebhookOutbox(
+            app_id=outgoing_message.app_id,
+            account_id=outgoing_message.account_id,
+            folder="",
+            uid=0,
+            event_type=event_type,
+            object_json=object_json,
+        )
@@ -0,0 +1,186 @@
+"""
+Background saving of sent messages to the Sent folder.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Sequence
+
+from app.constants.emails import SENT_COPY_SMTP_HOSTS
+from app.controllers.imap.connection import ConnectionManager
+from app.controllers.queue_worker import QueueSettings, QueueWorker
+from app.controllers.imap.folder_utils import FolderUtils
+from app.models import Account, SentMessageJob
+from app.repos.account import AccountRepo
+from app.repos.email import EmailRepo
+from app.repos.sent_message_job import SentMessageJobRepo
+from settings import settings
+
+_APPEND_UID = re.compile(rb"\[APPENDUID \d+ (\d+)\]")
+_BARE_LINE_FEED = re.compile(rb"(?<!\r)\n")
+
+
+@dataclass
+class _SaveResult:
+    """The outcome of one attempt to save a sent message."""
+
+    job: SentMessageJob
+    folder: str | None = None
+    uid: int | None = None
+    error: str | None = None
+
+
+class SentMessageSaver(QueueWorker[SentMessageJob]):
+    """
+    Saves the messages sent through the API to their account's Sent folder, off the send request's critical path.
+
+    Jobs are claimed with FOR UPDATE SKIP LOCKED like the webhook outbox and retried with exponential backoff. The Sent
+    folder of each account is resolved once per `sent_folder_cache_ttl`, preferring the SPECIAL-USE `\\Sent` folder.
+    Nothing is appended for SMTP servers that keep a copy of what they send, or when the Sent folder already holds a
+    message with the same Message-ID, which also keeps a retried job from saving the message twice.
+    """
+
+    def __init__(
+        self,
+        sent_message_job_repo: SentMessageJobRepo,
+        account_repo: AccountRepo,
+        email_repo: EmailRepo,
+        connection_manager: ConnectionManager,
+    ) -> None:
+        super().__init__(
+            "Sent message saver",
+            sent_message_job_repo,
+            QueueSettings(
+                claim_size=settings.smtp.sent_save_claim_size,
+                claim_timeout=settings.smtp.sent_save_claim_timeout,
+                poll_interval=settings.smtp.sent_save_poll_interval,
+                max_attempts=settings.smtp.sent_save_max_attempts,
+                retry_base_delay=settings.smtp.sent_save_retry_base_delay,
+                retry_max_delay=settings.smtp.sent_save_retry_max_delay,
+            ),
+        )
+        self._sent_message_job_repo = sent_message_job_repo
+        self._account_repo = account_repo
+        self._email_repo = email_repo
+        self._connection_manager = connection_manager
+        # Account id -> (Sent folder, when it was resolved)
+        self._sent_folders: dict[int, tuple[str | None, float]] = {}
+
+    async def _stop(self) -> None:
+        await self._connection_manager.close_all_connections()
+
+    async def _process(self, items: Sequence[SentMessageJob], deadline: float) -> None:
+        """Save the messages of claimed jobs concurrently, recording each one as soon as it is saved."""
+        accounts = {
+            account.id: account
+            for account in await self._account_repo.get_active_by_ids(list({job.account_id for job in items}))
+        }
+        await asyncio.gather(*(self._save_and_record(job, accounts.get(job.account_id), deadline) for job in items))
+
+    async def _save_and_record(self, job: SentMessageJob, account: Account | None, deadline: float) -> None:
+        """Save the message of a job and commit the outcome right away, or release the job if its claim is over."""
+        result = await self._save(job, account, deadline)
+        if result is None:
+            await self._release([job])
+        else:
+            await self._record(lambda: self._record_result(result))
+
+    async def _save(self, job: SentMessageJob, account: Account | None, deadline: float) -> _SaveResult | None:
+        """
+        Save the message of a job to its account's Sent folder unless it is already there.
+
+        Returns:
+            The outcome of the job, or None if it couldn't start before `deadline`
+        """
+        if account is None:
+            return _SaveResult(job=job)
+
+        try:
+            folder = await self._get_sent_folder(account)
+            if folder is None:
+                self._logger.warning(f"No Sent folder found for {account.email}, not saving {job.email_id}")
+                return _SaveResult(job=job)
+
+            smtp_host = account.provider_context.get("smtp_host")
+            if account.provider_context.get("smtp_saves_sent", smtp_host in SENT_COPY_SMTP_HOSTS):
+                return _SaveResult(job=job, folder=folder)
+
+            connection = await self._connection_manager.get_connection_or_fail(account)
+            if time.monotonic() >= deadline:
+                await self._connection_manager.release_connection(connection, account)
+                return None
+            try:
+                quoted_folder = FolderUtils.quote_folder_name(folder)
+                response = await connection.select(quoted_folder)
+                if response.result != "OK":
+                    raise ValueError(f"SELECT {folder} failed: {response.result}")
+
+                response = await connection.uid_search(f'HEADER Message-ID "{job.email_id}"')
+                uids = [int(uid) for uid in response.lines[0].split() if uid.isdigit()] if response.lines else []
+                if uids:
+                    return _SaveResult(job=job, folder=folder, uid=uids[0])
+
+                # IMAP requires CRLF line endings, which messages rendered with the SMTP policy already have
+                message = await self._read_message(job)
+                if message.count(b"\n") != message.count(b"\r\n"):
+                    message = _BARE_LINE_FEED.sub(b"\r\n", message)
+                response = await connection.append(message, quoted_folder, flags="\\Seen")
+                if response.result != "OK":
+                    raise ValueError(f"APPEND to {folder} failed: {response.result}")
+            finally:
+                await self._connection_manager.release_connection(connection, account)
+
+            # Servers with UIDPLUS report the UID of the new copy
+            for line in response.lines:
+                match = _APPEND_UID.search(line) if isinstance(line, bytes) else None
+                if match:
+                    return _SaveResult(job=job, folder=folder, uid=int(match.group(1)))
+            return _SaveResult(job=job, folder=folder)
+
+        except Exception as e:
+            return _SaveResult(job=job, error=str(e) or type(e).__name__)
+
+    async def _read_message(self, job: SentMessageJob) -> bytes:
+        """Read the message of a job, which is only loaded once it needs to be appended."""
+        async with self._session_lock:
+            try:
+                message = await self._sent_message_job_repo.read_message(job)
+                # Ends the transaction, which would otherwise stay open while the message is appended
+                await self._sent_message_job_repo.commit()
+            except Exception:
+                await self._sent_message_job_repo.rollback()
+                raise
+        return message
+
+    async def _get_sent_folder(self, account: Account) -> str | None:
+        """Get the Sent folder of an account, resolving it again once the cached one is `sent_folder_cache_ttl` old."""
+        cached = self._sent_folders.get(account.id)
+        if cached is not None and time.monotonic() - cached[1] < settings.smtp.sent_folder_cache_ttl:
+            return cached[0]
+
+        folder = await FolderUtils.get_sent_folder(self._connection_manager, account)
+        self._sent_folders[account.id] = (folder, time.monotonic())
+        return folder
+
+    async def _record_result(self, result: _SaveResult) -> None:
+        """Point the emails cache at the saved copy, and remove, reschedule or fail its job."""
+        job = result.job
+        description = f"{job.email_id} (account {job.account_id})"
+
+        if result.error is None:
+            if result.folder is not None:
+                await self._email_repo.set_sent_copy(job.account_id, job.email_id, result.folder, result.uid)
+                self._logger.info(f"Sent message saved to {result.folder}: {description}")
+            await self._sent_message_job_repo.complete([job.id])
+        elif self._is_out_of_attempts(job):
+            self._logger.error(f"Saving sent message failed after {job.attempts} attempts: {description}")
+            await self._sent_message_job_repo.mark_failed(job.id, result.error)
+        else:
+            # The folder may have been renamed or removed since it was resolved
+            self._sent_folders.pop(job.account_id, None)
+            delay = self._get_retry_delay(job)
+            self._logger.warning(f"Saving sent message failed ({result.error}), retrying in {delay}s: {description}")
+            await self._sent_message_job_repo.reschedule(job.id, timedelta(seconds=delay), result.error)
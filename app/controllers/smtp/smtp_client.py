@@ -0,0 +1,213 @@
+"""
+Minimal asyncio SMTP client.
+"""
+
+import asyncio
+import base64
+import re
+import socket
+import ssl
+from typing import IO, Awaitable, Sequence
+
+from settings import settings
+
+# Ports on which the server expects TLS right away (SMTPS); any other port is upgraded with STARTTLS.
+_IMPLICIT_TLS_PORTS = (465,)
+_BARE_LINE_ENDING = re.compile(rb"\r(?!\n)|(?<!\r)\n")
+# Size of the chunks the message is written in during DATA, so that the transport buffer stays small
+_DATA_CHUNK_SIZE = 64 * 1024
+
+
+class SMTPClientError(Exception):
+    """Exception raised when the SMTP server rejects a command or the connection fails."""
+
+    def __init__(self, message: str, code: int | None = None) -> None:
+        self.code = code
+        super().__init__(f"{code} {message}" if code is not None else message)
+
+
+class SMTPClient:
+    """
+    An SMTP session on asyncio streams, so that sending never blocks the event loop.
+
+    Supports implicit TLS (port 465) and STARTTLS, AUTH PLAIN/LOGIN, and RSET/NOOP so that an authenticated session can
+    be reused for several messages.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._extensions: dict[str, str] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        """Open the connection, greet the server and secure the session."""
+        context = ssl.create_default_context()
+        implicit_tls = self.port in _IMPLICIT_TLS_PORTS
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context if implicit_tls else None),
+            timeout=settings.smtp.timeout,
+        )
+
+        try:
+            await self._expect(self._read_response(), 220)
+            await self._ehlo()
+
+            if not implicit_tls:
+                if "starttls" not in self._extensions:
+                    raise SMTPClientError(f"{self.host} doesn't support STARTTLS")
+                await self._expect(self._command("STARTTLS"), 220)
+                assert self._writer is not None
+                await asyncio.wait_for(
+                    self._writer.start_tls(context, server_hostname=self.host), timeout=settings.smtp.timeout
+                )
+                # The capabilities may change once the session is encrypted.
+                await self._ehlo()
+        except BaseException:
+            self.close()
+            raise
+
+    async def login(self, username: str, password: str) -> None:
+        """Authenticate with AUTH PLAIN, or AUTH LOGIN if that's the only mechanism the server offers."""
+        mechanisms = self._extensions.get("auth", "").upper().split()
+        if "PLAIN" in mechanisms or "LOGIN" not in mechanisms:
+            token = base64.b64encode(f"\0{username}\0{password}".encode()).decode()
+            await self._expect(self._command(f"AUTH PLAIN {token}"), 235)
+            return
+
+        await self._expect(self._command("AUTH LOGIN"), 334)
+        await self._expect(self._command(base64.b64encode(username.encode()).decode()), 334)
+        await self._expect(self._command(base64.b64encode(password.encode()).decode()), 235)
+
+    async def send_message(self, sender: str, recipients: Sequence[str], message: IO[bytes]) -> None:
+        """Send a message to every recipient, streaming the full RFC 5322 message from a file in chunks."""
+        await self._expect(self._command(f"MAIL FROM:<{sender}>"), 250)
+        for recipient in recipients:
+            await self._expect(self._command(f"RCPT TO:<{recipient}>"), 250, 251)
+        await self._expect(self._command("DATA"), 354)
+
+        assert self._writer is not None
+        # Chunks are cut after their last line break, so that every chunk starts at the beginning of a line.
+        pending = b""
+        ends_with_line_break = True
+        while chunk := message.read(_DATA_CHUNK_SIZE):
+            data = pending + chunk
+            cut = data.rfind(b"\n") + 1
+            data, pending = data[:cut], data[cut:]
+            if data:
+                self._writer.write(self._encode_data(data))
+                ends_with_line_break = True
+                await self._drain()
+        if pending:
+            data = self._encode_data(pending)
+            self._writer.write(data)
+            ends_with_line_break = data.endswith(b"\r\n")
+
+        self._writer.write(b".\r\n" if ends_with_line_break else b"\r\n.\r\n")
+        await self._expect(self._read_response(), 250)
+
+    async def rset(self) -> None:
+        """Reset the transaction state of the session."""
+        await self._expect(self._command("RSET"), 250)
+
+    async def noop(self) -> None:
+        """Check that the session is still alive."""
+        await self._expect(self._command("NOOP"), 250)
+
+    async def quit(self) -> None:
+        """End the session politely and close the connection, ignoring errors from servers that already hung up."""
+        try:
+            if self.is_connected:
+                await asyncio.wait_for(self._command("QUIT"), timeout=5)
+        except Exception:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Close the connection right away."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def _ehlo(self) -> None:
+        """Greet the server and record the extensions it announces."""
+        _, lines = await self._expect(self._command(f"EHLO {socket.gethostname()}"), 250)
+        self._extensions = {}
+        for line in lines[1:]:
+            keyword, _, parameters = line.partition(" ")
+            self._extensions[keyword.lower()] = parameters
+
+    async def _command(self, line: str) -> tuple[int, list[str]]:
+        """Send a command and read its response."""
+        if self._writer is None:
+            raise SMTPClientError("Not connected to the SMTP server")
+
+        self._writer.write(line.encode() + b"\r\n")
+        return await self._read_response()
+
+    async def _read_response(self) -> tuple[int, list[str]]:
+        """Read a possibly multiline response, e.g. `250-first`, `250 last`."""
+        if self._reader is None or self._writer is None:
+            raise SMTPClientError("Not connected to the SMTP server")
+
+        lines: list[str] = []
+        await self._drain()
+
+        while True:
+            try:
+                raw_line = await asyncio.wait_for(self._reader.readline(), timeout=settings.smtp.timeout)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                self.close()
+                raise SMTPClientError(f"Connection to {self.host} failed: {str(e) or 'timeout'}")
+            if not raw_line:
+                self.close()
+                raise SMTPClientError(f"Connection closed by {self.host}")
+
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if len(line) < 3 or not line[:3].isdigit():
+                self.close()
+                raise SMTPClientError(f"Malformed response from {self.host}: {line}")
+
+            lines.append(line[4:])
+            if line[3:4] != "-":
+                return int(line[:3]), lines
+
+    async def _expect(self, response: Awaitable[tuple[int, list[str]]], *codes: int) -> tuple[int, list[str]]:
+        """Await a response and raise unless its code is one of `codes`."""
+        code, lines = await response
+        if code not in codes:
+            raise SMTPClientError(" ".join(lines), code)
+        return code, lines
+
+    async def _drain(self) -> None:
+        """Wait until the written data is handed to the socket, so that the transport buffer doesn't grow."""
+        assert self._writer is not None
+        try:
+            await asyncio.wait_for(self._writer.drain(), timeout=settings.smtp.timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            self.close()
+            raise SMTPClientError(f"Connection to {self.host} failed: {str(e) or 'timeout'}")
+
+    def _encode_data(self, data: bytes) -> bytes:
+        """
+        Normalize line endings to CRLF and dot-stuff a chunk of the message that starts at the beginning of a line.
+
+        A chunk that already uses CRLF and has no line starting with a dot, e.g. one rendered with the SMTP policy, is
+        returned as is instead of being copied.
+        """
+        # Counting is much faster than scanning for bare CR or LF with the regex on a large chunk
+        line_feeds = data.count(b"\n")
+        if data.count(b"\r") != line_feeds or data.count(b"\r\n") != line_feeds:
+            data = _BARE_LINE_ENDING.sub(b"\r\n", data)
+        if data.startswith(b"."):
+            data = b"." + data
+        if b"\r\n." in data:
+            data = data.replace(b"\r\n.", b"\r\n..")
+        return data
@@ -2,15 +2,15 @@
 SMTP controller for sending emails.
 """
 
+import asyncio
 import logging
-import smtplib
+import tempfile
 import uuid
 from dataclasses import dataclass
-from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formatdate
-from typing import Any
+from typing import IO, Any
 
 from app.api.payloads.messages import (
     AttachmentData,
@@ -18,12 +18,14 @@ from app.api.payloads.messages import (
     MessageAttachment,
     SendMessageData,
 )
+from app.constants.emails import SENT_FOLDERS
 from app.controllers.email.message import MessageResult, SendMessageResult
-from app.controllers.imap.connection import ConnectionManager
-from app.controllers.imap.folder_utils import FolderUtils
+from app.controllers.smtp.smtp_client import SMTPClient, SMTPClientError
+from app.controllers.smtp.smtp_pool import SMTPConnectionPool
 from app.models.account import Account
 from app.utils.message_utils import MessageUtils
-from app.utils.password import PasswordUtils
+from app.utils.mime_utils import MimeUtils
+from settings import settings
 
 
 @dataclass
@@ -38,6 +40,12 @@ class SMTPException(Exception):
     pass
 
 
+class SMTPConfigurationError(ValueError):
+    """Exception raised when an account lacks the settings to send emails."""
+
+    pass
+
+
 class SMTPInvalidParameterError(Exception):
     """Exception raised when a parameter is invalid."""
 
@@ -50,9 +58,9 @@ class SMTPInvalidParameterError(Exception):
 class SMTPController:
     """Controller for sending emails via SMTP."""
 
-    def __init__(self, connection_manager: ConnectionManager) -> None:
+    def __init__(self, smtp_pool: SMTPConnectionPool) -> None:
         self._logger = logging.getLogger(__name__)
-        self._connection_manager = connection_manager
+        self._smtp_pool = smtp_pool
 
     async def send_email(
         self,
@@ -110,12 +118,24 @@ class SMTPController:
             attachments=attachments,
         )
 
-        message_id = await self._send_smtp_message(account, smtp_config, message, to, cc, bcc)
-
+        # Rendered once with CRLF line endings, as both SMTP DATA and IMAP APPEND expect, and reused for both. The
+        # attachments are base64-encoded chunk by chunk from their uploads, in a thread as large ones take a while.
+        message_id = message["Message-ID"]
+        raw_message = tempfile.SpooledTemporaryFile(max_size=settings.smtp.spool_max_memory)
         try:
-            sent_folder = await self._save_to_sent_folder(account, message)
-        except Exception as e:
-            self._logger.warning(f"Failed to save sent message to Sent folder: {e}")
+            await asyncio.to_thread(MimeUtils.write_message, message, attachments or [], raw_message)
+            raw_message.seek(0)
+
+            await self._send_smtp_message(account, smtp_config, message_id, raw_message, to, cc, bcc)
+        except BaseException:
+            raw_message.close()
+            raise
+
+        # The file is handed over for the copy in the Sent folder, which the SentMessageSaver saves in the background
+        # once the caller queues it and commits.
+        raw_message.seek(0)
+        # Until then the email is cached under the default Sent folder, so that the listeners recognize it as sent.
+        sent_folder = SENT_FOLDERS[0]
 
         attachments_data = []
         if attachments:
@@ -124,7 +144,7 @@ class SMTPController:
                     MessageAttachment(
                         id=f"att_{i + 1}",
                         filename=attachment.filename,
-                        size=len(attachment.data),
+                        size=attachment.size,
                         content_type=attachment.content_type,
                     )
                 )
@@ -143,19 +163,26 @@ class SMTPController:
         )
 
         thread_id = replied_message.message.thread_id if replied_message else message_id
-        return SendMessageResult(message=data, message_id=message_id, thread_id=thread_id, folder=sent_folder)
+        return SendMessageResult(
+            message=data,
+            message_id=message_id,
+            thread_id=thread_id,
+            folder=sent_folder,
+            sent_copy=raw_message,
+        )
 
-    async def login(self, email: str, password: str, host: str, port: int) -> smtplib.SMTP_SSL | None:
-        """Login to the SMTP server."""
+    async def login(self, email: str, password: str, host: str, port: int) -> bool:
+        """Check that the credentials can log in to the SMTP server."""
+        client = SMTPClient(host, port)
         try:
-            server = smtplib.SMTP_SSL(host, port)
-            response = server.login(email, password)
-            if response[0] != 235:
-                return None
-            return server
+            await client.connect()
+            await client.login(email, password)
+            return True
         except Exception:
-            self._logger.warning("Failed to login to SMTP server", stack_info=True)
-            return None
+            self._logger.warning("Failed to login to SMTP server", exc_info=True)
+            return False
+        finally:
+            await client.quit()
 
     def _get_smtp_config(self, account: Account) -> _SMTPConfig:
         """Extract SMTP configuration from account."""
@@ -165,7 +192,7 @@ class SMTPController:
         smtp_port = provider_context.get("smtp_port", 465)
 
         if not smtp_host or not smtp_port:
-            raise ValueError("SMTP host and port are required")
+            raise SMTPConfigurationError("SMTP host and port are required")
 
         config = _SMTPConfig(host=smtp_host, port=smtp_port)
 
@@ -238,12 +265,8 @@ class SMTPController:
             message.attach(html_part)
 
         if attachments:
-            for attachment in attachments:
-                attachment_part = MIMEApplication(attachment.data, name=attachment.filename)
-                attachment_part.add_header("Content-Disposition", f"attachment; filename={attachment.filename}")
-                if attachment.content_type:
-                    attachment_part.set_type(attachment.content_type)
-                message.attach(attachment_part)
+            for index, attachment in enumerate(attachments):
+                message.attach(MimeUtils.create_attachment_part(attachment, index))
 
         return message
 
@@ -251,21 +274,15 @@ class SMTPController:
         self,
         account: Account,
         smtp_config: _SMTPConfig,
-        message: MIMEMultipart,
+        message_id: str,
+        raw_message: IO[bytes],
         to: list[EmailAddress],
         cc: list[EmailAddress] | None = None,
         bcc: list[EmailAddress] | None = None,
-    ) -> str:
-        """Send message via SMTP."""
+    ) -> None:
+        """Send a rendered message via SMTP, on a pooled session of the account when one is available."""
         try:
-            server = await self.login(
-                account.email,
-                password=PasswordUtils.decrypt_password(account.credentials),
-                host=smtp_config.host,
-                port=smtp_config.port,
-            )
-            if not server:
-                raise SMTPException("Failed to login to SMTP server")
+            client = await self._smtp_pool.get_connection(account, smtp_config.host, smtp_config.port)
 
             # Prepare recipient list
             recipients = [addr.email for addr in to]
@@ -274,54 +291,35 @@ class SMTPController:
             if bcc:
                 recipients.extend([addr.email for addr in bcc])
 
-            text = message.as_string()
-            server.sendmail(account.email, recipients, text)
-            server.quit()
+            try:
+                await client.send_message(account.email, recipients, raw_message)
+            except BaseException as e:
+                await self._release_failed_connection(account, client, e)
+                raise
+            await self._smtp_pool.release_connection(account, client)
 
-            # Extract Message-ID from headers (now guaranteed to exist)
-            message_id = message["Message-ID"]
             self._logger.info(f"Email sent successfully: {message_id}")
-            return message_id
 
         except Exception as e:
-            raise SMTPException(f"Failed to send email: {e}")
-
-    async def _save_to_sent_folder(self, account: Account, message: MIMEMultipart) -> str | None:
-        """Save a copy of the sent message to the Sent folder via IMAP."""
-        # Common Sent folder names to try
-        sent_folder_names = ["Sent", "SENT", "Sent Items", "Sent Mail", "Sent Messages"]
+            raise SMTPException(f"Failed to send email: {e}") from e
 
-        try:
-            # Use FolderUtils to get all folders for the account
-            all_folders = await FolderUtils.get_account_folders(self._connection_manager, account)
-
-            # Find the first matching Sent folder
-            sent_folder = None
-            for folder_name in sent_folder_names:
-                if folder_name in all_folders:
-                    sent_folder = folder_name
-                    break
-
-            if not sent_folder:
-                self._logger.warning("No existing sent folder found")
-                return None
-
-            connection = await self._connection_manager.get_connection(account)
-            if not connection:
-                self._logger.warning(f"Could not get IMAP connection for account {account.id} to save to Sent folder")
-                return None
-
-            try:
-                # IMAP requires CRLF line endings, not just LF
-                message_string = message.as_string()
-                # Convert LF to CRLF for IMAP
-                message_string = message_string.replace("\n", "\r\n")
-                await connection.append(message_string.encode("utf-8"), sent_folder, flags="\\Seen")
-            finally:
-                await self._connection_manager.close_connection(connection, account)
+    async def _release_failed_connection(self, account: Account, client: SMTPClient, error: BaseException) -> None:
+        """
+        Return the session of a failed send to the pool only if it can be reused, closing it otherwise.
 
-            return sent_folder
+        A command the server rejected (e.g. 550 on RCPT TO) leaves the transaction open, so the session is reset before
+        it is reused; any other failure, including cancellation, may leave it mid-command.
+        """
+        if not isinstance(error, SMTPClientError) or error.code is None or not client.is_connected:
+            client.close()
+            return
 
-        except Exception as e:
-            self._logger.error(f"Failed to save message to Sent folder: {e}")
-            return None
+        try:
+            await client.rset()
+        except Exception:
+            client.close()
+            return
+        except BaseException:
+            client.close()
+            raise
+        await self._smtp_pool.release_connection(account, client)
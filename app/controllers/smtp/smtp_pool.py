@@ -0,0 +1,144 @@
+"""
+Pool of authenticated SMTP sessions.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from app.controllers.smtp.smtp_client import SMTPClient
+from app.models.account import Account
+from app.utils.password import PasswordUtils
+from settings import settings
+
+# Pooled sessions are keyed by (account id, SMTP host, SMTP port).
+_PoolKey = tuple[int, str, int]
+
+
+@dataclass
+class _IdleSMTPConnection:
+    """An authenticated session waiting in the pool to be reused."""
+
+    client: SMTPClient
+    idle_since: float
+
+
+class SMTPConnectionPool:
+    """
+    Reuses authenticated SMTP sessions per account and limits the connections being opened to each SMTP host at once.
+
+    A pooled session is checked with RSET before it is handed out, which fails on a session the server dropped and
+    clears whatever a failed transaction left behind, so consecutive sends from an account skip the TCP, TLS and AUTH
+    round trips. Sessions idle for longer than `pool_max_idle_time` are closed by a background loop.
+    """
+
+    def __init__(self) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._lock = asyncio.Lock()
+        self._idle_connections: dict[_PoolKey, list[_IdleSMTPConnection]] = {}
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._maintenance_task: asyncio.Task[None] | None = None
+
+    async def get_connection(self, account: Account, host: str, port: int) -> SMTPClient:
+        """Get an authenticated session for an account, reusing a pooled one when it is still healthy."""
+        self._ensure_maintenance_task()
+
+        pool_key = (account.id, host, port)
+        client = await self._checkout_idle_connection(pool_key)
+        if client is not None:
+            self._logger.debug(f"Reusing pooled SMTP connection for {account.email}")
+            return client
+
+        async with self._get_host_semaphore(host):
+            client = SMTPClient(host, port)
+            await client.connect()
+            try:
+                await client.login(account.email, PasswordUtils.decrypt_password(account.credentials))
+            except BaseException:
+                await client.quit()
+                raise
+
+        self._logger.debug(f"Created new SMTP connection for {account.email}")
+        return client
+
+    async def release_connection(self, account: Account, client: SMTPClient) -> None:
+        """Return a session to the pool, or close it if it is broken or the account's share of the pool is full."""
+        if not client.is_connected:
+            return
+
+        async with self._lock:
+            idle_connections = self._idle_connections.setdefault((account.id, client.host, client.port), [])
+            if len(idle_connections) < settings.smtp.pool_max_idle_per_account:
+                idle_connections.append(_IdleSMTPConnection(client=client, idle_since=time.monotonic()))
+                return
+
+        await client.quit()
+
+    async def close_all_connections(self) -> None:
+        """Stop the pool maintenance and close every idle session."""
+        if self._maintenance_task and not self._maintenance_task.done():
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+        self._maintenance_task = None
+
+        async with self._lock:
+            idle_connections = [idle for pooled in self._idle_connections.values() for idle in pooled]
+            self._idle_connections.clear()
+
+        await asyncio.gather(*(idle.client.quit() for idle in idle_connections), return_exceptions=True)
+
+    async def _checkout_idle_connection(self, pool_key: _PoolKey) -> SMTPClient | None:
+        """Take the most recently used healthy session out of the pool."""
+        while True:
+            async with self._lock:
+                idle_connections = self._idle_connections.get(pool_key)
+                if not idle_connections:
+                    return None
+                idle = idle_connections.pop()
+
+            if time.monotonic() - idle.idle_since < settings.smtp.pool_max_idle_time:
+                try:
+                    await idle.client.rset()
+                    return idle.client
+                except Exception:
+                    pass
+
+            await idle.client.quit()
+
+    def _get_host_semaphore(self, host: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting the connections being opened to an SMTP host."""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(settings.smtp.max_connections_per_host)
+        return semaphore
+
+    def _ensure_maintenance_task(self) -> None:
+        """Start the eviction loop if it isn't running yet."""
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.create_task(self._evict_idle_connections())
+
+    async def _evict_idle_connections(self) -> None:
+        """Close the sessions that have been idle for longer than `pool_max_idle_time`."""
+        while True:
+            await asyncio.sleep(max(1, settings.smtp.pool_max_idle_time // 2))
+
+            now = time.monotonic()
+            to_evict: list[_IdleSMTPConnection] = []
+            async with self._lock:
+                for pool_key, idle_connections in list(self._idle_connections.items()):
+                    for idle in list(idle_connections):
+                        if now - idle.idle_since >= settings.smtp.pool_max_idle_time:
+                            idle_connections.remove(idle)
+                            to_evict.append(idle)
+                    if not idle_connections:
+                        self._idle_connections.pop(pool_key, None)
+
+            for idle in to_evict:
+                await idle.client.quit()
+
+            if to_evict:
+                self._logger.debug(f"SMTP pool maintenance: evicted {len(to_evict)} connections")
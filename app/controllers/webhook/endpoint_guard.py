@@ -0,0 +1,86 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from settings import settings
+
+
+class EndpointGuard:
+    """
+    Protects one webhook endpoint from bursts: caps the requests in flight, rate limits them with a token bucket and
+    stops sending while a circuit breaker is open.
+
+    The circuit opens after `circuit_failure_threshold` consecutive 5xx responses, timeouts or connection errors. While
+    it is open, events aren't sent and stay queued; once `circuit_open_seconds` have passed, a single probe request is
+    let through (half-open), which closes the circuit if it succeeds and opens it again if it doesn't.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._semaphore = asyncio.Semaphore(settings.webhook.endpoint_max_in_flight)
+        self._rate = float(settings.webhook.endpoint_rate)
+        self._tokens = self._rate
+        self._refilled_at = time.monotonic()
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def retry_after(self) -> float | None:
+        """
+        Check whether a request may be sent now, reserving the probe request if the circuit is half-open.
+
+        Returns:
+            None if the request may be sent, otherwise the seconds to wait before trying again
+        """
+        if self._opened_at is None:
+            return None
+
+        remaining = self._opened_at + settings.webhook.circuit_open_seconds - time.monotonic()
+        if remaining > 0:
+            return remaining
+        if self._probing:
+            # Another request is probing the endpoint; check again once it likely finished.
+            return float(settings.webhook.timeout)
+
+        self._probing = True
+        return None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a free in-flight slot and a rate limit token."""
+        async with self._semaphore:
+            await self._take_token()
+            yield
+
+    def record_success(self) -> None:
+        """Record a response from the endpoint, closing the circuit."""
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Give up the probe reserved by `retry_after` without sending it, so that the next request probes instead."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a 5xx response, timeout or connection error, opening the circuit once the threshold is reached."""
+        self._consecutive_failures += 1
+        if self._probing or self._consecutive_failures >= settings.webhook.circuit_failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    async def _take_token(self) -> None:
+        """Take a token from the bucket, waiting for it to refill if it's empty."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._rate, self._tokens + (now - self._refilled_at) * self._rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
@@ -0,0 +1,87 @@
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+
+from settings import settings
+
+
+@dataclass
+class ConnectionPoolStats:
+    """Counters of how webhook requests got their connections, collected through an aiohttp TraceConfig."""
+
+    connections_created: int = 0
+    connections_reused: int = 0
+    # Requests that had to wait for a free connection because the pool (or the host's share of it) was full
+    requests_queued: int = 0
+    queued_seconds: float = 0.0
+    max_queued_seconds: float = 0.0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Build a TraceConfig that updates these counters."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_connection_queued_end)
+        return trace_config
+
+    def reset(self) -> None:
+        """Start counting again from zero."""
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.requests_queued = 0
+        self.queued_seconds = 0.0
+        self.max_queued_seconds = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.connections_created} connections created, {self.connections_reused} reused, "
+            f"{self.requests_queued} requests waited for a connection "
+            f"(total {self.queued_seconds:.2f}s, max {self.max_queued_seconds:.2f}s)"
+        )
+
+    async def _on_connection_create_end(
+        self, session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceConnectionCreateEndParams
+    ) -> None:
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(
+        self, session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceConnectionReuseconnParams
+    ) -> None:
+        self.connections_reused += 1
+
+    async def _on_connection_queued_start(
+        self, session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceConnectionQueuedStartParams
+    ) -> None:
+        context.queued_at = time.monotonic()
+
+    async def _on_connection_queued_end(
+        self, session: aiohttp.ClientSession, context: SimpleNamespace, params: aiohttp.TraceConnectionQueuedEndParams
+    ) -> None:
+        waited = time.monotonic() - getattr(context, "queued_at", time.monotonic())
+        self.requests_queued += 1
+        self.queued_seconds += waited
+        self.max_queued_seconds = max(self.max_queued_seconds, waited)
+
+
+def create_webhook_session(stats: ConnectionPoolStats | None = None) -> aiohttp.ClientSession:
+    """
+    Create the HTTP session shared by all webhook requests of a process.
+
+    Its connector keeps connections to webhook hosts alive and caches their DNS lookups, so the TCP and TLS setup
+    happens once per host instead of once per burst.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.webhook.connector_limit,
+        limit_per_host=settings.webhook.connector_limit_per_host,
+        keepalive_timeout=settings.webhook.keepalive_timeout,
+        ttl_dns_cache=settings.webhook.dns_cache_ttl,
+        use_dns_cache=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=settings.webhook.timeout),
+        trace_configs=[stats.trace_config()] if stats is not None else None,
+    )
@@ -0,0 +1,328 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Sequence
+
+import aiohttp
+
+from app.controllers.queue_worker import QueueSettings, QueueWorker
+from app.controllers.webhook.endpoint_guard import EndpointGuard
+from app.controllers.webhook.http_session import ConnectionPoolStats, create_webhook_session
+from app.controllers.webhook.webhook_log_writer import WebhookLogWriter
+from app.models import App, WebhookOutbox
+from app.repos.app import AppRepo
+from app.repos.webhook_outbox import WebhookOutboxRepo
+from app.utils.webhook_utils import WebhookUtils
+from settings import settings
+
+
+@dataclass
+class _DeliveryResult:
+    """The outcome of one delivery attempt of an outbox event."""
+
+    event: WebhookOutbox
+    webhook_url: str | None
+    status_code: int | None = None
+    response_body: str | None = None
+    # Set when the endpoint's circuit is open and the event wasn't sent: the seconds to wait before trying again.
+    deferred_for: float | None = None
+    # The seconds the endpoint asked to wait before trying again, with a Retry-After header
+    retry_after: float | None = None
+
+    @property
+    def delivered(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+    @property
+    def throttled(self) -> bool:
+        # 408 Request Timeout and 429 Too Many Requests ask to try again later
+        return self.status_code in (408, 429)
+
+    @property
+    def rejected(self) -> bool:
+        # Other client errors (4xx) won't be fixed by retrying
+        return self.status_code is not None and 400 <= self.status_code < 500 and not self.throttled
+
+    @property
+    def endpoint_failed(self) -> bool:
+        # 5xx responses, throttling, timeouts and connection errors count towards opening the endpoint's circuit
+        return self.status_code is None or self.status_code >= 500 or self.throttled
+
+
+class WebhookDispatcher(QueueWorker[WebhookOutbox]):
+    """
+    Delivers the webhook events queued in the outbox, independently of mailbox polling.
+
+    Events are claimed in batches with FOR UPDATE SKIP LOCKED, so any number of dispatchers can drain the outbox
+    together, and failed deliveries are retried with exponential backoff up to `max_attempts`. Delivery is at least
+    once: an event whose outcome couldn't be recorded is delivered again once its claim times out. Each webhook URL is
+    shared by all the accounts of an app, so requests to it go through its EndpointGuard.
+
+    The outcome of each request is committed as soon as it finishes, so that a slow endpoint doesn't hold back the
+    events of other apps, and events still waiting for their endpoint when their claim is about to time out are released
+    instead of sent, so that no other dispatcher claims them while they are being delivered.
+    """
+
+    def __init__(
+        self, webhook_outbox_repo: WebhookOutboxRepo, webhook_log_writer: WebhookLogWriter, app_repo: AppRepo
+    ) -> None:
+        super().__init__(
+            "Webhook dispatcher",
+            webhook_outbox_repo,
+            QueueSettings(
+                claim_size=settings.webhook.dispatcher_claim_size,
+                claim_timeout=settings.webhook.claim_timeout,
+                poll_interval=settings.webhook.dispatcher_poll_interval,
+                max_attempts=settings.webhook.max_attempts,
+                retry_base_delay=settings.webhook.retry_base_delay,
+                retry_max_delay=settings.webhook.retry_max_delay,
+                # Leaves the last requests their timeout to finish and as long again to be recorded
+                claim_margin=2 * settings.webhook.timeout,
+            ),
+        )
+        self._webhook_outbox_repo = webhook_outbox_repo
+        self._webhook_log_writer = webhook_log_writer
+        self._app_repo = app_repo
+        self._http_session: aiohttp.ClientSession | None = None
+        self._endpoint_guards: dict[str, EndpointGuard] = {}
+        self._pool_stats = ConnectionPoolStats()
+        self._request_semaphore = asyncio.Semaphore(settings.webhook.dispatcher_concurrency)
+        self._stats_logged_at = time.monotonic()
+        # Whether the last claim had events of apps in batch mode
+        self._batched = False
+
+    async def _start(self) -> None:
+        self._http_session = create_webhook_session(self._pool_stats)
+        self._stats_logged_at = time.monotonic()
+
+    async def _stop(self) -> None:
+        await self._webhook_log_writer.flush()
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    async def _after_batch(self) -> None:
+        await self._webhook_log_writer.flush_if_due()
+        await self._webhook_log_writer.maintain_partitions_if_due()
+
+        if time.monotonic() - self._stats_logged_at >= settings.webhook.connection_stats_interval:
+            self._logger.info(f"Webhook connection pool: {self._pool_stats}")
+            self._pool_stats.reset()
+            self._stats_logged_at = time.monotonic()
+
+    def _get_wait_time(self, claimed: int) -> float:
+        if claimed and not self._batched:
+            return 0.0
+        # After a partial claim with batched events, let events accumulate for one batch window so that they are
+        # coalesced into fewer requests.
+        if claimed and claimed < settings.webhook.dispatcher_claim_size:
+            return settings.webhook.batch_window
+        return super()._get_wait_time(claimed)
+
+    async def _process(self, items: Sequence[WebhookOutbox], deadline: float) -> None:
+        """
+        Deliver claimed events concurrently.
+
+        Events of apps in batch mode are sent together, up to `batch_max_events` per request; the others are sent one
+        per request.
+        """
+        apps = {app.id: app for app in await self._app_repo.get_by_ids(list({event.app_id for event in items}))}
+
+        events_by_app: dict[int, list[WebhookOutbox]] = {}
+        for event in items:
+            events_by_app.setdefault(event.app_id, []).append(event)
+
+        deliveries: list[tuple[list[WebhookOutbox], App | None]] = []
+        self._batched = False
+        for app_id, app_events in events_by_app.items():
+            app = apps.get(app_id)
+            if app is not None and app.webhook_batch_enabled:
+                self._batched = True
+                size = settings.webhook.batch_max_events
+                deliveries.extend((app_events[start : start + size], app) for start in range(0, len(app_events), size))
+            else:
+                deliveries.extend(([event], app) for event in app_events)
+
+        await asyncio.gather(*(self._deliver_and_record(batch, app, deadline) for batch, app in deliveries))
+
+    async def _deliver_and_record(self, events: list[WebhookOutbox], app: App | None, deadline: float) -> None:
+        """Deliver events in one request and commit the outcome right away."""
+        results = await self._deliver(events, app, deadline)
+        await self._record(lambda: self._record_results(results))
+
+    async def _deliver(self, events: list[WebhookOutbox], app: App | None, deadline: float) -> list[_DeliveryResult]:
+        """
+        Attempt to deliver events to their app's webhook URL in one request.
+
+        A single event is sent as a JSON object; several are sent as a JSON array, each event keeping its own ID so
+        that receivers can deduplicate them. Events are released without being sent if the request can't start before
+        `deadline`.
+        """
+        if app is None or not app.webhook_url or self._http_session is None:
+            return [
+                _DeliveryResult(event=event, webhook_url=None, response_body="No webhook URL configured")
+                for event in events
+            ]
+
+        payloads = [self._build_payload(event, app) for event in events]
+        body = b"[" + b",".join(payloads) + b"]" if app.webhook_batch_enabled else payloads[0]
+        headers = {"Content-Type": "application/json"}
+        signature = WebhookUtils.generate_signature(body, app.webhook_secret or "")
+        if signature:
+            headers["x-nylas-signature"] = signature
+
+        guard = self._get_endpoint_guard(app.webhook_url)
+        async with guard.slot():
+            # Checked once a slot is free, so that requests queued behind a failing one don't pile up on the endpoint.
+            retry_after = guard.retry_after()
+            if retry_after is not None:
+                return [
+                    _DeliveryResult(event=event, webhook_url=app.webhook_url, deferred_for=retry_after)
+                    for event in events
+                ]
+
+            # While the circuit is half-open, this request is its probe, which must be given up if it isn't sent.
+            probing = guard.is_open
+            try:
+                async with self._request_semaphore:
+                    if time.monotonic() >= deadline:
+                        if probing:
+                            guard.release_probe()
+                        return [
+                            _DeliveryResult(event=event, webhook_url=app.webhook_url, deferred_for=0)
+                            for event in events
+                        ]
+                    status_code, response_body, retry_after = await self._post(app.webhook_url, body, headers)
+            except BaseException:
+                if probing:
+                    guard.release_probe()
+                raise
+
+        results = [
+            _DeliveryResult(
+                event=event,
+                webhook_url=app.webhook_url,
+                status_code=status_code,
+                response_body=response_body,
+                retry_after=retry_after,
+            )
+            for event in events
+        ]
+        if results[0].endpoint_failed:
+            was_open = guard.is_open
+            guard.record_failure()
+            if guard.is_open and not was_open:
+                self._logger.warning(f"Circuit opened for webhook endpoint {app.webhook_url}")
+        else:
+            if guard.is_open:
+                self._logger.info(f"Circuit closed for webhook endpoint {app.webhook_url}")
+            guard.record_success()
+        return results
+
+    def _build_payload(self, event: WebhookOutbox, app: App) -> bytes:
+        """Build the webhook payload of an event."""
+        return WebhookUtils.build_event_payload(
+            event_type=event.event_type,
+            event_id=str(event.uuid),
+            time=int(event.created_at.timestamp()),
+            attempt=event.attempts,
+            application_id=str(app.uuid),
+            object_json=event.object_json,
+        )
+
+    async def _post(
+        self, webhook_url: str, body: bytes, headers: dict[str, str]
+    ) -> tuple[int | None, str | None, float | None]:
+        """
+        Send a webhook request.
+
+        Returns:
+            The response status code (None if no response was received), the response body or error if the request
+            didn't succeed, and the seconds to wait before trying again if the response has a Retry-After header
+        """
+        assert self._http_session is not None
+
+        try:
+            async with self._http_session.post(webhook_url, data=body, headers=headers) as response:
+                if 200 <= response.status < 300:
+                    return response.status, None, None
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                # Only the part of the body that is logged is read, however large the error page is.
+                content = await response.content.read(settings.webhook.log_max_response_body)
+                return response.status, content.decode("utf-8", errors="replace"), retry_after
+        except asyncio.TimeoutError:
+            return None, "Timeout", None
+        except Exception as e:
+            return None, str(e), None
+
+    @staticmethod
+    def _parse_retry_after(value: str | None) -> float | None:
+        """Parse a Retry-After header, given in seconds or as an HTTP date, into the seconds to wait."""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=UTC)
+        return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+    def _get_endpoint_guard(self, webhook_url: str) -> EndpointGuard:
+        """Get the guard of a webhook URL, creating it on first use."""
+        guard = self._endpoint_guards.get(webhook_url)
+        if guard is None:
+            guard = self._endpoint_guards[webhook_url] = EndpointGuard(webhook_url)
+        return guard
+
+    async def _record_results(self, results: list[_DeliveryResult]) -> None:
+        """Buffer the logs of a delivery attempt, and remove, reschedule or fail its events."""
+        now = datetime.now(UTC)
+        completed_ids: list[int] = []
+
+        for result in results:
+            event = result.event
+            if result.deferred_for is not None:
+                # Not an attempt: the event waits for the endpoint's circuit to close, or for the next claim.
+                await self._webhook_outbox_repo.defer(event.id, timedelta(seconds=result.deferred_for))
+                continue
+
+            description = f"{event.event_type} {event.uuid} (account {event.account_id}, {event.folder}:{event.uid})"
+            self._webhook_log_writer.add(
+                uuid=event.uuid,
+                app_id=event.app_id,
+                account_id=event.account_id,
+                folder=event.folder,
+                uid=event.uid,
+                webhook_url=result.webhook_url or "",
+                status_code=result.status_code,
+                response_body=result.response_body,
+                attempts=event.attempts,
+                delivered_at=now if result.delivered else None,
+            )
+
+            if result.delivered:
+                self._logger.info(f"Webhook delivered: {description}")
+                completed_ids.append(event.id)
+            elif result.rejected:
+                self._logger.warning(f"Webhook rejected with status {result.status_code}: {description}")
+                completed_ids.append(event.id)
+            elif result.webhook_url is None or self._is_out_of_attempts(event):
+                self._logger.error(f"Webhook delivery failed after {event.attempts} attempts: {description}")
+                await self._webhook_outbox_repo.mark_failed(event.id, result.response_body)
+            else:
+                delay = self._get_retry_delay(event)
+                if result.retry_after is not None:
+                    delay = min(result.retry_after, settings.webhook.retry_max_delay)
+                self._logger.warning(
+                    f"Webhook attempt {event.attempts} failed ({result.status_code or result.response_body}), "
+                    f"retrying in {delay}s: {description}"
+                )
+                await self._webhook_outbox_repo.reschedule(event.id, timedelta(seconds=delay), result.response_body)
+
+        await self._webhook_outbox_repo.complete(completed_ids)
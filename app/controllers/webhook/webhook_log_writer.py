@@ -0,0 +1,128 @@
+import logging
+import time
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from app.repos.webhook_log import WebhookLogRepo
+from settings import settings
+
+
+class WebhookLogWriter:
+    """
+    Buffers webhook delivery logs and writes them to Postgres in bulk, and keeps the webhook_logs partitions.
+
+    Logs are inserted with one multi-row INSERT every `log_flush_interval` seconds or once `log_flush_size` logs are
+    buffered, instead of one commit per delivery attempt. The table is partitioned by month: partitions are created
+    ahead of time and dropped whole once they are older than `log_retention_days`, and a DEFAULT partition catches the
+    logs written outside of them.
+    """
+
+    def __init__(self, webhook_log_repo: WebhookLogRepo) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._webhook_log_repo = webhook_log_repo
+        self._rows: list[dict[str, Any]] = []
+        self._flushed_at = time.monotonic()
+        self._maintained_at: float | None = None
+
+    def add(
+        self,
+        uuid: UUID,
+        app_id: int,
+        account_id: int,
+        folder: str,
+        uid: int,
+        webhook_url: str,
+        status_code: int | None,
+        response_body: str | None,
+        attempts: int,
+        delivered_at: datetime | None,
+    ) -> None:
+        """Buffer the log of a delivery attempt, truncating its response body."""
+        if response_body is not None:
+            response_body = response_body[: settings.webhook.log_max_response_body]
+        self._rows.append(
+            {
+                "uuid": uuid,
+                "app_id": app_id,
+                "account_id": account_id,
+                "folder": folder,
+                "uid": uid,
+                "webhook_url": webhook_url,
+                "status_code": status_code,
+                "response_body": response_body,
+                "attempts": attempts,
+                "delivered_at": delivered_at,
+            }
+        )
+
+    async def flush_if_due(self) -> None:
+        """Flush the buffered logs if enough of them piled up or the flush interval passed."""
+        if (
+            len(self._rows) >= settings.webhook.log_flush_size
+            or time.monotonic() - self._flushed_at >= settings.webhook.log_flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Insert the buffered logs and commit them."""
+        self._flushed_at = time.monotonic()
+        if not self._rows:
+            return
+
+        rows, self._rows = self._rows, []
+        try:
+            size = settings.webhook.log_flush_size
+            for start in range(0, len(rows), size):
+                await self._webhook_log_repo.insert_many(rows[start : start + size])
+            await self._webhook_log_repo.commit()
+        except Exception:
+            self._logger.exception(f"Failed to write {len(rows)} webhook logs")
+            await self._webhook_log_repo.rollback()
+            # Keep them for the next flush, unless the database has been failing for long enough to fill the buffer.
+            self._rows = (rows + self._rows)[-settings.webhook.log_buffer_max :]
+            return
+
+        self._logger.debug(f"Wrote {len(rows)} webhook logs")
+
+    async def maintain_partitions_if_due(self) -> None:
+        """Create the upcoming partitions and drop the expired ones every `log_maintenance_interval` seconds."""
+        now = time.monotonic()
+        if self._maintained_at is not None and now - self._maintained_at < settings.webhook.log_maintenance_interval:
+            return
+        self._maintained_at = now
+
+        try:
+            await self.maintain_partitions()
+        except Exception:
+            self._logger.exception("Failed to maintain webhook log partitions")
+            await self._webhook_log_repo.rollback()
+
+    async def maintain_partitions(self) -> None:
+        """Create the partitions of this month and the next one, and drop the ones past the retention period."""
+        if not await self._webhook_log_repo.try_lock_maintenance():
+            # Another dispatcher is doing it
+            await self._webhook_log_repo.rollback()
+            return
+
+        today = datetime.now(UTC).date()
+        current_month = today.replace(day=1)
+        next_month = self._get_next_month(current_month)
+        existing_months = set(await self._webhook_log_repo.get_partition_months())
+        for month in (current_month, next_month):
+            if month not in existing_months:
+                await self._webhook_log_repo.create_partition(month)
+                self._logger.info(f"Created webhook log partition for {month:%Y-%m}")
+
+        # A partition is dropped once its whole month is older than the retention period.
+        cutoff = today - timedelta(days=settings.webhook.log_retention_days)
+        for month in existing_months:
+            if self._get_next_month(month) <= cutoff:
+                await self._webhook_log_repo.drop_partition(month)
+                self._logger.info(f"Dropped webhook log partition for {month:%Y-%m}")
+
+        await self._webhook_log_repo.commit()
+
+    def _get_next_month(self, month: date) -> date:
+        """Get the first day of the following month."""
+        return (month + timedelta(days=32)).replace(day=1)
@@ -3,7 +3,8 @@ FastAPI application entry point - Nylas-compatible API
 """
 
 import logging
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.openapi.utils import get_openapi
@@ -12,6 +13,7 @@ from fastapi_async_sqlalchemy import SQLAlchemyMiddleware
 
 from app.api.middlewares.auto_commit import AutoCommitMiddleware
 from app.api.routes import api_router
+from app.container import ApplicationContainer
 from app.environment import EnvironmentName
 from app.exceptions import BaseError, ErrorType
 from settings import settings
@@ -49,9 +51,17 @@ def _setup_error_handlers(app: FastAPI) -> None:
         return JSONResponse(status_code=500, content={"error": ErrorType.UNHANDLED_EXCEPTION.value})
 
 
-def create_app() -> FastAPI:
+def create_app(container: ApplicationContainer) -> FastAPI:
     """Create and configure FastAPI application."""
-    app = FastAPI(title="Nolas API", description="Nylas-compatible email API", version="1.0.0")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        yield
+        # Log out of the sessions pooled by the send and message endpoints
+        await container.controllers.smtp_pool().close_all_connections()
+        await container.controllers.imap_connection_manager().close_all_connections()
+
+    app = FastAPI(title="Nolas API", description="Nylas-compatible email API", version="1.0.0", lifespan=lifespan)
 
     # Configure OpenAPI security scheme for Bearer token
     def custom_openapi() -> dict[str, Any]:
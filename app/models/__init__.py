@@ -1,19 +1,30 @@
 from .account import Account
+from .account_lease import AccountLease
 from .app import App
-from .base import Base
+from .base import Base, QueueItem
+from .cluster_node import ClusterNode
 from .connection_health import ConnectionHealth
 from .email import Email
 from .oauth2 import OAuth2AuthorizationRequest
+from .outgoing_message import OutgoingMessage
+from .sent_message_job import SentMessageJob
 from .uid_tracking import UidTracking
 from .webhook_log import WebhookLog
+from .webhook_outbox import WebhookOutbox
 
 __all__ = [
     "Base",
     "Account",
+    "AccountLease",
     "App",
+    "ClusterNode",
     "ConnectionHealth",
     "Email",
     "OAuth2AuthorizationRequest",
+    "OutgoingMessage",
+    "QueueItem",
+    "SentMessageJob",
     "UidTracking",
     "WebhookLog",
+    "WebhookOutbox",
 ]
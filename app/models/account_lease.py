@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AccountLease(Base):
+    """Model for the lease a cluster node holds on an account; only the holder of a live lease watches it."""
+
+    __tablename__ = "account_leases"
+
+    account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, unique=True)
+    node_id: Mapped[str] = mapped_column(sa.String(255), nullable=False, index=True)
+    acquired_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AccountLease(account='{self.account_id}', node='{self.node_id}', expires_at={self.expires_at})>"
@@ -13,3 +13,5 @@ class App(Base, WithUUID, TimestampMixin):
     api_key: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     webhook_url: Mapped[str] = mapped_column(sa.String(255), nullable=True)
     webhook_secret: Mapped[str] = mapped_column(sa.String(255), nullable=True)
+    # Deliver webhooks as JSON arrays of up to WEBHOOK_BATCH_MAX_EVENTS events instead of one request per event
+    webhook_batch_enabled: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, server_default=sa.false())
@@ -31,3 +31,17 @@ class TimestampMixin:
     updated_at: Mapped[datetime] = mapped_column(
         sa.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False
     )
+
+
+class QueueItem(Base):
+    """Base class for the rows of work queues, which workers claim and retry until they are done or given up on."""
+
+    __abstract__ = True
+
+    attempts: Mapped[int] = mapped_column(sa.Integer, default=0, nullable=False)
+    # When the item is due: right away, at a scheduled time, after a failed attempt, or once its claim times out
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ClusterNode(Base):
+    """Model for the IMAP watcher nodes sharing the accounts, kept alive by heartbeats."""
+
+    __tablename__ = "cluster_nodes"
+
+    node_id: Mapped[str] = mapped_column(sa.String(255), nullable=False, unique=True)
+    started_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ClusterNode(node_id='{self.node_id}', expires_at={self.expires_at})>"
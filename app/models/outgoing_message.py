@@ -0,0 +1,22 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import QueueItem, TimestampMixin, WithUUID
+
+
+class OutgoingMessage(QueueItem, TimestampMixin, WithUUID):
+    """Model for messages queued to be sent, first due at their send_at; the uuid is the id reported in the webhooks."""
+
+    __tablename__ = "outgoing_messages"
+
+    app_id: Mapped[int] = mapped_column(sa.ForeignKey("apps.id"), nullable=False)
+    account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, index=True)
+    # The QueuedMessageRequest the message was queued with
+    request_json: Mapped[str] = mapped_column(sa.Text, nullable=False)
+
+    __table_args__ = (
+        sa.Index("ix_outgoing_messages_pending", "next_attempt_at", postgresql_where=sa.text("failed_at IS NULL")),
+    )
+
+    def __repr__(self) -> str:
+        return f"<OutgoingMessage(account='{self.account_id}', uuid='{self.uuid}', attempts={self.attempts})>"
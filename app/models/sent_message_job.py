@@ -0,0 +1,23 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import OID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import QueueItem, TimestampMixin
+
+
+class SentMessageJob(QueueItem, TimestampMixin):
+    """Model for sent messages waiting to be saved to their account's Sent folder."""
+
+    __tablename__ = "sent_message_jobs"
+
+    account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, index=True)
+    email_id: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    # The large object holding the message, which is written and read in chunks instead of as a whole like a bytea
+    message_oid: Mapped[int] = mapped_column(OID, nullable=False)
+
+    __table_args__ = (
+        sa.Index("ix_sent_message_jobs_pending", "next_attempt_at", postgresql_where=sa.text("failed_at IS NULL")),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SentMessageJob(account='{self.account_id}', email_id='{self.email_id}', attempts={self.attempts})>"
@@ -14,6 +14,10 @@ class UidTracking(Base, TimestampMixin):
     account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, index=True)
     folder: Mapped[str] = mapped_column(sa.String(255))
     last_seen_uid: Mapped[int] = mapped_column(sa.BigInteger, default=0, nullable=False)
+    uid_validity: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
+    uid_next: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
+    message_count: Mapped[int | None] = mapped_column(sa.Integer, nullable=True)
+    highest_mod_seq: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
     last_checked_at: Mapped[datetime] = mapped_column(
         sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
     )
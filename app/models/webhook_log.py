@@ -15,6 +15,11 @@ class WebhookLog(Base, TimestampMixin, WithUUID):
 
     __tablename__ = "webhook_logs"
 
+    # The partition key has to be part of the primary key
+    id: Mapped[int] = mapped_column(sa.BigInteger(), primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), primary_key=True, server_default=sa.func.now(), nullable=False
+    )
     app_id: Mapped[int] = mapped_column(sa.ForeignKey("apps.id"), nullable=False, index=True)
     account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, index=True)
     folder: Mapped[str] = mapped_column(sa.String(255), nullable=False)
@@ -27,6 +32,13 @@ class WebhookLog(Base, TimestampMixin, WithUUID):
 
     account: Mapped["Account"] = relationship("Account")
 
+    # Range partitioned by month on created_at, with a DEFAULT partition for logs outside the monthly ones; see
+    # WebhookLogRepo for partition maintenance.
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("id", "created_at", name="webhook_logs_pkey"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
     def __repr__(self) -> str:
         return (
             f"<WebhookLog(app='{self.app_id}', account='{self.account_id}', folder='{self.folder}', uid={self.uid}, "
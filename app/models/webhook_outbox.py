@@ -0,0 +1,28 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import QueueItem, TimestampMixin, WithUUID
+
+
+class WebhookOutbox(QueueItem, TimestampMixin, WithUUID):
+    """Model for webhook events waiting to be delivered; the uuid is the event id and stays the same across retries."""
+
+    __tablename__ = "webhook_outbox"
+
+    app_id: Mapped[int] = mapped_column(sa.ForeignKey("apps.id"), nullable=False)
+    account_id: Mapped[int] = mapped_column(sa.ForeignKey("accounts.id"), nullable=False, index=True)
+    folder: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    uid: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    event_type: Mapped[str] = mapped_column(sa.String(100), nullable=False)
+    # The event's object, serialized once when the event is queued and spliced as is into every delivery attempt
+    object_json: Mapped[str] = mapped_column(sa.Text, nullable=False)
+
+    __table_args__ = (
+        sa.Index("ix_webhook_outbox_pending", "next_attempt_at", postgresql_where=sa.text("failed_at IS NULL")),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<WebhookOutbox(account='{self.account_id}', folder='{self.folder}', uid={self.uid}, "
+            f"type='{self.event_type}', attempts={self.attempts})>"
+        )
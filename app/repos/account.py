@@ -1,9 +1,12 @@
-from typing import cast
+import json
+from datetime import datetime
+from typing import Sequence, cast
 
 from fastapi_async_sqlalchemy import db
-from sqlalchemy import ScalarResult
+from sqlalchemy import ScalarResult, func, select
 from sqlalchemy.orm import selectinload
 
+from app.constants.accounts import ACCOUNT_CHANGES_CHANNEL
 from app.models.account import Account, AccountStatus
 from app.repos.base import BaseRepo
 
@@ -32,8 +35,30 @@ class AccountRepo(BaseRepo[Account]):
         result = await db.session.execute(query)
         return cast(ScalarResult[Account], result.scalars())
 
+    async def get_active_by_ids(self, account_ids: list[int]) -> Sequence[Account]:
+        """Get the accounts with the given IDs that are still active."""
+        query = self.base_stmt.where(Account.id.in_(account_ids), Account.status == AccountStatus.active)
+        query = query.options(selectinload(Account.app))
+        result = await db.session.execute(query)
+        return cast(Sequence[Account], result.scalars().all())
+
     async def mark_as_active(self, account: Account) -> Account:
         """Mark an account as active."""
         account.status = AccountStatus.active
         await db.session.flush()
         return account
+
+    async def get_updated_at_by_ids(self, account_ids: list[int]) -> Sequence[tuple[int, datetime]]:
+        """Get the (id, updated_at) pairs of several accounts without loading them."""
+        result = await db.session.execute(select(Account.id, Account.updated_at).where(Account.id.in_(account_ids)))
+        return cast(Sequence[tuple[int, datetime]], result.all())
+
+    async def notify_changed(self, account: Account) -> None:
+        """
+        Tell the IMAP workers that an account's status or credentials changed.
+
+        The notification is part of the current transaction, so Postgres only delivers it once that is committed.
+        """
+        await db.session.flush()
+        payload = json.dumps({"id": account.id, "status": account.status.value})
+        await db.session.execute(select(func.pg_notify(ACCOUNT_CHANGES_CHANNEL, payload)))
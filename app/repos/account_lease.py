@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import AccountLease
+from app.repos.base import BaseRepo
+
+
+class AccountLeaseRepo(BaseRepo[AccountLease]):
+    """Repository for AccountLease model operations."""
+
+    def __init__(self) -> None:
+        super().__init__(AccountLease)
+
+    async def get_live_owners(self) -> dict[int, str]:
+        """Get the node holding each account with a live lease."""
+        result = await self._db.session.execute(
+            select(AccountLease.account_id, AccountLease.node_id).where(AccountLease.expires_at > func.now())
+        )
+        return {account_id: node_id for account_id, node_id in result.all()}
+
+    async def claim(self, node_id: str, account_ids: list[int], ttl: timedelta) -> set[int]:
+        """
+        Lease accounts to a node for `ttl`, unless another node holds a live lease on them.
+
+        Returns:
+            The IDs of the accounts the node holds afterwards
+        """
+        if not account_ids:
+            return set()
+
+        expires_at = func.now() + ttl
+        stmt = insert(AccountLease).values(
+            [{"account_id": account_id, "node_id": node_id, "expires_at": expires_at} for account_id in account_ids]
+        )
+        upsert = stmt.on_conflict_do_update(
+            index_elements=["account_id"],
+            set_={
+                "node_id": stmt.excluded.node_id,
+                "expires_at": stmt.excluded.expires_at,
+                "acquired_at": func.now(),
+            },
+            where=or_(AccountLease.expires_at <= func.now(), AccountLease.node_id == stmt.excluded.node_id),
+        ).returning(AccountLease.account_id)
+        result = await self._db.session.execute(upsert)
+        claimed = set(result.scalars().all())
+        await self.commit()
+        return claimed
+
+    async def renew(self, node_id: str, ttl: timedelta) -> set[int]:
+        """
+        Extend every lease a node still holds by `ttl`.
+
+        Returns:
+            The IDs of the accounts whose lease was extended
+        """
+        result = await self._db.session.execute(
+            update(AccountLease)
+            .where(AccountLease.node_id == node_id)
+            .values(expires_at=func.now() + ttl)
+            .returning(AccountLease.account_id)
+        )
+        renewed = set(result.scalars().all())
+        await self.commit()
+        return renewed
+
+    async def release(self, node_id: str, account_ids: list[int] | None = None) -> None:
+        """Give up the leases a node holds on some accounts, or on all of them."""
+        stmt = delete(AccountLease).where(AccountLease.node_id == node_id)
+        if account_ids is not None:
+            stmt = stmt.where(AccountLease.account_id.in_(account_ids))
+        await self._db.session.execute(stmt)
+        await self.commit()
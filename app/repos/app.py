@@ -1,3 +1,4 @@
+from typing import Sequence
 from uuid import UUID
 
 from app.models.app import App
@@ -19,3 +20,8 @@ class AppRepo(BaseRepo[App]):
         """Get app by UUID."""
         result = await self.execute(self.base_stmt.where(App.uuid == uuid))
         return result.one_or_none()
+
+    async def get_by_ids(self, app_ids: list[int]) -> Sequence[App]:
+        """Get several apps by ID."""
+        result = await self.execute(self.base_stmt.where(App.id.in_(app_ids)))
+        return result.all()
@@ -1,4 +1,4 @@
-from typing import Any, Generic, Mapping, TypeVar, cast
+from typing import Any, Generic, Mapping, Sequence, TypeVar, cast
 
 from fastapi_async_sqlalchemy import db
 from sqlalchemy import ScalarResult, select
@@ -38,6 +38,16 @@ class BaseRepo(Generic[ModelType]):
         else:
             await self.flush()
 
+    async def add_all(self, models: Sequence[ModelType], commit: bool = False) -> None:
+        """Add several model instances, which are inserted together on flush."""
+        if not models:
+            return
+        self._db.session.add_all(models)
+        if commit:
+            await self.commit()
+        else:
+            await self.flush()
+
     async def update(self, base_obj: ModelType, update_data: Mapping[str, Any], do_commit: bool = True) -> ModelType:
         """Update a model instance."""
         for key, value in update_data.items():
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import ClusterNode
+from app.repos.base import BaseRepo
+
+
+class ClusterNodeRepo(BaseRepo[ClusterNode]):
+    """Repository for ClusterNode model operations."""
+
+    def __init__(self) -> None:
+        super().__init__(ClusterNode)
+
+    async def heartbeat(self, node_id: str, ttl: timedelta) -> None:
+        """Register a node, or keep it alive, for another `ttl` from the database's clock."""
+        stmt = insert(ClusterNode).values(node_id=node_id, expires_at=func.now() + ttl)
+        stmt = stmt.on_conflict_do_update(index_elements=["node_id"], set_={"expires_at": stmt.excluded.expires_at})
+        await self._db.session.execute(stmt)
+        await self.commit()
+
+    async def get_live_node_ids(self) -> list[str]:
+        """Get the IDs of the nodes whose heartbeat hasn't expired."""
+        result = await self._db.session.execute(
+            select(ClusterNode.node_id).where(ClusterNode.expires_at > func.now()).order_by(ClusterNode.node_id)
+        )
+        return list(result.scalars().all())
+
+    async def remove(self, node_id: str) -> None:
+        """Unregister a node that is shutting down."""
+        await self._db.session.execute(delete(ClusterNode).where(ClusterNode.node_id == node_id))
+        await self.commit()
@@ -1,19 +1,29 @@
 from dependency_injector import containers, providers
 
 from app.repos.account import AccountRepo
+from app.repos.account_lease import AccountLeaseRepo
 from app.repos.app import AppRepo
+from app.repos.cluster_node import ClusterNodeRepo
 from app.repos.connection_health import ConnectionHealthRepo
 from app.repos.email import EmailRepo
 from app.repos.oauth2 import OAuth2AuthorizationRequestRepo
+from app.repos.outgoing_message import OutgoingMessageRepo
+from app.repos.sent_message_job import SentMessageJobRepo
 from app.repos.uid_tracking import UidTrackingRepo
 from app.repos.webhook_log import WebhookLogRepo
+from app.repos.webhook_outbox import WebhookOutboxRepo
 
 
 class RepoContainer(containers.DeclarativeContainer):
     app = providers.Singleton(AppRepo)
     account = providers.Singleton(AccountRepo)
+    account_lease = providers.Singleton(AccountLeaseRepo)
+    cluster_node = providers.Singleton(ClusterNodeRepo)
     connection_health = providers.Singleton(ConnectionHealthRepo)
     email = providers.Singleton(EmailRepo)
     oauth2_authorization_request = providers.Singleton(OAuth2AuthorizationRequestRepo)
+    outgoing_message = providers.Singleton(OutgoingMessageRepo)
+    sent_message_job = providers.Singleton(SentMessageJobRepo)
     uid_tracking = providers.Singleton(UidTrackingRepo)
     webhook_log = providers.Singleton(WebhookLogRepo)
+    webhook_outbox = providers.Singleton(WebhookOutboxRepo)
@@ -1,4 +1,7 @@
-from sqlalchemy import and_, or_
+from typing import Sequence
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
 
 from app.models import Email
 from app.repos.base import BaseRepo
@@ -15,6 +18,13 @@ class EmailRepo(BaseRepo[Email]):
         result = await self.execute(self.base_stmt.where(Email.account_id == account_id, Email.email_id == email_id))
         return result.one_or_none()
 
+    async def get_by_account_and_email_ids(self, account_id: int, email_ids: list[str]) -> Sequence[Email]:
+        """Get the emails of an account with any of the given email ids."""
+        if not email_ids:
+            return []
+        result = await self.execute(self.base_stmt.where(Email.account_id == account_id, Email.email_id.in_(email_ids)))
+        return result.all()
+
     async def get_by_account_and_uid_or_email_id(
         self, account_id: int, folder: str, uid: int, email_id: str
     ) -> Email | None:
@@ -26,3 +36,69 @@ class EmailRepo(BaseRepo[Email]):
             )
         )
         return result.one_or_none()
+
+    async def get_all_with_uid_by_account_and_folder(self, account_id: int, folder: str) -> Sequence[Email]:
+        """Get the cached emails of a folder whose UID is known."""
+        result = await self.execute(
+            self.base_stmt.where(Email.account_id == account_id, Email.folder == folder, Email.uid.is_not(None))
+        )
+        return result.all()
+
+    async def upsert_folder_emails(self, account_id: int, folder: str, emails: list[tuple[str, int, str]]) -> None:
+        """
+        Cache the emails seen in a folder with a single INSERT ... ON CONFLICT, moving already known ones.
+
+        Args:
+            account_id: The account of the emails
+            folder: The folder the emails were seen in
+            emails: (email id, uid, thread id) of each email
+        """
+        rows = {email_id: (uid, thread_id) for email_id, uid, thread_id in emails}
+        if not rows:
+            return
+
+        # Any other cached email still claiming one of these UIDs is stale.
+        await self._db.session.execute(
+            update(Email)
+            .where(
+                Email.account_id == account_id,
+                Email.folder == folder,
+                Email.uid.in_([uid for uid, _ in rows.values()]),
+                Email.email_id.not_in(list(rows)),
+            )
+            .values(uid=None)
+        )
+
+        stmt = insert(Email).values(
+            [
+                {"account_id": account_id, "folder": folder, "email_id": email_id, "uid": uid, "thread_id": thread_id}
+                for email_id, (uid, thread_id) in rows.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["account_id", "email_id"],
+            set_={
+                "uid": stmt.excluded.uid,
+                "folder": stmt.excluded.folder,
+                "thread_id": stmt.excluded.thread_id,
+                "updated_at": func.now(),
+            },
+        )
+        await self._db.session.execute(stmt)
+        await self.flush()
+
+    async def clear_folder_uids(self, account_id: int, folder: str) -> None:
+        """Forget the cached UIDs of a folder, e.g. after the server changed its UIDVALIDITY."""
+        await self._db.session.execute(
+            update(Email).where(Email.account_id == account_id, Email.folder == folder).values(uid=None)
+        )
+        await self.flush()
+
+    async def set_sent_copy(self, account_id: int, email_id: str, folder: str, uid: int | None) -> None:
+        """Point a sent email at its copy in the Sent folder, keeping the cached UID when the new one is unknown."""
+        values: dict[str, str | int] = {"folder": folder}
+        if uid is not None:
+            values["uid"] = uid
+        await self._db.session.execute(
+            update(Email).where(Email.account_id == account_id, Email.email_id == email_id).values(**values)
+        )
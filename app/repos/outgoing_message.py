@@ -0,0 +1,9 @@
+from app.models import OutgoingMessage
+from app.repos.queue import QueueRepo
+
+
+class OutgoingMessageRepo(QueueRepo[OutgoingMessage]):
+    """Repository for OutgoingMessage model operations."""
+
+    def __init__(self) -> None:
+        super().__init__(OutgoingMessage)
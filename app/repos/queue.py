@@ -0,0 +1,70 @@
+from datetime import timedelta
+from typing import Sequence, TypeVar, cast
+
+from sqlalchemy import delete, func, select, update
+
+from app.models import QueueItem
+from app.repos.base import BaseRepo
+
+QueueItemType = TypeVar("QueueItemType", bound=QueueItem)
+
+
+class QueueRepo(BaseRepo[QueueItemType]):
+    """Base repository for work queue tables, whose items are claimed by workers with FOR UPDATE SKIP LOCKED."""
+
+    def enqueue(self, items: Sequence[QueueItemType]) -> None:
+        """Queue items; they are inserted with the caller's next flush or commit, in the same transaction."""
+        self._db.session.add_all(items)
+
+    async def claim_due(self, limit: int, claim_timeout: timedelta) -> Sequence[QueueItemType]:
+        """
+        Claim up to `limit` items that are due, skipping the ones other workers are claiming.
+
+        Claimed items are hidden from other workers for `claim_timeout`, after which they are processed again if this
+        worker died before recording their outcome. Every claim counts as an attempt.
+        """
+        model = self._model
+        due_ids = (
+            select(model.id)
+            .where(model.failed_at.is_(None), model.next_attempt_at <= func.now())
+            .order_by(model.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._db.session.execute(
+            update(model)
+            .where(model.id.in_(due_ids.scalar_subquery()))
+            .values(attempts=model.attempts + 1, next_attempt_at=func.now() + claim_timeout)
+            .returning(model)
+            .execution_options(synchronize_session=False)
+        )
+        items = cast(Sequence[QueueItemType], result.scalars().all())
+        await self.commit()
+        return items
+
+    async def complete(self, item_ids: list[int]) -> None:
+        """Remove items that are done or won't be retried."""
+        if item_ids:
+            await self._db.session.execute(delete(self._model).where(self._model.id.in_(item_ids)))
+
+    async def reschedule(self, item_id: int, delay: timedelta, error: str | None) -> None:
+        """Schedule another attempt of an item."""
+        await self._db.session.execute(
+            update(self._model)
+            .where(self._model.id == item_id)
+            .values(next_attempt_at=func.now() + delay, last_error=error)
+        )
+
+    async def defer(self, item_id: int, delay: timedelta) -> None:
+        """Postpone an item without counting its claim as an attempt."""
+        await self._db.session.execute(
+            update(self._model)
+            .where(self._model.id == item_id)
+            .values(attempts=self._model.attempts - 1, next_attempt_at=func.now() + delay)
+        )
+
+    async def mark_failed(self, item_id: int, error: str | None) -> None:
+        """Give up on an item, keeping it for inspection."""
+        await self._db.session.execute(
+            update(self._model).where(self._model.id == item_id).values(failed_at=func.now(), last_error=error)
+        )
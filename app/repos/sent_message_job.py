@@ -0,0 +1,50 @@
+from typing import IO
+
+from sqlalchemy import BigInteger, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import OID
+
+from app.models import SentMessageJob
+from app.repos.queue import QueueRepo
+
+# Size of the chunks messages are copied into their large object in
+_LARGE_OBJECT_CHUNK_SIZE = 1024 * 1024
+
+
+class SentMessageJobRepo(QueueRepo[SentMessageJob]):
+    """Repository for SentMessageJob model operations."""
+
+    def __init__(self) -> None:
+        super().__init__(SentMessageJob)
+
+    async def enqueue_message(self, account_id: int, email_id: str, message: IO[bytes]) -> SentMessageJob:
+        """
+        Queue saving a sent message, which is copied from `message` into a large object chunk by chunk so that it is
+        never held in memory as a whole. Both are inserted when the caller commits, in the same transaction.
+        """
+        message_oid = (await self._db.session.execute(select(func.lo_create(literal(0, OID))))).scalar_one()
+        offset = 0
+        while chunk := message.read(_LARGE_OBJECT_CHUNK_SIZE):
+            await self._db.session.execute(
+                select(func.lo_put(literal(message_oid, OID), literal(offset, BigInteger), chunk))
+            )
+            offset += len(chunk)
+
+        job = SentMessageJob(account_id=account_id, email_id=email_id, message_oid=message_oid)
+        self.enqueue([job])
+        return job
+
+    async def read_message(self, job: SentMessageJob) -> bytes:
+        """Read the message of a job from its large object."""
+        result = await self._db.session.execute(select(func.lo_get(literal(job.message_oid, OID))))
+        return bytes(result.scalar_one())
+
+    async def complete(self, item_ids: list[int]) -> None:
+        """Remove jobs that are done or won't be retried, along with their messages."""
+        if item_ids:
+            deleted = (
+                delete(SentMessageJob)
+                .where(SentMessageJob.id.in_(item_ids))
+                .returning(SentMessageJob.message_oid)
+                .cte("deleted")
+            )
+            await self._db.session.execute(select(func.lo_unlink(deleted.c.message_oid)))
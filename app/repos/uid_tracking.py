@@ -1,3 +1,7 @@
+from typing import Any, Sequence
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.sql import func
 
 from app.models import UidTracking
@@ -10,12 +14,61 @@ class UidTrackingRepo(BaseRepo[UidTracking]):
     def __init__(self) -> None:
         super().__init__(UidTracking)
 
-    async def get_last_seen_uid(self, account_id: int, folder: str) -> int | None:
-        """Get the last seen UID for an account/folder combination."""
+    async def get_by_account_and_folder(self, account_id: int, folder: str) -> UidTracking | None:
+        """Get the UID tracking record for an account/folder combination."""
         result = await self.execute(
             self.base_stmt.where(UidTracking.account_id == account_id, UidTracking.folder == folder)
         )
-        uid_tracking = result.one_or_none()
+        return result.one_or_none()
+
+    async def get_all_by_account(self, account_id: int) -> Sequence[UidTracking]:
+        """Get the UID tracking records of all folders of an account."""
+        result = await self.execute(self.base_stmt.where(UidTracking.account_id == account_id))
+        return result.all()
+
+    async def get_all_by_accounts(self, account_ids: list[int]) -> Sequence[UidTracking]:
+        """Get the UID tracking records of all folders of several accounts."""
+        result = await self.execute(self.base_stmt.where(UidTracking.account_id.in_(account_ids)))
+        return result.all()
+
+    async def count_folders_by_accounts(self, account_ids: list[int]) -> dict[int, int]:
+        """Count the tracked folders of several accounts."""
+        result = await self._db.session.execute(
+            select(UidTracking.account_id, func.count())
+            .where(UidTracking.account_id.in_(account_ids))
+            .group_by(UidTracking.account_id)
+        )
+        return {account_id: count for account_id, count in result.all()}
+
+    async def update_many(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Update several records by primary key in one executemany UPDATE.
+
+        Every row must have the same keys, including `id`. Rows whose record was deleted in the meantime are ignored.
+        The update is committed in a transaction of its own, apart from the changes pending in the session.
+        """
+        if not rows:
+            return
+
+        columns = [key for key in rows[0] if key != "id"]
+        stmt = (
+            update(UidTracking)
+            .where(UidTracking.id == bindparam("row_id"))
+            .values({column: bindparam(column) for column in columns})
+        )
+        params = [{"row_id": row["id"], **{column: row[column] for column in columns}} for row in rows]
+        # Run on a connection of its own rather than the session, which other tasks write through: committing or
+        # rolling back the session would commit or roll back their changes too. Executed through the ORM, an UPDATE
+        # with several parameter sets would also become a bulk UPDATE by primary key, which rejects the WHERE clause
+        # and fails on rows that no longer exist.
+        engine = self._db.session.bind
+        assert isinstance(engine, AsyncEngine)
+        async with engine.begin() as connection:
+            await connection.execute(stmt, params)
+
+    async def get_last_seen_uid(self, account_id: int, folder: str) -> int | None:
+        """Get the last seen UID for an account/folder combination."""
+        uid_tracking = await self.get_by_account_and_folder(account_id, folder)
         return uid_tracking.last_seen_uid if uid_tracking else None
 
     async def update_last_seen_uid(self, account_id: int, folder: str, uid: int) -> UidTracking:
@@ -1,9 +1,99 @@
+import re
+from datetime import UTC, date, datetime
+from typing import Any
+
+from sqlalchemy import func, insert, select, text
+
+from app.constants.webhooks import (
+    WEBHOOK_LOGS_DEFAULT_PARTITION,
+    WEBHOOK_LOGS_MAINTENANCE_LOCK_ID,
+    WEBHOOK_LOGS_PARTITION_PREFIX,
+)
 from app.models import WebhookLog
 from app.repos.base import BaseRepo
 
+_PARTITION_NAME_PATTERN = re.compile(rf"^{WEBHOOK_LOGS_PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
 
 class WebhookLogRepo(BaseRepo[WebhookLog]):
     """Repository for WebhookLog model operations."""
 
     def __init__(self) -> None:
         super().__init__(WebhookLog)
+
+    async def count_since_by_accounts(self, account_ids: list[int], since: datetime) -> dict[int, int]:
+        """Count the webhooks logged for several accounts since a point in time."""
+        result = await self._db.session.execute(
+            select(WebhookLog.account_id, func.count())
+            .where(WebhookLog.account_id.in_(account_ids), WebhookLog.created_at >= since)
+            .group_by(WebhookLog.account_id)
+        )
+        return {account_id: count for account_id, count in result.all()}
+
+    async def insert_many(self, rows: list[dict[str, Any]]) -> None:
+        """Insert several logs with one multi-row INSERT; every row must have the same keys."""
+        if rows:
+            await self._db.session.execute(insert(WebhookLog).values(rows))
+
+    async def try_lock_maintenance(self) -> bool:
+        """Take the partition maintenance lock until the end of the transaction, unless another session holds it."""
+        result = await self._db.session.execute(
+            select(func.pg_try_advisory_xact_lock(WEBHOOK_LOGS_MAINTENANCE_LOCK_ID))
+        )
+        return bool(result.scalar_one())
+
+    async def get_partition_months(self) -> list[date]:
+        """Get the first day of the month of each monthly partition."""
+        result = await self._db.session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :table_name"
+            ),
+            {"table_name": WebhookLog.__tablename__},
+        )
+        months: list[date] = []
+        for (name,) in result.all():
+            match = _PARTITION_NAME_PATTERN.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    async def create_partition(self, month: date) -> None:
+        """
+        Create the partition holding the logs of a month (in UTC).
+
+        Logs of the month that were written to the DEFAULT partition before it existed are moved into it, as Postgres
+        refuses to attach a partition whose range still has rows in the DEFAULT partition.
+        """
+        start = datetime(month.year, month.month, 1, tzinfo=UTC)
+        end = datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=UTC)
+        partition_name = self._get_partition_name(month)
+        table_name = WebhookLog.__tablename__
+        bounds = {"start": start, "end": end}
+        await self._db.session.execute(
+            text(f'CREATE TABLE "{partition_name}" (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        )
+        await self._db.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {WEBHOOK_LOGS_DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f'INSERT INTO "{partition_name}" SELECT * FROM moved'
+            ),
+            bounds,
+        )
+        await self._db.session.execute(
+            text(
+                f'ALTER TABLE {table_name} ATTACH PARTITION "{partition_name}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+    async def drop_partition(self, month: date) -> None:
+        """Drop the partition holding the logs of a month, with all of its logs."""
+        await self._db.session.execute(text(f'DROP TABLE IF EXISTS "{self._get_partition_name(month)}"'))
+
+    def _get_partition_name(self, month: date) -> str:
+        """Get the name of the partition holding the logs of a month."""
+        return f"{WEBHOOK_LOGS_PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
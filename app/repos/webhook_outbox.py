@@ -0,0 +1,9 @@
+from app.models import WebhookOutbox
+from app.repos.queue import QueueRepo
+
+
+class WebhookOutboxRepo(QueueRepo[WebhookOutbox]):
+    """Repository for WebhookOutbox model operations."""
+
+    def __init__(self) -> None:
+        super().__init__(WebhookOutbox)
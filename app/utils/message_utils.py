@@ -5,6 +5,7 @@ from email.utils import getaddresses, mktime_tz, parsedate_tz
 from uuid import UUID
 
 from app.api.payloads.messages import EmailAddress, Message, MessageAttachment
+from app.constants.emails import FLAG_FLAGGED, FLAG_SEEN
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +14,28 @@ class MessageUtils:
     """Utility class for converting IMAP messages to Nylas Message format."""
 
     @staticmethod
-    def convert_to_nylas_format(msg: PythonEmailMessage, grant_id: UUID, folder: str) -> Message:
-        """Convert Python email message to Nylas Message format."""
+    def convert_to_nylas_format(
+        msg: PythonEmailMessage,
+        grant_id: UUID,
+        folder: str,
+        flags: list[str] | None = None,
+        body: str | None = None,
+        attachments: list[MessageAttachment] | None = None,
+    ) -> Message:
+        """
+        Convert Python email message to Nylas Message format.
+
+        Args:
+            msg: The email message to convert
+            grant_id: The UUID of the account the message belongs to
+            folder: The folder the message is in
+            flags: The IMAP flags of the message; when unknown the message is reported as unread and not starred
+            body: The body of the message, if it was fetched separately from `msg` (e.g. when `msg` only has headers)
+            attachments: The attachments of the message, if they were described separately from `msg`
+
+        Returns:
+            The message in Nylas format
+        """
 
         # Extract basic headers
         subject = msg.get("Subject") or ""
@@ -37,15 +58,17 @@ class MessageUtils:
         from_addresses = MessageUtils.parse_addresses(str(from_header) if from_header else "")  # type: ignore
         to_header = msg.get("To")
         to_addresses = MessageUtils.parse_addresses(str(to_header) if to_header else "")  # type: ignore
-        body = MessageUtils.extract_body(msg)
+        if body is None:
+            body = MessageUtils.extract_body(msg)
         references = MessageUtils.parse_references(msg)
         snippet = body[:100] + "..." if len(body) > 100 else body  # Create snippet from body (first 100 chars)
-        attachments = MessageUtils.extract_attachments(msg)
+        if attachments is None:
+            attachments = MessageUtils.extract_attachments(msg)
         folders = [folder]
 
         return Message(
-            starred=False,  # Default to false, could be enhanced with IMAP flags
-            unread=True,  # Default to true, could be enhanced with IMAP flags
+            starred=FLAG_FLAGGED in flags if flags is not None else False,
+            unread=FLAG_SEEN not in flags if flags is not None else True,
             folders=folders,
             grant_id=str(grant_id),
             date=timestamp,
@@ -0,0 +1,73 @@
+import base64
+import uuid
+from email.message import Message as PythonEmailMessage
+from email.mime.base import MIMEBase
+from email.policy import SMTP
+from typing import IO
+
+from app.api.payloads.messages import AttachmentData
+
+# Attachments are left out of the MIME tree as placeholders and streamed in when the message is written. The token is
+# random per process so that a message body can't forge a placeholder.
+_PLACEHOLDER_TOKEN = uuid.uuid4().hex
+# Multiple of 57 bytes, which base64-encode to one full 76 character line each
+_BASE64_CHUNK_SIZE = 57 * 1024
+
+
+class MimeUtils:
+    """Utility class for writing outgoing MIME messages without holding their attachments in memory."""
+
+    @staticmethod
+    def create_attachment_part(attachment: AttachmentData, index: int) -> MIMEBase:
+        """
+        Create the MIME part of an attachment, with a placeholder in place of its content.
+
+        Args:
+            attachment: The attachment
+            index: The position of the attachment among the attachments passed to `write_message`
+
+        Returns:
+            The base64 MIME part of the attachment
+        """
+        maintype, _, subtype = attachment.content_type.partition("/")
+        part = MIMEBase(maintype or "application", subtype or "octet-stream", name=attachment.filename)
+        part.add_header("Content-Disposition", f"attachment; filename={attachment.filename}")
+        part["Content-Transfer-Encoding"] = "base64"
+        part.set_payload(MimeUtils._placeholder(index))
+        return part
+
+    @staticmethod
+    def write_message(message: PythonEmailMessage, attachments: list[AttachmentData], output: IO[bytes]) -> None:
+        """
+        Write a message with CRLF line endings (SMTP policy), base64-encoding its attachments chunk by chunk.
+
+        Args:
+            message: The message, with the attachment parts created by `create_attachment_part`
+            attachments: The attachments, in the order of their indexes
+            output: The file to write the message to
+        """
+        # Without the attachments, the rendered message is just the headers and the body.
+        rendered = message.as_bytes(policy=SMTP)
+        position = 0
+        for index, attachment in enumerate(attachments):
+            placeholder = MimeUtils._placeholder(index).encode()
+            start = rendered.index(placeholder, position)
+            output.write(rendered[position:start])
+            MimeUtils._write_base64(attachment.file, output)
+            position = start + len(placeholder)
+        output.write(rendered[position:])
+
+    @staticmethod
+    def _write_base64(source: IO[bytes], output: IO[bytes]) -> None:
+        """Write the base64 encoding of a file in 76 character lines separated by CRLF, without a final CRLF."""
+        source.seek(0)
+        separator = b""
+        while chunk := source.read(_BASE64_CHUNK_SIZE):
+            encoded = base64.encodebytes(chunk).replace(b"\n", b"\r\n")
+            output.write(separator)
+            output.write(encoded[:-2])
+            separator = b"\r\n"
+
+    @staticmethod
+    def _placeholder(index: int) -> str:
+        return f"nolas-attachment-{_PLACEHOLDER_TOKEN}-{index}"
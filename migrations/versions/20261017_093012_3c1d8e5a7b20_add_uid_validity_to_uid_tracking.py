@@ -0,0 +1,28 @@
+"""add_uid_validity_to_uid_tracking
+
+Revision ID: 3c1d8e5a7b20
+Revises: 91fb69797b0a
+Create Date: 2026-10-17 09:30:12.418233
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d8e5a7b20"
+down_revision: Union[str, Sequence[str], None] = "91fb69797b0a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("uid_tracking", sa.Column("uid_validity", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("uid_tracking", "uid_validity")
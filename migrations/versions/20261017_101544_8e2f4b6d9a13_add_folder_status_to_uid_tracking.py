@@ -0,0 +1,30 @@
+"""add_folder_status_to_uid_tracking
+
+Revision ID: 8e2f4b6d9a13
+Revises: 3c1d8e5a7b20
+Create Date: 2026-10-17 10:15:44.902117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2f4b6d9a13"
+down_revision: Union[str, Sequence[str], None] = "3c1d8e5a7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("uid_tracking", sa.Column("uid_next", sa.BigInteger(), nullable=True))
+    op.add_column("uid_tracking", sa.Column("message_count", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("uid_tracking", "message_count")
+    op.drop_column("uid_tracking", "uid_next")
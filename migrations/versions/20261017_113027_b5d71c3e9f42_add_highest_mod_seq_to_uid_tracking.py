@@ -0,0 +1,28 @@
+"""add_highest_mod_seq_to_uid_tracking
+
+Revision ID: b5d71c3e9f42
+Revises: 8e2f4b6d9a13
+Create Date: 2026-10-17 11:30:27.318644
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d71c3e9f42"
+down_revision: Union[str, Sequence[str], None] = "8e2f4b6d9a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("uid_tracking", sa.Column("highest_mod_seq", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("uid_tracking", "highest_mod_seq")
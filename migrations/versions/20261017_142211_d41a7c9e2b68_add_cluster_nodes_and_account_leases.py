@@ -0,0 +1,52 @@
+"""add_cluster_nodes_and_account_leases
+
+Revision ID: d41a7c9e2b68
+Revises: b5d71c3e9f42
+Create Date: 2026-10-17 14:22:11.527310
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41a7c9e2b68"
+down_revision: Union[str, Sequence[str], None] = "b5d71c3e9f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cluster_nodes",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("node_id", sa.String(length=255), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("node_id"),
+    )
+    op.create_index(op.f("ix_cluster_nodes_expires_at"), "cluster_nodes", ["expires_at"], unique=False)
+    op.create_table(
+        "account_leases",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("node_id", sa.String(length=255), nullable=False),
+        sa.Column("acquired_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("account_id"),
+    )
+    op.create_index(op.f("ix_account_leases_node_id"), "account_leases", ["node_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_account_leases_node_id"), table_name="account_leases")
+    op.drop_table("account_leases")
+    op.drop_index(op.f("ix_cluster_nodes_expires_at"), table_name="cluster_nodes")
+    op.drop_table("cluster_nodes")
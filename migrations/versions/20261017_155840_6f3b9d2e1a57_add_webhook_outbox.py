@@ -0,0 +1,60 @@
+"""add_webhook_outbox
+
+Revision ID: 6f3b9d2e1a57
+Revises: d41a7c9e2b68
+Create Date: 2026-10-17 15:58:40.204913
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "6f3b9d2e1a57"
+down_revision: Union[str, Sequence[str], None] = "d41a7c9e2b68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "webhook_outbox",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("uuid", sa.UUID(), server_default=sa.text("uuid_generate_v4()"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("app_id", sa.BigInteger(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("folder", sa.String(length=255), nullable=False),
+        sa.Column("uid", sa.BigInteger(), nullable=False),
+        sa.Column("event_type", sa.String(length=100), nullable=False),
+        sa.Column("object_data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+        sa.ForeignKeyConstraint(["app_id"], ["apps.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_webhook_outbox_uuid"), "webhook_outbox", ["uuid"], unique=False)
+    op.create_index(op.f("ix_webhook_outbox_account_id"), "webhook_outbox", ["account_id"], unique=False)
+    op.create_index(
+        "ix_webhook_outbox_pending",
+        "webhook_outbox",
+        ["next_attempt_at"],
+        unique=False,
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_webhook_outbox_pending", table_name="webhook_outbox")
+    op.drop_index(op.f("ix_webhook_outbox_account_id"), table_name="webhook_outbox")
+    op.drop_index(op.f("ix_webhook_outbox_uuid"), table_name="webhook_outbox")
+    op.drop_table("webhook_outbox")
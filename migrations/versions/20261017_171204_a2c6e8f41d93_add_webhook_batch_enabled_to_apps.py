@@ -0,0 +1,28 @@
+"""add_webhook_batch_enabled_to_apps
+
+Revision ID: a2c6e8f41d93
+Revises: 6f3b9d2e1a57
+Create Date: 2026-10-17 17:12:04.581237
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a2c6e8f41d93"
+down_revision: Union[str, Sequence[str], None] = "6f3b9d2e1a57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("apps", sa.Column("webhook_batch_enabled", sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("apps", "webhook_batch_enabled")
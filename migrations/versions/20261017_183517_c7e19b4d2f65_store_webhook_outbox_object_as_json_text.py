@@ -0,0 +1,45 @@
+"""store_webhook_outbox_object_as_json_text
+
+Revision ID: c7e19b4d2f65
+Revises: a2c6e8f41d93
+Create Date: 2026-10-17 18:35:17.402815
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e19b4d2f65"
+down_revision: Union[str, Sequence[str], None] = "a2c6e8f41d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "webhook_outbox",
+        "object_data",
+        new_column_name="object_json",
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using="object_data::text",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "webhook_outbox",
+        "object_json",
+        new_column_name="object_data",
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_type=sa.Text(),
+        existing_nullable=False,
+        postgresql_using="object_json::jsonb",
+    )
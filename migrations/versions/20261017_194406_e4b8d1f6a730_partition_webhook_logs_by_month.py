@@ -0,0 +1,122 @@
+"""partition_webhook_logs_by_month
+
+Revision ID: e4b8d1f6a730
+Revises: c7e19b4d2f65
+Create Date: 2026-10-17 19:44:06.117529
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b8d1f6a730"
+down_revision: Union[str, Sequence[str], None] = "c7e19b4d2f65"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    "id, uuid, created_at, updated_at, app_id, account_id, folder, uid, webhook_url, status_code, response_body, "
+    "attempts, delivered_at"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the old table aside, under names that don't clash with the new one, and keep its id sequence.
+    op.execute("ALTER TABLE webhook_logs RENAME TO webhook_logs_unpartitioned")
+    op.execute("ALTER INDEX webhook_logs_pkey RENAME TO webhook_logs_unpartitioned_pkey")
+    op.execute("DROP INDEX ix_webhook_logs_account_id")
+    op.execute("DROP INDEX ix_webhook_logs_app_id")
+    op.execute("ALTER SEQUENCE webhook_logs_id_seq OWNED BY NONE")
+
+    # The partition key has to be part of the primary key.
+    op.execute(
+        """
+        CREATE TABLE webhook_logs (
+            id BIGINT NOT NULL DEFAULT nextval('webhook_logs_id_seq'),
+            uuid UUID NOT NULL DEFAULT uuid_generate_v4(),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            app_id BIGINT NOT NULL REFERENCES apps (id),
+            account_id INTEGER NOT NULL REFERENCES accounts (id),
+            folder VARCHAR(255) NOT NULL,
+            uid BIGINT NOT NULL,
+            webhook_url TEXT NOT NULL,
+            status_code INTEGER,
+            response_body TEXT,
+            attempts INTEGER NOT NULL,
+            delivered_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT webhook_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE webhook_logs_id_seq OWNED BY webhook_logs.id")
+    op.execute("CREATE INDEX ix_webhook_logs_account_id ON webhook_logs (account_id)")
+    op.execute("CREATE INDEX ix_webhook_logs_app_id ON webhook_logs (app_id)")
+
+    # One partition per month (in UTC) from the oldest log to next month; the dispatchers create the later ones.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            month TIMESTAMP;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(created_at) FROM webhook_logs_unpartitioned), now())
+                        AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '1 month',
+                    INTERVAL '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF webhook_logs FOR VALUES FROM (%L) TO (%L)',
+                    'webhook_logs_p' || to_char(month, 'YYYYMM'),
+                    month AT TIME ZONE 'UTC',
+                    (month + INTERVAL '1 month') AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+
+    op.execute(f"INSERT INTO webhook_logs ({_COLUMNS}) SELECT {_COLUMNS} FROM webhook_logs_unpartitioned")
+    op.execute("DROP TABLE webhook_logs_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE webhook_logs RENAME TO webhook_logs_partitioned")
+    op.execute("ALTER INDEX webhook_logs_pkey RENAME TO webhook_logs_partitioned_pkey")
+    op.execute("DROP INDEX ix_webhook_logs_account_id")
+    op.execute("DROP INDEX ix_webhook_logs_app_id")
+    op.execute("ALTER SEQUENCE webhook_logs_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE webhook_logs (
+            id BIGINT NOT NULL DEFAULT nextval('webhook_logs_id_seq'),
+            uuid UUID NOT NULL DEFAULT uuid_generate_v4(),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            app_id BIGINT NOT NULL REFERENCES apps (id),
+            account_id INTEGER NOT NULL REFERENCES accounts (id),
+            folder VARCHAR(255) NOT NULL,
+            uid BIGINT NOT NULL,
+            webhook_url TEXT NOT NULL,
+            status_code INTEGER,
+            response_body TEXT,
+            attempts INTEGER NOT NULL,
+            delivered_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT webhook_logs_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE webhook_logs_id_seq OWNED BY webhook_logs.id")
+    op.execute("CREATE INDEX ix_webhook_logs_account_id ON webhook_logs (account_id)")
+    op.execute("CREATE INDEX ix_webhook_logs_app_id ON webhook_logs (app_id)")
+
+    op.execute(f"INSERT INTO webhook_logs ({_COLUMNS}) SELECT {_COLUMNS} FROM webhook_logs_partitioned")
+    op.execute("DROP TABLE webhook_logs_partitioned")
@@ -0,0 +1,52 @@
+"""add_sent_message_jobs
+
+Revision ID: f19c3a7d5e82
+Revises: e4b8d1f6a730
+Create Date: 2026-10-17 20:53:18.517302
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f19c3a7d5e82"
+down_revision: Union[str, Sequence[str], None] = "e4b8d1f6a730"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "sent_message_jobs",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("email_id", sa.String(length=255), nullable=False),
+        sa.Column("raw_message", sa.LargeBinary(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_sent_message_jobs_account_id"), "sent_message_jobs", ["account_id"], unique=False)
+    op.create_index(
+        "ix_sent_message_jobs_pending",
+        "sent_message_jobs",
+        ["next_attempt_at"],
+        unique=False,
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sent_message_jobs_pending", table_name="sent_message_jobs")
+    op.drop_index(op.f("ix_sent_message_jobs_account_id"), table_name="sent_message_jobs")
+    op.drop_table("sent_message_jobs")
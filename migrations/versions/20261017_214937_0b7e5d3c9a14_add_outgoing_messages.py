@@ -0,0 +1,56 @@
+"""add_outgoing_messages
+
+Revision ID: 0b7e5d3c9a14
+Revises: f19c3a7d5e82
+Create Date: 2026-10-17 21:49:37.662184
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e5d3c9a14"
+down_revision: Union[str, Sequence[str], None] = "f19c3a7d5e82"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "outgoing_messages",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("uuid", sa.UUID(), server_default=sa.text("uuid_generate_v4()"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("app_id", sa.BigInteger(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("request_json", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+        sa.ForeignKeyConstraint(["app_id"], ["apps.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_outgoing_messages_uuid"), "outgoing_messages", ["uuid"], unique=False)
+    op.create_index(op.f("ix_outgoing_messages_account_id"), "outgoing_messages", ["account_id"], unique=False)
+    op.create_index(
+        "ix_outgoing_messages_pending",
+        "outgoing_messages",
+        ["next_attempt_at"],
+        unique=False,
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_outgoing_messages_pending", table_name="outgoing_messages")
+    op.drop_index(op.f("ix_outgoing_messages_account_id"), table_name="outgoing_messages")
+    op.drop_index(op.f("ix_outgoing_messages_uuid"), table_name="outgoing_messages")
+    op.drop_table("outgoing_messages")
@@ -0,0 +1,29 @@
+"""add_webhook_logs_default_partition
+
+Revision ID: 5a2f7c9e1b36
+Revises: 0b7e5d3c9a14
+Create Date: 2026-10-17 23:05:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a2f7c9e1b36"
+down_revision: Union[str, Sequence[str], None] = "0b7e5d3c9a14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Without it, inserting a log outside the monthly partitions fails, and with it the whole batch being flushed.
+    op.execute("CREATE TABLE webhook_logs_default PARTITION OF webhook_logs DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The logs outside the monthly partitions are dropped with it.
+    op.execute("DROP TABLE webhook_logs_default")
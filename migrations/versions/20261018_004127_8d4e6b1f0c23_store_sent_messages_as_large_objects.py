@@ -0,0 +1,36 @@
+"""store_sent_messages_as_large_objects
+
+Revision ID: 8d4e6b1f0c23
+Revises: 5a2f7c9e1b36
+Create Date: 2026-10-18 00:41:27.602914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4e6b1f0c23"
+down_revision: Union[str, Sequence[str], None] = "5a2f7c9e1b36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("sent_message_jobs", sa.Column("message_oid", postgresql.OID(), nullable=True))
+    op.execute("UPDATE sent_message_jobs SET message_oid = lo_from_bytea(0, raw_message)")
+    op.alter_column("sent_message_jobs", "message_oid", nullable=False)
+    op.drop_column("sent_message_jobs", "raw_message")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("sent_message_jobs", sa.Column("raw_message", sa.LargeBinary(), nullable=True))
+    op.execute("UPDATE sent_message_jobs SET raw_message = lo_get(message_oid)")
+    op.execute("SELECT lo_unlink(message_oid) FROM sent_message_jobs")
+    op.alter_column("sent_message_jobs", "raw_message", nullable=False)
+    op.drop_column("sent_message_jobs", "message_oid")
@@ -27,6 +27,12 @@ class SentrySettings(BaseSettings):
 class WorkerSettings(BaseSettings):
     num_workers: int = Field(alias="WORKERS_NUM", default=2)
     max_connections_per_provider: int = Field(alias="WORKER_MAX_CONNECTIONS_PER_PROVIDER", default=50)
+    rebalance_interval: int = Field(alias="WORKER_REBALANCE_INTERVAL", default=60)
+    max_restarts: int = Field(alias="WORKER_MAX_RESTARTS", default=3)
+    restart_window: int = Field(alias="WORKER_RESTART_WINDOW", default=600)
+    sharding_enabled: bool = Field(alias="WORKER_SHARDING_ENABLED", default=False)
+    node_id: str = Field(alias="WORKER_NODE_ID", default="")
+    lease_ttl: int = Field(alias="WORKER_LEASE_TTL", default=90)
 
 
 class IMAPSettings(BaseSettings):
@@ -34,11 +40,73 @@ class IMAPSettings(BaseSettings):
     poll_interval: int = Field(alias="IMAP_POLL_INTERVAL", default=60)
     poll_jitter_max: int = Field(alias="IMAP_POLL_JITTER", default=30)
     listener_mode: str = Field(alias="IMAP_LISTENER_MODE", default="single")
+    watch_mode: str = Field(alias="IMAP_WATCH_MODE", default="poll")
+    idle_refresh_interval: int = Field(alias="IMAP_IDLE_REFRESH_INTERVAL", default=29 * 60)
+    pool_max_idle_per_account: int = Field(alias="IMAP_POOL_MAX_IDLE_PER_ACCOUNT", default=2)
+    pool_max_idle_time: int = Field(alias="IMAP_POOL_MAX_IDLE_TIME", default=600)
+    pool_keepalive_interval: int = Field(alias="IMAP_POOL_KEEPALIVE_INTERVAL", default=240)
+    pool_health_check_after: int = Field(alias="IMAP_POOL_HEALTH_CHECK_AFTER", default=30)
+    sync_flag_changes: bool = Field(alias="IMAP_SYNC_FLAG_CHANGES", default=True)
+    fetch_mode: str = Field(alias="IMAP_FETCH_MODE", default="full")
+    fetch_batch_size: int = Field(alias="IMAP_FETCH_BATCH_SIZE", default=50)
+    fetch_batch_max_bytes: int = Field(alias="IMAP_FETCH_BATCH_MAX_BYTES", default=25 * 1024 * 1024)
+    uid_flush_interval: int = Field(alias="IMAP_UID_FLUSH_INTERVAL", default=30)
+    account_reconcile_interval: int = Field(alias="IMAP_ACCOUNT_RECONCILE_INTERVAL", default=300)
+
+
+class SMTPSettings(BaseSettings):
+    timeout: int = Field(alias="SMTP_TIMEOUT", default=30)
+    max_connections_per_host: int = Field(alias="SMTP_MAX_CONNECTIONS_PER_HOST", default=10)
+    pool_max_idle_per_account: int = Field(alias="SMTP_POOL_MAX_IDLE_PER_ACCOUNT", default=2)
+    pool_max_idle_time: int = Field(alias="SMTP_POOL_MAX_IDLE_TIME", default=60)
+    send_max_request_size: int = Field(alias="SMTP_SEND_MAX_REQUEST_SIZE", default=35 * 1024 * 1024)
+    send_max_in_flight_bytes: int = Field(alias="SMTP_SEND_MAX_IN_FLIGHT_BYTES", default=256 * 1024 * 1024)
+    spool_max_memory: int = Field(alias="SMTP_SPOOL_MAX_MEMORY", default=1024 * 1024)
+    sent_save_claim_size: int = Field(alias="SMTP_SENT_SAVE_CLAIM_SIZE", default=50)
+    sent_save_claim_timeout: int = Field(alias="SMTP_SENT_SAVE_CLAIM_TIMEOUT", default=300)
+    sent_save_max_attempts: int = Field(alias="SMTP_SENT_SAVE_MAX_ATTEMPTS", default=8)
+    sent_save_retry_base_delay: int = Field(alias="SMTP_SENT_SAVE_RETRY_BASE_DELAY", default=30)
+    sent_save_retry_max_delay: int = Field(alias="SMTP_SENT_SAVE_RETRY_MAX_DELAY", default=3600)
+    sent_save_poll_interval: float = Field(alias="SMTP_SENT_SAVE_POLL_INTERVAL", default=1.0)
+    sent_folder_cache_ttl: int = Field(alias="SMTP_SENT_FOLDER_CACHE_TTL", default=3600)
+    send_batch_max_messages: int = Field(alias="SMTP_SEND_BATCH_MAX_MESSAGES", default=100)
+    send_queue_claim_size: int = Field(alias="SMTP_SEND_QUEUE_CLAIM_SIZE", default=200)
+    send_queue_claim_timeout: int = Field(alias="SMTP_SEND_QUEUE_CLAIM_TIMEOUT", default=900)
+    send_queue_concurrency: int = Field(alias="SMTP_SEND_QUEUE_CONCURRENCY", default=20)
+    send_queue_max_attempts: int = Field(alias="SMTP_SEND_QUEUE_MAX_ATTEMPTS", default=5)
+    send_queue_retry_base_delay: int = Field(alias="SMTP_SEND_QUEUE_RETRY_BASE_DELAY", default=60)
+    send_queue_retry_max_delay: int = Field(alias="SMTP_SEND_QUEUE_RETRY_MAX_DELAY", default=3600)
+    send_queue_poll_interval: float = Field(alias="SMTP_SEND_QUEUE_POLL_INTERVAL", default=1.0)
+    # Enforced by each send queue worker on its own: N workers send up to N times this rate to a host
+    send_rate_per_host_per_worker: float = Field(alias="SMTP_SEND_RATE_PER_HOST_PER_WORKER", default=10.0)
 
 
 class WebhookSettings(BaseSettings):
-    max_retries: int = Field(alias="WEBHOOK_MAX_RETRIES", default=3)
     timeout: int = Field(alias="WEBHOOK_TIMEOUT", default=10)
+    max_attempts: int = Field(alias="WEBHOOK_MAX_ATTEMPTS", default=12)
+    retry_base_delay: int = Field(alias="WEBHOOK_RETRY_BASE_DELAY", default=10)
+    retry_max_delay: int = Field(alias="WEBHOOK_RETRY_MAX_DELAY", default=3600)
+    claim_timeout: int = Field(alias="WEBHOOK_CLAIM_TIMEOUT", default=120)
+    dispatcher_claim_size: int = Field(alias="WEBHOOK_DISPATCHER_CLAIM_SIZE", default=100)
+    dispatcher_concurrency: int = Field(alias="WEBHOOK_DISPATCHER_CONCURRENCY", default=20)
+    dispatcher_poll_interval: float = Field(alias="WEBHOOK_DISPATCHER_POLL_INTERVAL", default=1.0)
+    endpoint_max_in_flight: int = Field(alias="WEBHOOK_ENDPOINT_MAX_IN_FLIGHT", default=10)
+    endpoint_rate: float = Field(alias="WEBHOOK_ENDPOINT_RATE", default=20.0)
+    circuit_failure_threshold: int = Field(alias="WEBHOOK_CIRCUIT_FAILURE_THRESHOLD", default=5)
+    circuit_open_seconds: int = Field(alias="WEBHOOK_CIRCUIT_OPEN_SECONDS", default=30)
+    batch_max_events: int = Field(alias="WEBHOOK_BATCH_MAX_EVENTS", default=100)
+    batch_window: float = Field(alias="WEBHOOK_BATCH_WINDOW", default=0.25)
+    connector_limit: int = Field(alias="WEBHOOK_CONNECTOR_LIMIT", default=100)
+    connector_limit_per_host: int = Field(alias="WEBHOOK_CONNECTOR_LIMIT_PER_HOST", default=20)
+    keepalive_timeout: float = Field(alias="WEBHOOK_KEEPALIVE_TIMEOUT", default=30.0)
+    dns_cache_ttl: int = Field(alias="WEBHOOK_DNS_CACHE_TTL", default=300)
+    connection_stats_interval: int = Field(alias="WEBHOOK_CONNECTION_STATS_INTERVAL", default=60)
+    log_flush_interval: float = Field(alias="WEBHOOK_LOG_FLUSH_INTERVAL", default=5.0)
+    log_flush_size: int = Field(alias="WEBHOOK_LOG_FLUSH_SIZE", default=500)
+    log_buffer_max: int = Field(alias="WEBHOOK_LOG_BUFFER_MAX", default=10000)
+    log_max_response_body: int = Field(alias="WEBHOOK_LOG_MAX_RESPONSE_BODY", default=2048)
+    log_retention_days: int = Field(alias="WEBHOOK_LOG_RETENTION_DAYS", default=30)
+    log_maintenance_interval: int = Field(alias="WEBHOOK_LOG_MAINTENANCE_INTERVAL", default=3600)
 
 
 class Settings(BaseSettings):
@@ -51,6 +119,7 @@ class Settings(BaseSettings):
     imap: IMAPSettings = Field(default_factory=IMAPSettings)
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
     sentry: SentrySettings = Field(default_factory=SentrySettings)
+    smtp: SMTPSettings = Field(default_factory=SMTPSettings)
     worker: WorkerSettings = Field(default_factory=WorkerSettings)
     webhook: WebhookSettings = Field(default_factory=WebhookSettings)
 
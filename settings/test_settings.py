@@ -5,3 +5,5 @@ from unittest.mock import Mock
 class TestSettings(Mock):
     environment = "test"
     logging = Mock(level=logging.INFO)
+    # A valid Fernet key, as app.utils.password builds its cipher at import time
+    password_encryption_key = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA="
@@ -0,0 +1,4 @@
+import os
+
+# Use the mocked settings from settings/test_settings.py instead of reading them from the environment.
+os.environ.setdefault("LEV_ENV", "test")
@@ -0,0 +1,67 @@
+import email
+import io
+import os
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytest
+
+from app.api.payloads.messages import AttachmentData
+from app.utils import mime_utils
+from app.utils.mime_utils import MimeUtils
+
+
+def _attachment(filename: str, content: bytes, content_type: str = "application/octet-stream") -> AttachmentData:
+    return AttachmentData(filename=filename, content_type=content_type, size=len(content), file=io.BytesIO(content))
+
+
+def _write(attachments: list[AttachmentData]) -> bytes:
+    message = MIMEMultipart("mixed")
+    message["Subject"] = "Report"
+    message.attach(MIMEText("<p>See attached</p>", "html", "utf-8"))
+    for index, attachment in enumerate(attachments):
+        message.attach(MimeUtils.create_attachment_part(attachment, index))
+
+    output = io.BytesIO()
+    MimeUtils.write_message(message, attachments, output)
+    return output.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def small_base64_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Two 76 character lines per chunk, so that the attachments below span several chunks
+    monkeypatch.setattr(mime_utils, "_BASE64_CHUNK_SIZE", 57 * 2)
+
+
+def test_write_message_round_trips_attachments_encoded_in_chunks() -> None:
+    contents = [os.urandom(57 * 5), os.urandom(57 * 4 + 13), b"", b"x"]
+    attachments = [_attachment(f"file{index}.bin", content) for index, content in enumerate(contents)]
+
+    raw_message = _write(attachments)
+
+    parsed = email.message_from_bytes(raw_message)
+    parts = [part for part in parsed.walk() if part.get_filename()]
+    assert [part.get_filename() for part in parts] == [attachment.filename for attachment in attachments]
+    assert [part.get_payload(decode=True) for part in parts] == contents
+    assert b"nolas-attachment-" not in raw_message
+
+
+def test_write_message_uses_crlf_and_full_base64_lines() -> None:
+    content = os.urandom(57 * 7 + 5)
+
+    raw_message = _write([_attachment("data.bin", content)])
+
+    assert raw_message.count(b"\n") == raw_message.count(b"\r\n")
+    headers_end = raw_message.index(b"\r\n\r\n", raw_message.index(b"filename=data.bin")) + 4
+    encoded = raw_message[headers_end : raw_message.index(b"\r\n--", headers_end)]
+    lines = encoded.split(b"\r\n")
+    assert all(len(line) == 76 for line in lines[:-1])
+    assert 0 < len(lines[-1]) <= 76
+
+
+def test_write_base64_writes_nothing_for_an_empty_file() -> None:
+    output = io.BytesIO()
+
+    MimeUtils._write_base64(io.BytesIO(b""), output)
+
+    assert output.getvalue() == b""
@@ -0,0 +1,117 @@
+from aioimaplib import Response
+
+from app.controllers.imap.response_parser import ResponseParser
+
+
+def _response(*lines: bytes) -> Response:
+    return Response("OK", [*lines, b"FETCH completed"])
+
+
+def test_parse_fetch_response_reads_atoms_lists_and_quoted_strings() -> None:
+    response = _response(
+        b'12 FETCH (UID 345 FLAGS (\\Seen \\Flagged) MODSEQ (678) INTERNALDATE "17-Oct-2026 10:00:00")'
+    )
+
+    [item] = ResponseParser.parse_fetch_response(response)
+
+    assert item.sequence_number == 12
+    assert item.uid == 345
+    assert item.flags == ["\\Seen", "\\Flagged"]
+    assert item.get_int("MODSEQ") == 678
+    assert item.get_bytes("INTERNALDATE") == b"17-Oct-2026 10:00:00"
+
+
+def test_parse_fetch_response_reads_literals_of_several_messages() -> None:
+    header = b"Subject: Hi (there)\r\nMessage-ID: <a@b>\r\n\r\n"
+    response = _response(
+        b"1 FETCH (UID 10 BODY[HEADER] {%d}" % len(header),
+        header,
+        b" FLAGS ())",
+        b"2 FETCH (UID 11 BODY[HEADER] {3}",
+        b'a"b',
+        b")",
+    )
+
+    first, second = ResponseParser.parse_fetch_response(response)
+
+    assert (first.uid, first.get_bytes("BODY[HEADER]"), first.flags) == (10, header, [])
+    assert (second.uid, second.get_bytes("BODY[HEADER]")) == (11, b'a"b')
+
+
+def test_parse_fetch_response_keeps_escaped_quotes_and_nil() -> None:
+    response = _response(b'3 FETCH (UID 7 X-NAME "say \\"hi\\"" X-EMPTY NIL)')
+
+    [item] = ResponseParser.parse_fetch_response(response)
+
+    assert item.get_bytes("X-NAME") == b'say "hi"'
+    assert item.attributes["X-EMPTY"] is None
+
+
+def test_parse_fetch_response_skips_untagged_lines_before_fetch_data() -> None:
+    response = _response(b"* 5 EXISTS", b"4 FETCH (UID 9)")
+
+    [item] = ResponseParser.parse_fetch_response(response)
+
+    assert (item.sequence_number, item.uid) == (4, 9)
+
+
+def test_parse_vanished_response() -> None:
+    response = Response("OK", [b"VANISHED (EARLIER) 41,43:45,50:48", b"1 FETCH (UID 1)", b"done"])
+
+    assert ResponseParser.parse_vanished_response(response) == [(41, 41), (43, 45), (48, 50)]
+
+
+def test_parse_uid_set_ignores_invalid_parts() -> None:
+    assert ResponseParser.parse_uid_set("1,x,3:*,5:6") == [(1, 1), (5, 6)]
+
+
+def test_format_uid_set_round_trips() -> None:
+    uids = [7, 1, 2, 3, 3, 10, 11, 20]
+
+    uid_set = ResponseParser.format_uid_set(uids)
+
+    assert uid_set == "1:3,7,10:11,20"
+    assert ResponseParser.parse_uid_set(uid_set) == [(1, 3), (7, 7), (10, 11), (20, 20)]
+
+
+def test_parse_body_structure_numbers_nested_parts() -> None:
+    response = _response(
+        b'1 FETCH (UID 1 BODYSTRUCTURE ((("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 10 1 NIL NIL NIL)'
+        b'("text" "html" ("charset" "utf-8") NIL NIL "quoted-printable" 20 1 NIL NIL NIL) "alternative")'
+        b'("application" "pdf" ("name" "a.pdf") NIL NIL "base64" 78 NIL ("attachment" ("filename" "report.pdf"))'
+        b' NIL) "mixed"))'
+    )
+
+    [item] = ResponseParser.parse_fetch_response(response)
+    parts = ResponseParser.parse_body_structure(item.attributes["BODYSTRUCTURE"])
+
+    assert [(part.section, part.content_type) for part in parts] == [
+        ("1.1", "text/plain"),
+        ("1.2", "text/html"),
+        ("2", "application/pdf"),
+    ]
+    assert parts[0].charset == "utf-8"
+    assert parts[1].encoding == "quoted-printable"
+    assert (parts[2].disposition, parts[2].filename, parts[2].decoded_size) == ("attachment", "report.pdf", 57)
+
+
+def test_parse_body_structure_of_single_part_message() -> None:
+    response = _response(b'1 FETCH (BODYSTRUCTURE ("text" "plain" NIL NIL NIL "7bit" 5 1 NIL NIL NIL))')
+
+    [item] = ResponseParser.parse_fetch_response(response)
+    [part] = ResponseParser.parse_body_structure(item.attributes["BODYSTRUCTURE"])
+
+    assert (part.section, part.content_type, part.size, part.parameters) == ("1", "text/plain", 5, {})
+
+
+def test_parse_body_structure_decodes_rfc2231_and_rfc2047_parameters() -> None:
+    response = _response(
+        b'1 FETCH (BODYSTRUCTURE ("application" "octet-stream" ("name" "=?UTF-8?B?w6lkw6kudHh0?=") NIL NIL "base64" 4'
+        b' NIL ("attachment" ("filename*0*" "utf-8\'\'%C3%A9t" "filename*1" "e.txt")) NIL))'
+    )
+
+    [item] = ResponseParser.parse_fetch_response(response)
+    [part] = ResponseParser.parse_body_structure(item.attributes["BODYSTRUCTURE"])
+
+    assert part.parameters["name"] == "édé.txt"
+    assert part.filename == "éte.txt"
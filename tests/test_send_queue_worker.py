@@ -0,0 +1,40 @@
+import pytest
+
+from app.controllers.smtp.send_queue_worker import SendQueueWorker
+from app.controllers.smtp.smtp_client import SMTPClientError
+from app.controllers.smtp.smtp_controller import SMTPConfigurationError, SMTPException, SMTPInvalidParameterError
+
+
+def _wrapped(error: Exception) -> SMTPException:
+    """Wrap an error the way SMTPController reports failed sends."""
+    try:
+        raise SMTPException(f"Failed to send email: {error}") from error
+    except SMTPException as e:
+        return e
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        SMTPInvalidParameterError("reply_to_message_id", "missing"),
+        SMTPConfigurationError("SMTP host and port are required"),
+        _wrapped(SMTPClientError("Recipient rejected", 550)),
+        _wrapped(SMTPClientError("Authentication failed", 535)),
+    ],
+)
+def test_is_permanent_error_gives_up_on_invalid_messages_and_5xx_replies(error: Exception) -> None:
+    assert SendQueueWorker._is_permanent_error(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _wrapped(SMTPClientError("Try again later", 421)),
+        _wrapped(SMTPClientError("Mailbox busy", 451)),
+        _wrapped(SMTPClientError("Connection closed by smtp.example.com")),
+        _wrapped(ConnectionResetError()),
+        ValueError("Unexpected"),
+    ],
+)
+def test_is_permanent_error_retries_transient_failures(error: Exception) -> None:
+    assert not SendQueueWorker._is_permanent_error(error)
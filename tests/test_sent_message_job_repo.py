@@ -0,0 +1,30 @@
+import io
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.repos import sent_message_job
+from app.repos.sent_message_job import SentMessageJobRepo
+
+
+@pytest.mark.asyncio
+async def test_enqueue_message_copies_the_message_into_a_large_object_in_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sent_message_job, "_LARGE_OBJECT_CHUNK_SIZE", 4)
+    repo = SentMessageJobRepo()
+    session = Mock(execute=AsyncMock(return_value=Mock(scalar_one=Mock(return_value=1234))))
+    repo._db = Mock(session=session)
+
+    job = await repo.enqueue_message(10, "<a@b>", io.BytesIO(b"Subject: Hi\r\n"))
+
+    statements = [call.args[0].compile() for call in session.execute.await_args_list]
+    assert [str(statement).split("(")[0] for statement in statements] == ["SELECT lo_create"] + ["SELECT lo_put"] * 4
+    assert [list(statement.params.values())[1:] for statement in statements[1:]] == [
+        [0, b"Subj"],
+        [4, b"ect:"],
+        [8, b" Hi\r"],
+        [12, b"\n"],
+    ]
+    assert (job.account_id, job.email_id, job.message_oid) == (10, "<a@b>", 1234)
+    session.add_all.assert_called_once_with([job])
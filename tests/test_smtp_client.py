@@ -0,0 +1,110 @@
+import asyncio
+import io
+
+import pytest
+
+from app.controllers.smtp import smtp_client
+from app.controllers.smtp.smtp_client import SMTPClient
+from settings import settings
+
+
+class _FakeWriter:
+    """Collects what the client writes instead of sending it."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def is_closing(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+async def _send(message: bytes) -> bytes:
+    """Send a message to a fake server that accepts it, and return what was written after DATA."""
+    client = SMTPClient("smtp.example.com", 587)
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"250 OK\r\n250 OK\r\n354 Go ahead\r\n250 Queued\r\n")
+    writer = _FakeWriter()
+    client._reader = reader
+    client._writer = writer  # type: ignore[assignment]
+
+    await client.send_message("from@example.com", ["to@example.com"], io.BytesIO(message))
+
+    commands, _, data = bytes(writer.data).partition(b"DATA\r\n")
+    assert commands == b"MAIL FROM:<from@example.com>\r\nRCPT TO:<to@example.com>\r\n"
+    return data
+
+
+def _unstuff(data: bytes) -> bytes:
+    """Undo the dot-stuffing of DATA, as the server does, and drop the terminating line."""
+    assert data.endswith(b"\r\n.\r\n")
+    lines = data[: -len(b".\r\n")].split(b"\r\n")
+    return b"\r\n".join(line[1:] if line.startswith(b".") else line for line in lines)
+
+
+@pytest.fixture(autouse=True)
+def small_data_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings.smtp, "timeout", 5)
+    # Small chunks, so that line breaks and leading dots land on chunk boundaries
+    monkeypatch.setattr(smtp_client, "_DATA_CHUNK_SIZE", 4)
+
+
+def test_encode_data_normalizes_line_endings_to_crlf() -> None:
+    client = SMTPClient("smtp.example.com", 587)
+
+    assert client._encode_data(b"a\nb\rc\r\nd\n") == b"a\r\nb\r\nc\r\nd\r\n"
+
+
+def test_encode_data_dot_stuffs_lines_starting_with_a_dot() -> None:
+    client = SMTPClient("smtp.example.com", 587)
+
+    assert client._encode_data(b".a\r\nb\r\n..c\n.\r\n") == b"..a\r\nb\r\n...c\r\n..\r\n"
+
+
+def test_encode_data_returns_clean_chunks_as_is() -> None:
+    client = SMTPClient("smtp.example.com", 587)
+    data = b"Subject: Hi\r\n\r\nHello.\r\n"
+
+    assert client._encode_data(data) is data
+
+
+@pytest.mark.asyncio
+async def test_send_message_dot_stuffs_across_chunk_boundaries() -> None:
+    message = b"abc\r\n.def\r\n.\r\nx\r\n..y\r\n"
+
+    data = await _send(message)
+
+    assert data == b"abc\r\n..def\r\n..\r\nx\r\n...y\r\n.\r\n"
+    assert _unstuff(data) == message
+
+
+@pytest.mark.asyncio
+async def test_send_message_normalizes_line_breaks_split_across_chunks() -> None:
+    data = await _send(b"abc\r\ndef\nghi\rjkl\n")
+
+    assert data == b"abc\r\ndef\r\nghi\r\njkl\r\n.\r\n"
+
+
+@pytest.mark.asyncio
+async def test_send_message_ends_a_message_without_a_final_line_break() -> None:
+    data = await _send(b"abc\r\n.de")
+
+    assert data == b"abc\r\n..de\r\n.\r\n"
+
+
+@pytest.mark.asyncio
+async def test_send_message_round_trips_a_large_message() -> None:
+    message = b"".join(b"%s line %d\r\n" % (b"." * (i % 3), i) for i in range(500))
+
+    data = await _send(message)
+
+    assert data.count(b"\n") == data.count(b"\r\n")
+    assert _unstuff(data) == message
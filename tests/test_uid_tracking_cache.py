@@ -0,0 +1,40 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.controllers.imap.uid_tracking_cache import FolderState, UidTrackingCache
+
+
+def _cache(uid_tracking_repo: Mock) -> tuple[UidTrackingCache, FolderState]:
+    cache = UidTrackingCache(uid_tracking_repo)
+    state = FolderState(id=1, account_id=10, folder="INBOX", last_seen_uid=100)
+    cache._states[10] = {"INBOX": state}
+    return cache, state
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_changed_states_once() -> None:
+    uid_tracking_repo = Mock(update_many=AsyncMock(), rollback=AsyncMock())
+    cache, state = _cache(uid_tracking_repo)
+    cache.advance_last_seen_uid(state, 120)
+
+    await cache.flush()
+    await cache.flush()
+
+    uid_tracking_repo.update_many.assert_awaited_once()
+    [rows] = uid_tracking_repo.update_many.await_args.args
+    assert [(row["id"], row["last_seen_uid"]) for row in rows] == [(1, 120)]
+    assert not state.dirty
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_changes_without_rolling_back_the_session() -> None:
+    uid_tracking_repo = Mock(update_many=AsyncMock(side_effect=ConnectionError()), rollback=AsyncMock())
+    cache, state = _cache(uid_tracking_repo)
+    cache.advance_last_seen_uid(state, 120)
+
+    with pytest.raises(ConnectionError):
+        await cache.flush()
+
+    assert state.dirty
+    uid_tracking_repo.rollback.assert_not_awaited()
@@ -0,0 +1,121 @@
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.controllers.webhook.webhook_dispatcher import WebhookDispatcher, _DeliveryResult
+from settings import settings
+
+_WEBHOOK_URL = "https://example.com/webhook"
+
+
+@pytest.fixture(autouse=True)
+def webhook_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name, value in {
+        "timeout": 10,
+        "claim_timeout": 120,
+        "dispatcher_claim_size": 100,
+        "dispatcher_concurrency": 10,
+        "dispatcher_poll_interval": 1.0,
+        "max_attempts": 3,
+        "retry_base_delay": 10,
+        "retry_max_delay": 3600,
+        "endpoint_max_in_flight": 1,
+        "endpoint_rate": 100.0,
+        "circuit_open_seconds": 30,
+        "circuit_failure_threshold": 1,
+    }.items():
+        monkeypatch.setattr(settings.webhook, name, value)
+
+
+def _dispatcher() -> WebhookDispatcher:
+    dispatcher = WebhookDispatcher(Mock(), Mock(), Mock())
+    dispatcher._http_session = Mock()
+    return dispatcher
+
+
+def _app() -> Mock:
+    return Mock(webhook_url=_WEBHOOK_URL, webhook_batch_enabled=False, webhook_secret=None, uuid=uuid.uuid4())
+
+
+def _event() -> Mock:
+    return Mock(uuid=uuid.uuid4(), event_type="message.created", created_at=datetime.now(UTC), attempts=1)
+
+
+@pytest.mark.asyncio
+async def test_deliver_gives_up_the_probe_of_a_request_released_at_the_deadline(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    dispatcher = _dispatcher()
+    guard = dispatcher._get_endpoint_guard(_WEBHOOK_URL)
+    guard.record_failure()
+    # The circuit is half-open: the next request probes the endpoint
+    monkeypatch.setattr(settings.webhook, "circuit_open_seconds", 0)
+
+    [result] = await dispatcher._deliver([_event()], _app(), deadline=time.monotonic() - 1)
+
+    assert result.deferred_for == 0
+    assert guard.is_open
+    assert guard.retry_after() is None
+
+
+def _result(status_code: int | None, retry_after: float | None = None) -> _DeliveryResult:
+    return _DeliveryResult(event=_event(), webhook_url=_WEBHOOK_URL, status_code=status_code, retry_after=retry_after)
+
+
+@pytest.mark.parametrize("status_code", [200, 201, 202, 204])
+def test_any_2xx_response_is_delivered(status_code: int) -> None:
+    result = _result(status_code)
+
+    assert result.delivered
+    assert not result.endpoint_failed
+
+
+@pytest.mark.parametrize("status_code", [408, 429])
+def test_throttling_responses_are_retried_and_count_against_the_endpoint(status_code: int) -> None:
+    result = _result(status_code)
+
+    assert not result.delivered
+    assert not result.rejected
+    assert result.endpoint_failed
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 410])
+def test_other_client_errors_are_rejected(status_code: int) -> None:
+    result = _result(status_code)
+
+    assert result.rejected
+    assert not result.endpoint_failed
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(None, None), ("", None), ("120", 120.0), (" 5 ", 5.0), ("soon", None), ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0)],
+)
+def test_parse_retry_after(value: str | None, expected: float | None) -> None:
+    assert WebhookDispatcher._parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_reads_http_dates() -> None:
+    retry_at = datetime.now(UTC) + timedelta(minutes=2)
+
+    seconds = WebhookDispatcher._parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert seconds is not None and 100 < seconds <= 120
+
+
+@pytest.mark.asyncio
+async def test_record_results_retries_throttled_events_after_retry_after() -> None:
+    dispatcher = _dispatcher()
+    outbox_repo = dispatcher._webhook_outbox_repo = Mock()
+    outbox_repo.reschedule = AsyncMock()
+    outbox_repo.complete = AsyncMock()
+    result = _result(429, retry_after=42)
+
+    await dispatcher._record_results([result])
+
+    outbox_repo.reschedule.assert_awaited_once_with(result.event.id, timedelta(seconds=42), None)
+    outbox_repo.complete.assert_awaited_once_with([])
@@ -0,0 +1,96 @@
+import bisect
+import hashlib
+from typing import Mapping, Sequence, TypeVar
+
+# Accounts are assigned to local worker processes by number and to cluster nodes by name.
+WorkerId = TypeVar("WorkerId", int, str)
+
+# Weight of an account: one unit, plus one per folder (a STATUS per poll) and a fraction per recent message.
+_BASE_WEIGHT = 1.0
+_FOLDER_WEIGHT = 1.0
+_MESSAGE_WEIGHT = 0.05
+
+
+def get_account_weight(folder_count: int, recent_message_count: int) -> float:
+    """Estimate the load an account puts on its worker from its folders and recent message volume."""
+    return _BASE_WEIGHT + folder_count * _FOLDER_WEIGHT + recent_message_count * _MESSAGE_WEIGHT
+
+
+def _hash(key: str) -> int:
+    """Hash a key onto the ring; stable across processes, unlike the built-in hash()."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class AccountAssigner:
+    """
+    Assigns accounts to workers with consistent hashing and bounded loads.
+
+    Each worker owns `virtual_nodes` points of a hash ring, and an account goes to the first worker clockwise from its
+    own hash whose total weight stays within `load_factor` times the average. Accounts keep their current worker while
+    it is still on the ring and has room, so that only new accounts and those of removed workers move.
+    """
+
+    def __init__(self, virtual_nodes: int = 100, load_factor: float = 1.25) -> None:
+        self._virtual_nodes = virtual_nodes
+        self._load_factor = load_factor
+
+    def assign(
+        self,
+        worker_ids: Sequence[WorkerId],
+        weights: Mapping[int, float],
+        current: Mapping[int, WorkerId] | None = None,
+    ) -> dict[int, WorkerId]:
+        """
+        Assign accounts to workers.
+
+        Args:
+            worker_ids: The workers accounts can be assigned to
+            weights: The weight of each account to assign, keyed by account ID
+            current: The worker each account is currently assigned to
+
+        Returns:
+            The worker of each account, keyed by account ID
+        """
+        if not worker_ids or not weights:
+            return {}
+
+        current = current or {}
+        capacity = max(self._load_factor * sum(weights.values()) / len(worker_ids), max(weights.values()))
+        loads = dict.fromkeys(worker_ids, 0.0)
+        assignment: dict[int, WorkerId] = {}
+
+        # Heaviest first, so that the big accounts are the ones that keep their worker when room runs out.
+        account_ids = sorted(weights, key=lambda account_id: (-weights[account_id], account_id))
+
+        for account_id in account_ids:
+            worker_id = current.get(account_id)
+            if worker_id is not None and worker_id in loads and loads[worker_id] + weights[account_id] <= capacity:
+                assignment[account_id] = worker_id
+                loads[worker_id] += weights[account_id]
+
+        ring = sorted(
+            (_hash(f"worker-{worker_id}-{node}"), worker_id)
+            for worker_id in worker_ids
+            for node in range(self._virtual_nodes)
+        )
+        points = [point for point, _ in ring]
+
+        for account_id in account_ids:
+            if account_id in assignment:
+                continue
+
+            weight = weights[account_id]
+            start = bisect.bisect(points, _hash(f"account-{account_id}"))
+            chosen: WorkerId | None = None
+            for offset in range(len(ring)):
+                worker_id = ring[(start + offset) % len(ring)][1]
+                if loads[worker_id] + weight <= capacity:
+                    chosen = worker_id
+                    break
+
+            if chosen is None:
+                chosen = min(loads, key=lambda worker_id: loads[worker_id])
+            assignment[account_id] = chosen
+            loads[chosen] += weight
+
+        return assignment
@@ -1,50 +1,80 @@
 import asyncio
 import logging
 import multiprocessing as mp
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from multiprocessing.queues import Queue
 from typing import Sequence
 
 from app.controllers.imap.listener import IMAPListener
+from app.db import fastapi_sqlalchemy_context
 from app.models.account import Account
 from app.repos.account import AccountRepo
+from app.repos.uid_tracking import UidTrackingRepo
+from app.repos.webhook_log import WebhookLogRepo
 from settings import settings
+from workers.account_assigner import AccountAssigner, get_account_weight
 from workers.imap.imap_worker import start_worker_blocking
-from workers.worker_config import WorkerConfig
+from workers.lease_manager import AccountLeaseManager
+from workers.worker_config import AssignmentUpdate, WorkerConfig
 
 logger = logging.getLogger(__name__)
 
+# Window of webhook activity used to weight accounts by message volume
+_RECENT_ACTIVITY_WINDOW = timedelta(days=1)
+
+
+@dataclass
+class _WorkerSlot:
+    """A worker position on the hash ring, with the process currently running it and its assigned accounts."""
+
+    worker_id: int
+    process: mp.Process | None = None
+    assignment_queue: "Queue[AssignmentUpdate] | None" = None
+    account_ids: set[int] = field(default_factory=set)
+    restarts: list[float] = field(default_factory=list)
+    # Crash-looping workers are taken off the ring until then, so that their accounts are served elsewhere.
+    retired_until: float = 0.0
+
 
 class IMAPClusterManager:
     """Manages multiple IMAP worker processes for horizontal scaling."""
 
-    def __init__(self, account_repo: AccountRepo, imap_listener: IMAPListener, num_workers: int | None = None):
-        self._worker_processes: list[mp.Process] = []
+    def __init__(
+        self,
+        account_repo: AccountRepo,
+        imap_listener: IMAPListener,
+        uid_tracking_repo: UidTrackingRepo,
+        webhook_log_repo: WebhookLogRepo,
+        num_workers: int | None = None,
+        lease_manager: AccountLeaseManager | None = None,
+    ):
         self._shutdown_event = mp.Event()
 
         self._num_workers = num_workers or settings.worker.num_workers
+        self._workers: dict[int, _WorkerSlot] = {}
+        self._accounts: dict[int, Account] = {}
+        self._assigner = AccountAssigner()
 
         self._account_repo = account_repo
         self._imap_listener = imap_listener
+        self._uid_tracking_repo = uid_tracking_repo
+        self._webhook_log_repo = webhook_log_repo
+        # Only set when several nodes share the accounts; this node then watches the accounts it holds a lease on.
+        self._lease_manager = lease_manager
 
     async def start_cluster(self) -> None:
-        """Start the IMAP cluster with distributed accounts."""
+        """Start the IMAP cluster and keep the account assignment up to date while it runs."""
         try:
             logger.info(f"Starting IMAP cluster with {self._num_workers} workers")
 
-            # Load accounts from database
-            accounts = await self._load_accounts()
-            logger.info(f"Loaded {len(accounts)} active accounts from database")
+            self._workers = {worker_id: _WorkerSlot(worker_id=worker_id) for worker_id in range(self._num_workers)}
 
-            if not accounts:
-                logger.debug("No active accounts found in database")
-                return
+            # Assign the active accounts and start the workers that got some
+            await self._rebalance()
 
-            # Distribute accounts across workers
-            worker_configs = self._distribute_accounts(accounts)
-
-            # Start worker processes
-            self._start_workers(worker_configs)
-
-            logger.info(f"IMAP cluster started with {len(self._worker_processes)} workers")
+            logger.info(f"IMAP cluster started with {len(self._get_alive_workers())} workers")
 
             # Monitor workers
             await self._monitor_workers()
@@ -64,52 +94,125 @@ class IMAPClusterManager:
             logger.exception("Failed to load accounts")
         return []
 
-    def _distribute_accounts(self, accounts: Sequence[Account]) -> list[WorkerConfig]:
-        """Distribute accounts evenly across workers."""
-        if not accounts:
-            return []
+    async def _get_account_weights(self, account_ids: list[int]) -> dict[int, float]:
+        """Weight accounts by their folder count and recent message volume, falling back to equal weights."""
+        try:
+            folder_counts = await self._uid_tracking_repo.count_folders_by_accounts(account_ids)
+            message_counts = await self._webhook_log_repo.count_since_by_accounts(
+                account_ids, datetime.now(UTC) - _RECENT_ACTIVITY_WINDOW
+            )
+        except Exception:
+            logger.warning("Failed to load account weights, assigning accounts evenly", exc_info=True)
+            return {account_id: get_account_weight(0, 0) for account_id in account_ids}
 
-        chunk_size = max(1, len(accounts) // self._num_workers)
-        worker_configs = []
+        return {
+            account_id: get_account_weight(folder_counts.get(account_id, 0), message_counts.get(account_id, 0))
+            for account_id in account_ids
+        }
 
-        for i in range(self._num_workers):
-            start_idx = i * chunk_size
+    async def _rebalance(self) -> None:
+        """
+        Assign the active accounts to the available workers and tell each worker what changed.
+
+        Accounts stay on their worker unless it left the ring, so only new accounts and the accounts of retired workers
+        move. Releases are sent to every worker before take-overs to keep the overlap of moved accounts short. With
+        several nodes, only the accounts this node holds a lease on are assigned.
+        """
+        accounts = await self._load_accounts()
+        self._accounts = {account.id: account for account in accounts}
+
+        now = time.monotonic()
+        available = [slot.worker_id for slot in self._workers.values() if slot.retired_until <= now]
+        current = {account_id: slot.worker_id for slot in self._workers.values() for account_id in slot.account_ids}
+        weights = await self._get_account_weights(list(self._accounts))
+        if self._lease_manager is not None:
+            leased = await self._claim_leases(weights, set(current))
+            weights = {account_id: weight for account_id, weight in weights.items() if account_id in leased}
+        assignment = self._assigner.assign(available, weights, current)
+
+        updates: dict[int, AssignmentUpdate] = {}
+        moved = 0
+        for slot in self._workers.values():
+            assigned = {account_id for account_id, worker_id in assignment.items() if worker_id == slot.worker_id}
+            added = assigned - slot.account_ids
+            removed = slot.account_ids - assigned
+            moved += len(added)
+            slot.account_ids = assigned
+
+            if not self._is_alive(slot):
+                if assigned and slot.worker_id in available:
+                    self._start_worker(slot)
+                continue
+
+            if added or removed:
+                updates[slot.worker_id] = AssignmentUpdate(
+                    added_account_ids=sorted(added), removed_account_ids=sorted(removed)
+                )
 
-            # Last worker gets remaining accounts
-            if i == self._num_workers - 1:
-                end_idx = len(accounts)
-            else:
-                end_idx = start_idx + chunk_size
+        for worker_id, update in updates.items():
+            if update.removed_account_ids:
+                self._send_update(worker_id, AssignmentUpdate(removed_account_ids=update.removed_account_ids))
+        for worker_id, update in updates.items():
+            if update.added_account_ids:
+                self._send_update(worker_id, AssignmentUpdate(added_account_ids=update.added_account_ids))
 
-            worker_accounts = accounts[start_idx:end_idx]
+        if moved:
+            logger.info(f"Assigned {moved} accounts ({len(assignment)} active) across {len(available)} workers")
 
-            if worker_accounts:  # Only create workers with accounts
-                config = WorkerConfig(
-                    worker_id=i,
-                    accounts=worker_accounts,
-                    max_connections_per_provider=settings.worker.max_connections_per_provider,
-                )
-                worker_configs.append(config)
+    async def _claim_leases(self, weights: dict[int, float], current: set[int]) -> set[int]:
+        """Claim this node's share of the accounts, keeping the current ones while the held leases are still live."""
+        assert self._lease_manager is not None
 
-                logger.info(f"Worker {i}: assigned {len(worker_accounts)} accounts")
+        # A hung database must not keep this node watching accounts past the expiry of their leases, when other nodes
+        # take them over.
+        timeout = self._lease_manager.remaining_validity or settings.worker.lease_ttl
+        try:
+            return await asyncio.wait_for(self._lease_manager.claim(weights), timeout=timeout)
+        except asyncio.TimeoutError:
+            node_id = self._lease_manager.node_id
+            logger.warning(f"Node {node_id}: Renewing account leases timed out after {timeout:.0f}s")
+        except Exception:
+            logger.warning(f"Node {self._lease_manager.node_id}: Failed to renew account leases", exc_info=True)
 
-        return worker_configs
+        if self._lease_manager.is_valid():
+            return current
 
-    def _start_workers(self, worker_configs: list[WorkerConfig]) -> None:
-        """Start worker processes."""
-        for config in worker_configs:
-            process = mp.Process(
-                target=self._run_worker_process, args=(config,), name=f"imap-worker-{config.worker_id}"
-            )
-            process.start()
-            self._worker_processes.append(process)
+        logger.error(f"Node {self._lease_manager.node_id}: Account leases expired, releasing all accounts")
+        return set()
 
-            logger.info(f"Started worker process {config.worker_id} (PID: {process.pid})")
+    def _send_update(self, worker_id: int, update: AssignmentUpdate) -> None:
+        """Send an assignment update to a running worker."""
+        slot = self._workers[worker_id]
+        if slot.assignment_queue is None:
+            return
+
+        try:
+            slot.assignment_queue.put_nowait(update)
+        except Exception as e:
+            logger.error(f"Failed to send assignment update to worker {worker_id}: {e}")
+
+    def _start_worker(self, slot: _WorkerSlot) -> None:
+        """Start the process of a worker slot with the accounts assigned to it."""
+        slot.assignment_queue = mp.Queue()
+        config = WorkerConfig(
+            worker_id=slot.worker_id,
+            accounts=[self._accounts[account_id] for account_id in sorted(slot.account_ids)],
+            max_connections_per_provider=settings.worker.max_connections_per_provider,
+            assignment_queue=slot.assignment_queue,
+        )
+
+        process = mp.Process(target=self._run_worker_process, args=(config,), name=f"imap-worker-{slot.worker_id}")
+        process.start()
+        slot.process = process
+
+        logger.info(
+            f"Started worker process {slot.worker_id} (PID: {process.pid}) with {len(config.accounts)} accounts"
+        )
 
     def _run_worker_process(self, config: WorkerConfig) -> None:
         """Entry point for worker process."""
         try:
-            asyncio.run(start_worker_blocking(config, self._imap_listener))
+            asyncio.run(self._run_worker(config))
 
         except KeyboardInterrupt:
             logger.info(f"Worker {config.worker_id} interrupted")
@@ -117,40 +220,92 @@ class IMAPClusterManager:
             logger.error(f"Worker {config.worker_id} failed: {e}")
             raise
 
+    async def _run_worker(self, config: WorkerConfig) -> None:
+        """Run a worker with its own database engine, reloading its accounts there instead of sharing the parent's."""
+        async with fastapi_sqlalchemy_context():
+            config.accounts = await self._account_repo.get_active_by_ids([account.id for account in config.accounts])
+            await start_worker_blocking(config, self._imap_listener, self._account_repo)
+
+    def _restart_dead_workers(self) -> bool:
+        """
+        Restart the workers whose process died with the accounts they had.
+
+        Returns:
+            True if a worker crashed too often and was retired, in which case its accounts must be reassigned
+        """
+        retired = False
+        now = time.monotonic()
+        for slot in self._workers.values():
+            if slot.process is None or slot.process.is_alive():
+                continue
+
+            logger.error(f"Worker {slot.process.name} died (exit code: {slot.process.exitcode})")
+            slot.process = None
+            slot.assignment_queue = None
+
+            slot.restarts = [restart for restart in slot.restarts if now - restart < settings.worker.restart_window]
+            slot.restarts.append(now)
+            if len(slot.restarts) > settings.worker.max_restarts:
+                logger.error(
+                    f"Worker {slot.worker_id} died {len(slot.restarts)} times in {settings.worker.restart_window}s, "
+                    f"moving its {len(slot.account_ids)} accounts to the other workers"
+                )
+                slot.retired_until = now + settings.worker.restart_window
+                slot.restarts.clear()
+                slot.account_ids = set()
+                retired = True
+                continue
+
+            self._start_worker(slot)
+
+        return retired
+
     async def _monitor_workers(self) -> None:
-        """Monitor worker processes and handle failures."""
+        """Monitor worker processes, restart the dead ones and rebalance accounts periodically."""
         logger.info("Starting worker monitoring")
 
+        check_interval = min(30, settings.worker.rebalance_interval)
+        if self._lease_manager is not None:
+            # Leases are renewed and dead nodes' accounts claimed on every check, which keeps failover within a lease.
+            check_interval = min(check_interval, self._lease_manager.renew_interval)
+        last_rebalance = time.monotonic()
+
         while not self._shutdown_event.is_set():
             try:
-                # Check worker health
-                alive_workers = [p for p in self._worker_processes if p.is_alive()]
-                dead_workers = [p for p in self._worker_processes if not p.is_alive()]
-
-                if dead_workers:
-                    logger.warning(f"Found {len(dead_workers)} dead workers")
-                    for worker in dead_workers:
-                        logger.error(f"Worker {worker.name} died (exit code: {worker.exitcode})")
-                        self._worker_processes.remove(worker)
+                retired = self._restart_dead_workers()
+                due = time.monotonic() - last_rebalance >= settings.worker.rebalance_interval
+                if retired or due or self._lease_manager is not None:
+                    await self._rebalance()
+                    last_rebalance = time.monotonic()
 
-                logger.info(f"Cluster health: {len(alive_workers)} workers alive")
+                logger.info(f"Cluster health: {len(self._get_alive_workers())} workers alive")
 
                 # Sleep before next check
-                await asyncio.sleep(30)
+                await asyncio.sleep(check_interval)
 
             except Exception as e:
                 logger.error(f"Error in worker monitoring: {e}")
                 await asyncio.sleep(10)
 
+    def _is_alive(self, slot: _WorkerSlot) -> bool:
+        """Check whether a worker slot has a running process."""
+        return slot.process is not None and slot.process.is_alive()
+
+    def _get_alive_workers(self) -> list[mp.Process]:
+        """Get the processes of the workers that are running."""
+        return [slot.process for slot in self._workers.values() if slot.process is not None and slot.process.is_alive()]
+
     async def get_cluster_stats(self) -> dict[str, int | list[int]]:
         """Get cluster-wide statistics."""
-        alive_workers = [p for p in self._worker_processes if p.is_alive()]
+        processes = [slot.process for slot in self._workers.values() if slot.process is not None]
+        alive_workers = self._get_alive_workers()
 
         stats: dict[str, int | list[int]] = {
-            "total_workers": len(self._worker_processes),
+            "total_workers": len(processes),
             "alive_workers": len(alive_workers),
-            "dead_workers": len(self._worker_processes) - len(alive_workers),
+            "dead_workers": len(processes) - len(alive_workers),
             "worker_pids": [p.pid for p in alive_workers if p.pid is not None],
+            "assigned_accounts": sum(len(slot.account_ids) for slot in self._workers.values()),
         }
 
         return stats
@@ -161,20 +316,32 @@ class IMAPClusterManager:
 
         self._shutdown_event.set()
 
+        processes = [slot.process for slot in self._workers.values() if slot.process is not None]
+
         # Terminate worker processes
-        for process in self._worker_processes:
+        for process in processes:
             if process.is_alive():
                 logger.info(f"Terminating worker {process.name}")
                 process.terminate()
 
         # Wait for processes to terminate
-        for process in self._worker_processes:
+        for process in processes:
             process.join(timeout=30)
             if process.is_alive():
                 logger.warning(f"Force killing worker {process.name}")
                 process.kill()
 
-        self._worker_processes.clear()
+        for slot in self._workers.values():
+            slot.process = None
+            slot.assignment_queue = None
+
+        # The workers are gone, so other nodes can take over the accounts right away instead of waiting for expiry.
+        if self._lease_manager is not None:
+            try:
+                await self._lease_manager.close()
+            except Exception as e:
+                logger.error(f"Failed to release account leases: {e}")
+
         logger.info("IMAP cluster shutdown complete")
 
     async def _cleanup(self) -> None:
@@ -18,6 +18,7 @@ from logging_config import setup_logging
 from settings import settings
 from workers.cluster_manager import IMAPClusterManager
 from workers.imap.imap_worker import start_worker
+from workers.lease_manager import AccountLeaseManager
 from workers.worker_config import WorkerConfig
 
 if settings.sentry.is_enabled:
@@ -89,6 +90,16 @@ async def run_cluster_mode(num_workers: int | None = None) -> None:
         cluster_manager = IMAPClusterManager(
             account_repo=container.repos.account(),
             imap_listener=container.controllers.imap_listener(),
+            uid_tracking_repo=container.repos.uid_tracking(),
+            webhook_log_repo=container.repos.webhook_log(),
+            lease_manager=(
+                AccountLeaseManager(
+                    account_lease_repo=container.repos.account_lease(),
+                    cluster_node_repo=container.repos.cluster_node(),
+                )
+                if settings.worker.sharding_enabled
+                else None
+            ),
             num_workers=num_workers,
         )
 
@@ -1,8 +1,11 @@
 import asyncio
 import logging
+import queue
 
 from app.controllers.imap.listener import IMAPListener
-from workers.worker_config import WorkerConfig
+from app.models import Account
+from app.repos.account import AccountRepo
+from workers.worker_config import AssignmentUpdate, WorkerConfig
 
 logger = logging.getLogger(__name__)
 
@@ -10,16 +13,18 @@ logger = logging.getLogger(__name__)
 class IMAPWorker:
     """Worker process that handles IMAP listening for a subset of accounts."""
 
-    def __init__(self, config: WorkerConfig, imap_listener: IMAPListener):
+    def __init__(self, config: WorkerConfig, imap_listener: IMAPListener, account_repo: AccountRepo | None = None):
         self._config = config
         self._worker_id = config.worker_id
-        self._accounts = config.accounts
+        self._accounts = list(config.accounts)
         self._imap_listener = imap_listener
+        self._account_repo = account_repo
 
         # State management
         self._active_tasks: list[asyncio.Task[None]] = []
         self._shutdown_event = asyncio.Event()
         self._worker_task: asyncio.Task[None] | None = None
+        self._assignment_task: asyncio.Task[None] | None = None
 
         # Performance tracking
         self._stats = {
@@ -38,6 +43,10 @@ class IMAPWorker:
             # Start account listeners
             await self._start_account_listeners()
 
+            # Follow the accounts the cluster manager moves to or away from this worker
+            if self._config.assignment_queue is not None and self._account_repo is not None:
+                self._assignment_task = asyncio.create_task(self._watch_assignments())
+
             # Mark startup complete
             self._stats["startup_time"] = asyncio.get_event_loop().time()
             logger.info(f"Worker {self._worker_id} startup complete")
@@ -55,32 +64,84 @@ class IMAPWorker:
         """Start IMAP listeners for all assigned accounts."""
         logger.info(f"Worker {self._worker_id}: Starting listeners for {len(self._accounts)} accounts")
 
+        try:
+            # Load the UID tracking of every account at once and start listening for account changes
+            await self._imap_listener.load_accounts(self._accounts)
+        except Exception as e:
+            logger.warning(f"Worker {self._worker_id}: Failed to load account state: {e}")
+
         for account in self._accounts:
-            try:
-                # Start account listeners
-                tasks = await self._imap_listener.start_account_listener(account)
-                self._active_tasks.extend(tasks)
+            await self._start_listeners(account)
 
-                self._stats["accounts_loaded"] += 1
-                self._stats["listeners_started"] += len(tasks)
+        logger.info(f"Worker {self._worker_id}: Started {self._stats['listeners_started']} total listeners")
 
-                logger.info(f"Started {len(tasks)} listeners for {account.email}")
+    async def _start_listeners(self, account: Account) -> None:
+        """Start the IMAP listeners of an account."""
+        try:
+            # Start account listeners
+            tasks = await self._imap_listener.start_account_listener(account)
+            self._active_tasks.extend(tasks)
 
-                # Small delay to prevent overwhelming the IMAP servers
-                await asyncio.sleep(0.1)
+            self._stats["accounts_loaded"] += 1
+            self._stats["listeners_started"] += len(tasks)
 
-            except Exception as e:
-                logger.error(f"Failed to start listeners for {account.email}: {e}")
-                self._stats["connection_errors"] += 1
+            logger.info(f"Started {len(tasks)} listeners for {account.email}")
+
+            # Small delay to prevent overwhelming the IMAP servers
+            await asyncio.sleep(0.1)
+
+        except Exception as e:
+            logger.error(f"Failed to start listeners for {account.email}: {e}")
+            self._stats["connection_errors"] += 1
+
+    async def _watch_assignments(self) -> None:
+        """Apply the assignment updates sent by the cluster manager until shutdown."""
+        assignment_queue = self._config.assignment_queue
+        assert assignment_queue is not None
+
+        while not self._shutdown_event.is_set():
+            try:
+                update = await asyncio.to_thread(assignment_queue.get, True, 1)
+            except queue.Empty:
                 continue
 
-        logger.info(f"Worker {self._worker_id}: Started {self._stats['listeners_started']} total listeners")
+            try:
+                await self._apply_assignment(update)
+            except Exception as e:
+                logger.error(f"Worker {self._worker_id}: Failed to apply assignment update: {e}")
+
+    async def _apply_assignment(self, update: AssignmentUpdate) -> None:
+        """Stop the accounts moved away from this worker and start the ones moved to it."""
+        assert self._account_repo is not None
+
+        removed_ids = set(update.removed_account_ids)
+        for account in [account for account in self._accounts if account.id in removed_ids]:
+            await self._imap_listener.remove_account(account)
+            self._accounts.remove(account)
+            logger.info(f"Worker {self._worker_id}: Released {account.email}")
+
+        known_ids = {account.id for account in self._accounts}
+        added_ids = [account_id for account_id in update.added_account_ids if account_id not in known_ids]
+        if not added_ids:
+            return
+
+        accounts = list(await self._account_repo.get_active_by_ids(added_ids))
+        await self._imap_listener.load_accounts(accounts)
+        for account in accounts:
+            self._accounts.append(account)
+            await self._start_listeners(account)
+
+        logger.info(f"Worker {self._worker_id}: Took over {len(accounts)} accounts")
 
     async def _cleanup(self) -> None:
         """Clean up all resources."""
         logger.info(f"Worker {self._worker_id}: Starting cleanup")
 
         try:
+            if self._assignment_task and not self._assignment_task.done():
+                self._assignment_task.cancel()
+                await asyncio.gather(self._assignment_task, return_exceptions=True)
+
             # Stop all IMAP listeners
             if self._imap_listener:
                 await self._imap_listener.stop_all_listeners()
@@ -124,7 +185,9 @@ async def start_worker(config: WorkerConfig, imap_listener: IMAPListener) -> IMA
     return worker
 
 
-async def start_worker_blocking(config: WorkerConfig, imap_listener: IMAPListener) -> None:
+async def start_worker_blocking(
+    config: WorkerConfig, imap_listener: IMAPListener, account_repo: AccountRepo | None = None
+) -> None:
     """Start a worker process with the given configuration (blocking version for cluster mode)."""
-    worker = IMAPWorker(config, imap_listener)
+    worker = IMAPWorker(config, imap_listener, account_repo)
     await worker.run()
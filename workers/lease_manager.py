@@ -0,0 +1,102 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Mapping
+
+from app.repos.account_lease import AccountLeaseRepo
+from app.repos.cluster_node import ClusterNodeRepo
+from settings import settings
+from workers.account_assigner import AccountAssigner
+
+logger = logging.getLogger(__name__)
+
+
+class AccountLeaseManager:
+    """
+    Shares the active accounts between the nodes of a multi-node deployment through lease rows.
+
+    Every node keeps a cluster_nodes row alive and spreads the accounts over the live nodes with the same consistent
+    hashing used for local workers. A node only watches the accounts it holds a live lease on, so the accounts of a node
+    that dies move to the others once its leases expire, and a node that can't renew its leases in time must stop
+    watching them.
+    """
+
+    def __init__(
+        self, account_lease_repo: AccountLeaseRepo, cluster_node_repo: ClusterNodeRepo, node_id: str | None = None
+    ) -> None:
+        self._account_lease_repo = account_lease_repo
+        self._cluster_node_repo = cluster_node_repo
+        self._node_id = node_id or settings.worker.node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._ttl = timedelta(seconds=settings.worker.lease_ttl)
+        self._assigner = AccountAssigner()
+        self._valid_until = 0.0
+        # Leases on accounts that moved to other nodes, released once the workers were told to let go of them
+        self._pending_release: set[int] = set()
+
+    @property
+    def node_id(self) -> str:
+        """The name of this node in the cluster."""
+        return self._node_id
+
+    @property
+    def renew_interval(self) -> int:
+        """How often leases must be renewed to stay valid with a safety margin."""
+        return max(1, settings.worker.lease_ttl // 3)
+
+    @property
+    def remaining_validity(self) -> float:
+        """Seconds until the leases held by this node expire unless they are renewed."""
+        return max(0.0, self._valid_until - time.monotonic())
+
+    def is_valid(self) -> bool:
+        """Check whether the leases held by this node were renewed recently enough to still be live."""
+        return time.monotonic() < self._valid_until
+
+    async def heartbeat(self) -> None:
+        """Keep this node and all of its leases alive for another lease period."""
+        started = time.monotonic()
+        await self._cluster_node_repo.heartbeat(self._node_id, self._ttl)
+        await self._account_lease_repo.renew(self._node_id, self._ttl)
+        self._valid_until = started + self._ttl.total_seconds()
+
+    async def claim(self, weights: Mapping[int, float]) -> set[int]:
+        """
+        Renew this node's leases and claim its share of the accounts.
+
+        Args:
+            weights: The weight of each active account, keyed by account ID
+
+        Returns:
+            The IDs of the accounts this node holds a live lease on
+        """
+        await self.heartbeat()
+
+        if self._pending_release:
+            await self._account_lease_repo.release(self._node_id, sorted(self._pending_release))
+            self._pending_release.clear()
+
+        node_ids = await self._cluster_node_repo.get_live_node_ids()
+        if self._node_id not in node_ids:
+            node_ids.append(self._node_id)
+
+        owners = await self._account_lease_repo.get_live_owners()
+        assignment = self._assigner.assign(node_ids, weights, owners)
+        wanted = sorted(account_id for account_id, node_id in assignment.items() if node_id == self._node_id)
+        held = await self._account_lease_repo.claim(self._node_id, wanted, self._ttl)
+
+        self._pending_release = {
+            account_id for account_id, node_id in owners.items() if node_id == self._node_id and account_id not in held
+        }
+        if len(held) < len(wanted):
+            logger.info(f"Node {self._node_id}: waiting for {len(wanted) - len(held)} leases held by other nodes")
+
+        return held
+
+    async def close(self) -> None:
+        """Release every lease of this node and leave the cluster, so that other nodes take over right away."""
+        await self._account_lease_repo.release(self._node_id)
+        await self._cluster_node_repo.remove(self._node_id)
+        self._valid_until = 0.0
+        logger.info(f"Node {self._node_id} left the cluster")
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+from time import sleep
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+load_dotenv("./.env", override=True)
+
+import sentry_sdk
+
+from app.container import get_wire_container
+from app.db import fastapi_sqlalchemy_context
+from logging_config import setup_logging
+from settings import settings
+
+if settings.sentry.is_enabled:
+    sentry_sdk.init(dsn=settings.sentry.dsn, environment=settings.environment.value)
+
+logger = logging.getLogger(__name__)
+setup_logging()
+container = get_wire_container()
+
+
+async def main() -> None:
+    """Send the queued messages until a shutdown signal is received."""
+    async with fastapi_sqlalchemy_context():
+        send_queue_worker = container.controllers.send_queue_worker()
+
+        # Setup signal handlers for graceful shutdown
+        shutdown_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(sig, shutdown_event.set)
+
+        await send_queue_worker.run(shutdown_event)
+
+
+if __name__ == "__main__":
+    logger.info("Starting send queue worker")
+    while True:
+        try:
+            asyncio.run(main())
+            break
+        except Exception:
+            logger.exception("Error in main")
+        sleep(5)
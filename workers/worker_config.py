@@ -1,11 +1,22 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from multiprocessing.queues import Queue
 from typing import Sequence
 
 from app.models import Account
 
 
+@dataclass
+class AssignmentUpdate:
+    """Accounts the cluster manager moved to or away from a worker."""
+
+    added_account_ids: list[int] = field(default_factory=list)
+    removed_account_ids: list[int] = field(default_factory=list)
+
+
 @dataclass
 class WorkerConfig:
     worker_id: int
     accounts: Sequence[Account]
     max_connections_per_provider: int = 50
+    # Receives AssignmentUpdates from the cluster manager; None when the worker runs on its own.
+    assignment_queue: "Queue[AssignmentUpdate] | None" = None